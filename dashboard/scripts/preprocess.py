@@ -3,27 +3,93 @@ Preprocess pipeline for the Congress Sentiment Dashboard.
 
 Reads:
     data/processed/user_full.csv
-    data/processed/house_tweets_enriched.csv
-    data/processed/fec_legislators_matched.csv  (for bioguide IDs)
+    data/processed/house_tweets_enriched.parquet  (if present, else the .csv)
+    data/processed/house_with_features.csv  (for bioguide IDs)
 
 Writes:
     dashboard/src/data/members.json
-    dashboard/src/data/top_tweets.json
+    dashboard/src/data/tweet_index.json     (handle → tweet shard path)
+    dashboard/src/data/aggregates.json      (tweet metrics by caucus × party × quartile × month)
+    dashboard/public/tweets/<handle>.<hash>.json  (+ .gz/.br with --precompress)
+    dashboard/src/data/build_manifest.json  (content hashes for --incremental)
+
+Each member's sampled tweets go to their own shard, named by a hash of its
+content, so the app bundles only the small index and the member page fetches
+one shard. Shard names change with their content, so netlify.toml serves
+/tweets/* as immutable; Netlify compresses the JSON itself.
+
+--precompress also writes .gz (and .br, if brotli is installed) copies of each
+shard, for static servers that serve them in place of the .json (nginx
+gzip_static / brotli_static). Without it, copies left by an earlier build are
+removed.
 
 Run from project root:
     python dashboard/scripts/preprocess.py
+    python dashboard/scripts/preprocess.py --incremental   # only rebuild what changed
+
+--incremental compares each input file's sha256, and each member's tweet rows,
+with the manifest from the last build. It skips members.json when the member
+tables are unchanged, skips reading tweets when the tweets file and member list
+are unchanged, and otherwise re-samples only the members whose tweet rows
+changed, rewriting just their shards. aggregates.json is rebuilt from all the
+tweets whenever they are read.
+
+--profile times each build stage and reports its peak memory and hottest
+functions (scripts/stage_profiler.py); --profile out.json also saves them.
+
+--check-sample first checks select_member_tweets against the per-member
+nlargest / nsmallest loop it replaced, on the loaded tweets and on a copy with
+missing scores and unparseable dates, and exits if any member's sample differs.
 """
 
+import argparse
+import gzip
+import hashlib
 import json
 import math
+import sys
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 
-PROCESSED = Path("data/processed")
-OUT_DIR   = Path("dashboard/src/data")
+# Shared helpers in the repo's scripts/: stage_profiler (stdlib only), and near_dup
+# (scipy), imported only when the tweets have no dup_cluster column
+SCRIPTS = Path(__file__).resolve().parents[2] / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+from stage_profiler import StageProfiler
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+PROCESSED   = Path("data/processed")
+OUT_DIR     = Path("dashboard/src/data")
+PUBLIC_DIR  = Path("dashboard/public")
+TWEETS_DIR  = PUBLIC_DIR / "tweets"
 OUT_DIR.mkdir(parents=True, exist_ok=True)
+TWEETS_DIR.mkdir(parents=True, exist_ok=True)
+MANIFEST    = OUT_DIR / "build_manifest.json"
+TWEET_INDEX = OUT_DIR / "tweet_index.json"
+AGGREGATES  = OUT_DIR / "aggregates.json"
+BROTLI_QUALITY = 5   # ~ the size of the default 11 on shards, at a small fraction of the time
+
+parser = argparse.ArgumentParser(description="Build the dashboard JSON files.")
+parser.add_argument("--incremental", action="store_true",
+                    help="only recompute members whose inputs changed since the last build")
+parser.add_argument("--members-format", choices=["records", "columns"], default="records",
+                    help="members.json as a list of records, or as {column: [values]} with each name written once")
+parser.add_argument("--profile", nargs="?", const=True, default=None, metavar="JSON",
+                    help="report time, peak memory and top functions per stage (optionally saved to JSON)")
+parser.add_argument("--check-sample", action="store_true",
+                    help="check the vectorised tweet sampling against the per-member nlargest/nsmallest loop first")
+parser.add_argument("--precompress", action="store_true",
+                    help="also write .gz/.br copies of each tweet shard for servers that serve them")
+args = parser.parse_args()
+if args.precompress and brotli is None:
+    print("brotli not installed; tweet shards get .gz only (pip install brotli for .br)")
+PROFILE = StageProfiler(enabled=bool(args.profile))
 
 
 def clean_value(v):
@@ -46,12 +112,97 @@ def clean_value(v):
     return v
 
 
+def _round4(a):
+    """np.round(a, 4), with values on a rounding boundary redone by round() so results match clean_value exactly."""
+    out = np.round(a, 4)
+    scaled = a * 1e4
+    edge = np.abs(scaled - np.floor(scaled) - 0.5) <= 2 * np.spacing(np.abs(scaled))
+    for i in np.flatnonzero(edge):
+        out[i] = round(float(a[i]), 4)
+    return out
+
+
+def clean_column(s):
+    """
+    clean_value for a whole Series: NaN/Inf → None, floats rounded to 4 places,
+    numpy scalars → Python values. Converts by dtype once instead of per cell.
+    """
+    if isinstance(s.dtype, np.dtype) and s.dtype.kind in "iub":
+        return s.tolist()
+    if isinstance(s.dtype, np.dtype) and s.dtype.kind == "f":
+        a = s.to_numpy(dtype=np.float64)
+        bad = ~np.isfinite(a)
+        out = _round4(np.where(bad, 0.0, a)).astype(object)
+        out[bad] = None
+        return out.tolist()
+    if pd.api.types.infer_dtype(s, skipna=True) in ("string", "empty"):
+        return s.astype(object).where(s.notna(), None).tolist()
+    return [clean_value(v) for v in s.tolist()]
+
+
+def clean_frame(df):
+    """{column: cleaned values} for every column of df."""
+    return {c: clean_column(df[c]) for c in df.columns}
+
+
+def to_records(columns):
+    """{column: values} → [{column: value}, ...]."""
+    names = list(columns)
+    return [dict(zip(names, row)) for row in zip(*columns.values())]
+
+
+def from_columns(obj):
+    """members.json in either format → list of records."""
+    return to_records(obj) if isinstance(obj, dict) else obj
+
+
 def write_json(obj, path):
     """Write strict JSON — fails loudly if NaN/Inf sneaks through."""
     with open(path, "w") as f:
         json.dump(obj, f, separators=(",", ":"), allow_nan=False)
 
 
+def file_digest(path, previous=None):
+    """sha256 of a file, reusing the previous entry when size and mtime are unchanged."""
+    st = path.stat()
+    if previous and previous["size"] == st.st_size and previous["mtime_ns"] == st.st_mtime_ns:
+        return previous
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": h.hexdigest()}
+
+
+def load_manifest():
+    """The last build's manifest, or {} if it can't be trusted (script edited, outputs missing)."""
+    if not MANIFEST.exists():
+        return {}
+    with open(MANIFEST) as f:
+        manifest = json.load(f)
+    outputs = [OUT_DIR / "members.json", TWEET_INDEX, AGGREGATES]
+    if manifest.get("script") != SCRIPT_DIGEST or not all(p.exists() for p in outputs):
+        return {}
+    with open(TWEET_INDEX) as f:
+        if not all((PUBLIC_DIR / shard).exists() for shard in json.load(f).values()):
+            return {}
+    return manifest
+
+
+def unchanged(names):
+    return bool(manifest) and all(
+        manifest["inputs"].get(n, {}).get("sha256") == inputs[n]["sha256"] for n in names)
+
+
+SCRIPT_DIGEST = hashlib.sha256(Path(__file__).read_bytes() + (SCRIPTS / "near_dup.py").read_bytes()).hexdigest()
+manifest = load_manifest() if args.incremental else {}
+if args.incremental and not manifest:
+    print("No usable build manifest — full rebuild.")
+
+MEMBER_INPUTS = ["user_full.csv", "house_with_features.csv"]
+inputs = {n: file_digest(PROCESSED / n, manifest.get("inputs", {}).get(n)) for n in MEMBER_INPUTS}
+
+
 # ── 1. members.json ──────────────────────────────────────────────────────────
 
 KEEP_COLS = [
@@ -75,101 +226,462 @@ KEEP_COLS = [
     "pct_change_22_24",
 ]
 
-df = pd.read_csv(PROCESSED / "user_full.csv")
-
-# Merge bioguide from house_with_features.csv — this file was built from the same
-# tweet handles as user_full, so handle_lower matches perfectly.
-print("Merging bioguide IDs from house_with_features.csv...")
-features = pd.read_csv(PROCESSED / "house_with_features.csv")
-bio_lookup = (
-    features[["handle_lower", "bioguide"]]
-    .dropna(subset=["bioguide"])
-    .drop_duplicates(subset="handle_lower")
-)
-
-if "bioguide" in df.columns:
-    df = df.drop(columns="bioguide")
-df = df.merge(bio_lookup, on="handle_lower", how="left")
-
-n_with_bioguide = df["bioguide"].notna().sum()
-print(f"  bioguide coverage: {n_with_bioguide} / {len(df)} members")
-
-missing_bio = df[df["bioguide"].isna()][["handle_lower", "official_full"]]
-if len(missing_bio):
-    print(f"  Still missing ({len(missing_bio)}):")
-    print(missing_bio.to_string())
-
-cols = [c for c in KEEP_COLS if c in df.columns]
-missing = [c for c in KEEP_COLS if c not in df.columns]
-if missing:
-    print(f"WARNING: missing columns: {missing}")
-
-records = [
-    {k: clean_value(v) for k, v in row.items()}
-    for row in df[cols].to_dict("records")
-]
 
-write_json(records, OUT_DIR / "members.json")
-print(f"members.json     → {len(records):>4} members, {len(cols)} columns")
+def build_members():
+    """members.json columns ({column: values}) from user_full.csv + bioguide IDs from house_with_features.csv."""
+    df = pd.read_csv(PROCESSED / "user_full.csv")
 
+    # Merge bioguide from house_with_features.csv — this file was built from the same
+    # tweet handles as user_full, so handle_lower matches perfectly.
+    print("Merging bioguide IDs from house_with_features.csv...")
+    features = pd.read_csv(PROCESSED / "house_with_features.csv")
+    bio_lookup = (
+        features[["handle_lower", "bioguide"]]
+        .dropna(subset=["bioguide"])
+        .drop_duplicates(subset="handle_lower")
+    )
+
+    if "bioguide" in df.columns:
+        df = df.drop(columns="bioguide")
+    df = df.merge(bio_lookup, on="handle_lower", how="left")
+
+    n_with_bioguide = df["bioguide"].notna().sum()
+    print(f"  bioguide coverage: {n_with_bioguide} / {len(df)} members")
+
+    missing_bio = df[df["bioguide"].isna()][["handle_lower", "official_full"]]
+    if len(missing_bio):
+        print(f"  Still missing ({len(missing_bio)}):")
+        print(missing_bio.to_string())
+
+    cols = [c for c in KEEP_COLS if c in df.columns]
+    missing = [c for c in KEEP_COLS if c not in df.columns]
+    if missing:
+        print(f"WARNING: missing columns: {missing}")
+
+    return clean_frame(df[cols])
 
-# ── 2. top_tweets.json ───────────────────────────────────────────────────────
-# Multi-criteria sample per member: top by retweets, top by positive sentiment,
-# top by negative sentiment, and most recent. Up to ~30 tweets per member.
 
-print("Loading house_tweets_enriched.csv (this will take ~30s)...")
+def record_digest(record):
+    return hashlib.sha1(json.dumps(record, sort_keys=True).encode()).hexdigest()
 
-tweets = pd.read_csv(
-    PROCESSED / "house_tweets_enriched.csv",
-    low_memory=False,
-    usecols=["handle_lower", "Text", "Created At", "Tweet_ID",
-             "Retweets", "Likes", "sentiment_score", "label"],
-)
 
-tweets = tweets.dropna(subset=["handle_lower", "Text"])
+if unchanged(MEMBER_INPUTS) and manifest.get("members_format", "records") == args.members_format:
+    with open(OUT_DIR / "members.json") as f:
+        records = from_columns(json.load(f))
+    member_digests = manifest["members"]
+    members_changed = False
+    print(f"members.json     → {len(records):>4} members, unchanged")
+else:
+    with PROFILE.stage("members"):
+        columns = build_members()
+        records = to_records(columns)
+    member_digests = {r["handle_lower"]: record_digest(r) for r in records if r.get("handle_lower")}
+    members_changed = member_digests != manifest.get("members")
+    write_json(columns if args.members_format == "columns" else records, OUT_DIR / "members.json")
+    n_changed = sum(manifest.get("members", {}).get(h) != d for h, d in member_digests.items())
+    print(f"members.json     → {len(records):>4} members, {len(columns)} columns"
+          + (f", {n_changed} changed" if manifest else ""))
 
+
+# ── 2. Tweet shards ──────────────────────────────────────────────────────────
+# Multi-criteria sample per member: top by retweets, top by positive sentiment,
+# top by negative sentiment, and most recent. Up to ~30 tweets per member.
+
+TWEET_COLS = ["handle_lower", "Text", "Created At", "Tweet_ID",
+              "Retweets", "Likes", "sentiment_score", "label"]
+# Near-duplicate cluster id, written by score_tweets.py --near-dup; computed here if absent
+DUP_COL = "dup_cluster"
+# Tweet-level scores summarised in aggregates.json (section 3); the avg_* columns of members.json
+CUBE_METRICS = ["sentiment_score", "anger", "fear", "joy", "disgust", "sadness"]
+READ_COLS = TWEET_COLS + [c for c in CUBE_METRICS if c not in TWEET_COLS] + [DUP_COL]
 valid_handles = {r["handle_lower"] for r in records if r.get("handle_lower")}
-tweets = tweets[tweets["handle_lower"].isin(valid_handles)]
 
-tweets["Retweets"] = pd.to_numeric(tweets["Retweets"], errors="coerce").fillna(0)
-tweets["Likes"]    = pd.to_numeric(tweets["Likes"],    errors="coerce").fillna(0)
+enriched_csv     = PROCESSED / "house_tweets_enriched.csv"
+enriched_parquet = PROCESSED / "house_tweets_enriched.parquet"
+use_parquet = enriched_parquet.exists() and (
+    not enriched_csv.exists() or enriched_parquet.stat().st_mtime >= enriched_csv.stat().st_mtime)
+tweets_input = enriched_parquet if use_parquet else enriched_csv
+inputs[tweets_input.name] = file_digest(tweets_input, manifest.get("inputs", {}).get(tweets_input.name))
+
+
+def load_tweets():
+    if use_parquet:
+        # Written by scripts/enriched_store.py: read only these columns and only
+        # the row groups that hold dashboard members
+        import pyarrow.parquet as pq
+
+        print(f"Loading {enriched_parquet.name}...")
+        stored = pq.read_schema(enriched_parquet).names
+        tweets = pd.read_parquet(
+            enriched_parquet,
+            columns=[c for c in stored if c in READ_COLS],  # same column order as read_csv(usecols=...)
+            filters=[("handle_lower", "in", sorted(valid_handles))],
+        )
+        tweets["handle_lower"] = tweets["handle_lower"].cat.remove_unused_categories()
+    else:
+        print("Loading house_tweets_enriched.csv (this will take ~30s)...")
+        tweets = pd.read_csv(
+            enriched_csv,
+            low_memory=False,
+            usecols=lambda c: c in READ_COLS,
+        )
+
+    tweets = tweets.dropna(subset=["handle_lower", "Text"])
+    return tweets[tweets["handle_lower"].isin(valid_handles)]
+
+
+def prepare_tweets(tweets):
+    tweets = tweets.copy()
+    tweets["Retweets"] = pd.to_numeric(tweets["Retweets"], errors="coerce").fillna(0)
+    tweets["Likes"]    = pd.to_numeric(tweets["Likes"],    errors="coerce").fillna(0)
+
+    # Parse dates so we can pick recent
+    tweets["_dt"] = pd.to_datetime(tweets["Created At"], errors="coerce", utc=True)
+    tweets["Created At"] = tweets["Created At"].astype(str)
+    return tweets
+
+
+def tweet_digests(tweets):
+    """{handle: sha1 of that member's tweet rows (sampled columns)}, sensitive to values and row order."""
+    row_hash = pd.util.hash_pandas_object(tweets[[c for c in tweets.columns if c in TWEET_COLS + [DUP_COL]]],
+                                          index=False).to_numpy()
+    codes, handles = pd.factorize(tweets["handle_lower"], sort=True)
+    order = np.argsort(codes, kind="stable")
+    bounds = np.flatnonzero(np.diff(codes[order])) + 1
+    return {h: hashlib.sha1(chunk.tobytes()).hexdigest()
+            for h, chunk in zip(list(handles), np.split(row_hash[order], bounds))}
+
+
+# (column, n, largest) per ranking strategy, in output order. Up to ~60 unique
+# tweets per member, so the dashboard's filtered views draw from a broad pool.
+TWEET_PICKS = [
+    ("Retweets",        20, True),    # most viral
+    ("sentiment_score", 15, True),    # most positive
+    ("sentiment_score", 15, False),   # most negative
+    ("_dt",             10, True),    # most recent
+]
+
 
-# Parse dates so we can pick recent
-tweets["_dt"] = pd.to_datetime(tweets["Created At"], errors="coerce", utc=True)
-tweets["Created At"] = tweets["Created At"].astype(str)
+def _sort_key(s, largest):
+    """
+    (values, missing) arrays that sort like s.nlargest / s.nsmallest: ascending
+    values with ties in row order, and missing values last. DataFrame.nlargest /
+    nsmallest keep NaN / NaT rows after the rest (unlike Series.nlargest, which
+    drops them), so a member with fewer than n values still gets n rows.
+    """
+    missing = s.isna().to_numpy()
+    if s.dtype.kind == "M":
+        values = np.where(missing, 0, s.array.asi8)
+    else:
+        values = s.to_numpy(dtype=np.float64 if s.dtype.kind == "f" else np.int64, na_value=0)
+    if largest:
+        values = -values if values.dtype.kind == "f" else ~values
+    return values, missing
 
 
-def collect_for_member(g):
+def select_member_tweets(tweets, picks=TWEET_PICKS, near_dup=True):
     """
-    Return up to ~50 unique tweets per member across four ranking strategies,
-    ensuring the dashboard's filtered views draw from a comprehensive pool.
+    Every member's sample in one pass over the whole frame. Same rows and order
+    as running g.nlargest / g.nsmallest per member for each pick, concatenating
+    and dropping repeated Tweet_IDs (or Text). With near_dup, it then drops any
+    tweet in the same near-duplicate cluster as one already picked: DUP_COL
+    from score_tweets.py --near-dup if present, else clusters of just the
+    picked rows, within each member (scripts/near_dup.py, needs scipy).
+
+    Returns (positions of the sampled rows in `tweets`, their member group number).
     """
-    take = []
-    take.append(g.nlargest(20, "Retweets"))           # most viral
-    take.append(g.nlargest(15, "sentiment_score"))    # most positive
-    take.append(g.nsmallest(15, "sentiment_score"))   # most negative
-    take.append(g.nlargest(10, "_dt"))                # most recent
-
-    out = pd.concat(take, ignore_index=True)
-    if "Tweet_ID" in out.columns:
-        out = out.drop_duplicates(subset="Tweet_ID")
+    group = tweets.groupby("handle_lower", observed=True).ngroup().to_numpy()
+    if not len(group):
+        return np.array([], dtype=np.intp), group
+    row = np.arange(len(tweets))
+
+    rows, groups, blocks, ranks = [], [], [], []
+    for block, (col, n, largest) in enumerate(picks):
+        values, missing = _sort_key(tweets[col], largest)
+        order = np.lexsort((row, values, missing, group))
+        # Rank within each member = position in the sorted order - member's first position
+        g_sorted = group[order]
+        starts = np.flatnonzero(np.r_[True, g_sorted[1:] != g_sorted[:-1]])
+        rank = row - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+        keep = rank < n
+        rows.append(order[keep])
+        groups.append(g_sorted[keep])
+        blocks.append(np.full(keep.sum(), block))
+        ranks.append(rank[keep])
+
+    rows, groups = np.concatenate(rows), np.concatenate(groups)
+    order = np.lexsort((np.concatenate(ranks), np.concatenate(blocks), groups))
+    rows, groups = rows[order], groups[order]
+
+    dedup_col = "Tweet_ID" if "Tweet_ID" in tweets.columns else "Text"
+    dup = pd.DataFrame({"g": groups, "id": tweets[dedup_col].to_numpy()[rows]}).duplicated().to_numpy()
+    rows, groups = rows[~dup], groups[~dup]
+    if not near_dup:
+        return rows, groups
+    if DUP_COL in tweets.columns:
+        cluster = tweets[DUP_COL].to_numpy()[rows]
     else:
-        out = out.drop_duplicates(subset="Text")
+        from near_dup import cluster_texts
+        cluster = cluster_texts(tweets["Text"].to_numpy()[rows], groups=groups)[0]
+    dup = pd.DataFrame({"g": groups, "c": cluster}).duplicated().to_numpy()
+    return rows[~dup], groups[~dup]
+
+
+def reference_sample(tweets, picks=TWEET_PICKS):
+    """
+    The per-member loop select_member_tweets replaced, as positions in `tweets`
+    (for --check-sample). g.nlargest / g.nsmallest per pick are written as the
+    stable sort they document (ties in row order, NaN / NaT last): pandas 2
+    falls back to an unstable sort when a member has no more than n rows.
+    """
+    tweets = tweets.assign(_pos=np.arange(len(tweets)))
+    dedup_col = "Tweet_ID" if "Tweet_ID" in tweets.columns else "Text"
+    out = [np.array([], dtype=np.intp)]
+    for _, g in tweets.groupby("handle_lower", observed=True):
+        take = pd.concat([g.sort_values(col, ascending=not largest, kind="stable", na_position="last").head(n)
+                          for col, n, largest in picks])
+        out.append(take.drop_duplicates(subset=dedup_col)["_pos"].to_numpy())
+    return np.concatenate(out)
+
+
+def check_sampling(tweets, seed=0):
+    """
+    Whether select_member_tweets picks the same rows, in the same order, as
+    reference_sample: on `tweets`, and on a copy with scores missing (all of
+    every 5th member's, 30% of the rest) and dates unparseable (all of every
+    7th member's, 30% of the rest).
+    """
+    rng = np.random.default_rng(seed)
+    member = tweets.groupby("handle_lower", observed=True).ngroup().to_numpy()
+    noisy = tweets.copy()
+    noisy.loc[(member % 5 == 0) | (rng.random(len(noisy)) < 0.3), "sentiment_score"] = np.nan
+    noisy["Created At"] = noisy["Created At"].astype(str).where(
+        (member % 7 != 0) & (rng.random(len(noisy)) >= 0.3), "not a date")
+
+    for frame in (tweets, noisy):
+        frame = prepare_tweets(frame)
+        if not np.array_equal(select_member_tweets(frame, near_dup=False)[0], reference_sample(frame)):
+            return False
+    return True
+
+
+def sample_tweets(tweets):
+    """{handle: [tweet records]} for every member in `tweets`, in handle order."""
+    tweets = prepare_tweets(tweets)
+    rows, _ = select_member_tweets(tweets)
+    sample = tweets.iloc[rows]
+    cols = [c for c in sample.columns if c in TWEET_COLS and c != "handle_lower"]
+
+    out = {}
+    for handle, record in zip(sample["handle_lower"].tolist(), to_records(clean_frame(sample[cols]))):
+        out.setdefault(handle, []).append(record)
+    return out
+
+
+def write_shard(handle, tweets):
+    """Write one member's tweets as <handle>.<hash>.json; returns its path under public/."""
+    data = json.dumps(tweets, separators=(",", ":"), allow_nan=False).encode()
+    name = f"{handle}.{hashlib.sha256(data).hexdigest()[:10]}.json"
+    path = TWEETS_DIR / name
+    if not path.exists():
+        tmp = path.with_name(name + ".tmp")
+        tmp.write_bytes(data)
+        tmp.replace(path)
+    return f"{TWEETS_DIR.name}/{name}"
+
+
+def sync_shards(index, precompress=False):
+    """Delete shard files the index no longer points to; add (or drop) the .gz/.br copies."""
+    keep = {Path(shard).name for shard in index.values()}
+    for f in TWEETS_DIR.glob("*.json*"):
+        if (f.name.split(".json")[0] + ".json" not in keep or f.suffix == ".tmp"
+                or (f.suffix != ".json" and not precompress)):
+            f.unlink()
+    if not precompress:
+        return
+    copies = {".gz": lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli:
+        copies[".br"] = lambda data: brotli.compress(data, quality=BROTLI_QUALITY)
+    for name in keep:
+        missing = [ext for ext in copies if not (TWEETS_DIR / (name + ext)).exists()]
+        if not missing:
+            continue
+        data = (TWEETS_DIR / name).read_bytes()
+        for ext in missing:
+            tmp = TWEETS_DIR / (name + ext + ".tmp")
+            tmp.write_bytes(copies[ext](data))
+            tmp.replace(TWEETS_DIR / (name + ext))
+
+
+# ── 3. aggregates.json ───────────────────────────────────────────────────────
+# Tweet-level summaries the charts can't compute from member records now that
+# tweets are sharded:
+#   cells       caucus × party × quartile × month: tweets, members, and the mean
+#               of each CUBE_METRIC over the cell's tweets (roll up across cells
+#               weighting by `tweets`; rollup() in useMembers.js)
+#   percentiles caucus × party × quartile, and caucus overall (party and quartile
+#               null): p10–p90 of each CUBE_METRIC over the tweets
+#   caucus      small-donor share (n, mean, median of members) per caucus
+# Caucus "all" is every member; a flag value covers that caucus's members only,
+# so a member can appear under several flags. Dimension values are stored once
+# in "dims" and the tables refer to them by index. Tweets with no parseable
+# date are left out.
+
+PERCENTILES = [10, 25, 50, 75, 90]
+CAUCUS_KEYS = ["is_freedom_caucus", "is_progressive", "is_squad", "is_problem_solver",
+               "is_blue_dog", "is_new_dem", "is_rsc"]   # CAUCUS_FLAGS in useMembers.js
+
+
+def caucus_members(records):
+    """{"all": handles, flag: handles of members with the flag set}, in members.json order."""
+    out = {"all": [r["handle_lower"] for r in records if r.get("handle_lower")]}
+    for key in CAUCUS_KEYS:
+        out[key] = [r["handle_lower"] for r in records if r.get("handle_lower") and r.get(key)]
     return out
 
 
-print("Sampling tweets per member...")
-out_tweets = {}
-for handle, group in tweets.groupby("handle_lower"):
-    sample = collect_for_member(group)
-    out_tweets[handle] = [
-        {k: clean_value(v) for k, v in row.items()
-         if k not in ("handle_lower", "_dt")}
-        for row in sample.to_dict("records")
-    ]
-
-write_json(out_tweets, OUT_DIR / "top_tweets.json")
-total_tweets = sum(len(v) for v in out_tweets.values())
-print(f"top_tweets.json  → {len(out_tweets):>4} members, {total_tweets:>5} total tweets "
-      f"(avg {total_tweets / max(1, len(out_tweets)):.1f} per member)")
+def donor_summary(records, caucuses):
+    """n / mean / median of pct_small_donors per caucus."""
+    share = {r["handle_lower"]: r.get("pct_small_donors") for r in records if r.get("handle_lower")}
+    rows = []
+    for name, handles in caucuses.items():
+        vals = [share[h] for h in handles if share[h] is not None]
+        if not vals:
+            continue
+        vals_sorted = sorted(vals)
+        mid = len(vals) // 2
+        median = vals_sorted[mid] if len(vals) % 2 else (vals_sorted[mid - 1] + vals_sorted[mid]) / 2
+        rows.append({"caucus": name, "n": len(vals), "mean": sum(vals) / len(vals), "median": median})
+    return pd.DataFrame(rows)
+
+
+def cube_cells(t, caucuses):
+    """The cells table (dimension values, not yet indexes), from per member-month sums."""
+    keys = ["party", "quartile", "month"]
+    g = t.groupby(["handle"] + keys, dropna=False, sort=False)
+    sums, counts, size = g[CUBE_METRICS].sum(), g[CUBE_METRICS].count(), g.size()
+    handle = sums.index.get_level_values("handle")
+
+    cells = []
+    for name, handles in caucuses.items():
+        sel = handle.isin(handles)
+        by = lambda frame: frame[sel].groupby(level=keys, dropna=False)
+        n = by(counts).sum()
+        cell = by(sums).sum() / n.where(n > 0)
+        cell.insert(0, "members", by(size).size())
+        cell.insert(0, "tweets", by(size).sum())
+        cells.append(cell.reset_index().assign(caucus=name))
+    return pd.concat(cells, ignore_index=True)
+
+
+def cube_percentiles(t, caucuses):
+    """The percentiles table: per caucus overall, then per caucus × party × quartile."""
+    qs = [p / 100 for p in PERCENTILES]
+    rows = []
+    for name, handles in caucuses.items():
+        sub = t[t["handle"].isin(handles)]
+        if sub.empty:
+            continue
+        overall = sub[CUBE_METRICS].quantile(qs)
+        rows.append(pd.DataFrame([{f"{m}_p{p}": overall.at[q, m] for m in CUBE_METRICS
+                                   for p, q in zip(PERCENTILES, qs)}]).assign(caucus=name))
+        by = sub.groupby(["party", "quartile"], dropna=False)[CUBE_METRICS].quantile(qs).unstack()
+        by.columns = [f"{m}_p{round(q * 100)}" for m, q in by.columns]
+        rows.append(by.reset_index().assign(caucus=name))
+    return pd.concat(rows, ignore_index=True)
+
+
+def build_aggregates(tweets, records):
+    meta = pd.DataFrame(records).drop_duplicates("handle_lower").set_index("handle_lower")
+    t = pd.DataFrame({
+        "handle": tweets["handle_lower"].astype(str).to_numpy(),
+        "month":  pd.to_datetime(tweets["Created At"], errors="coerce", utc=True).dt.strftime("%Y-%m").to_numpy(),
+    })
+    for m in CUBE_METRICS:
+        t[m] = pd.to_numeric(tweets[m], errors="coerce").to_numpy(dtype=np.float64)
+    t = t.dropna(subset=["month"])
+    t["party"] = t["handle"].map(meta["party_code"])
+    t["quartile"] = t["handle"].map(meta["quartile"])
+
+    caucuses = caucus_members(records)
+    cells = cube_cells(t, caucuses)
+    pcts = cube_percentiles(t, caucuses)
+    dims = {
+        "caucus":   list(caucuses),
+        "party":    sorted(t["party"].dropna().unique().tolist()),
+        "quartile": sorted(t["quartile"].dropna().unique().tolist()),
+        "month":    sorted(t["month"].unique().tolist()),
+    }
+    for frame in (cells, pcts):
+        for dim, values in dims.items():
+            if dim in frame.columns:
+                codes = pd.Categorical(frame[dim], categories=values).codes
+                frame[dim] = pd.array(np.where(codes < 0, None, codes), dtype="Int64")   # null if missing
+    key = ["caucus", "party", "quartile"]
+    cells = cells[key + ["month", "tweets", "members"] + CUBE_METRICS].sort_values(key + ["month"])
+    pcts = pcts[key + [f"{m}_p{p}" for m in CUBE_METRICS for p in PERCENTILES]].sort_values(key, na_position="first")
+    return {
+        "dims":         dims,
+        "metrics":      CUBE_METRICS,
+        "percentiles_at": PERCENTILES,
+        "total_tweets": int(len(t)),
+        "cells":        clean_frame(cells),
+        "percentiles":  clean_frame(pcts),
+        "caucus":       clean_frame(donor_summary(records, caucuses)),
+    }
+
+
+# ── Build tweet outputs ──────────────────────────────────────────────────────
+
+if (unchanged([tweets_input.name]) and manifest.get("handles") == sorted(valid_handles)
+        and not members_changed):
+    digests = manifest["tweets"]
+    with open(TWEET_INDEX) as f:
+        index = json.load(f)
+    print(f"tweet shards     → {len(digests):>4} members, unchanged")
+    print("aggregates.json  → unchanged")
+else:
+    with PROFILE.stage("load_tweets"):
+        tweets = load_tweets()
+    if args.check_sample:
+        if not check_sampling(tweets):
+            sys.exit("select_member_tweets does not match the per-member nlargest / nsmallest loop")
+        print("sampling check   → matches the per-member loop (incl. missing scores and dates)")
+    with PROFILE.stage("tweet_digests"):
+        digests = tweet_digests(tweets)
+    previous = manifest.get("tweets", {})
+    changed = [h for h, d in digests.items() if previous.get(h) != d]
+
+    print(f"Sampling tweets for {len(changed)} of {len(digests)} members...")
+    with PROFILE.stage("sample_tweets"):
+        fresh = sample_tweets(tweets[tweets["handle_lower"].isin(changed)] if manifest else tweets)
+    index = {}
+    if manifest:
+        with open(TWEET_INDEX) as f:
+            index = json.load(f)
+    with PROFILE.stage("write_shards"):
+        index = {h: write_shard(h, fresh[h]) if h in fresh else index[h] for h in digests}
+        write_json(index, TWEET_INDEX)
+    total_tweets = sum(len(v) for v in fresh.values())
+    print(f"tweet shards     → {len(index):>4} members, {len(fresh)} written ({total_tweets:>5} tweets, "
+          f"avg {total_tweets / max(1, len(fresh)):.1f} per member) → {TWEETS_DIR}")
+
+    # From every loaded tweet, not just the re-sampled members
+    with PROFILE.stage("aggregates"):
+        aggregates = build_aggregates(tweets, records)
+        write_json(aggregates, AGGREGATES)
+    print(f"aggregates.json  → {len(aggregates['cells']['tweets']):>4} cells, "
+          f"{aggregates['total_tweets']:,} tweets, {AGGREGATES.stat().st_size / 1024:.0f} KB")
+
+# Also when the tweets are unchanged, so --precompress can be turned on or off between builds
+with PROFILE.stage("sync_shards"):
+    sync_shards(index, args.precompress)
+
+with open(MANIFEST, "w") as f:
+    json.dump({"script": SCRIPT_DIGEST, "inputs": inputs, "handles": sorted(valid_handles),
+               "members_format": args.members_format, "members": member_digests, "tweets": digests},
+              f, indent=1)
+PROFILE.print_report()
+if isinstance(args.profile, str):
+    PROFILE.to_json(args.profile)
 print("Done.")
@@ -1,19 +1,26 @@
 import { useMemo } from 'react'
-import { CAUCUS_FLAGS } from '../hooks/useMembers'
+import { AGGREGATES, CAUCUS_FLAGS, rollup, tweetPercentiles } from '../hooks/useMembers'
 
 const fmt = (v, decimals = 1) =>
   v == null ? '—' : Number(v).toLocaleString(undefined, { maximumFractionDigits: decimals })
 
-// Stat helpers
-function median(arr) {
-  if (!arr.length) return null
-  const sorted = [...arr].sort((a, b) => a - b)
-  const mid = Math.floor(sorted.length / 2)
-  return sorted.length % 2 === 0 ? (sorted[mid - 1] + sorted[mid]) / 2 : sorted[mid]
-}
-function mean(arr) {
-  if (!arr.length) return null
-  return arr.reduce((a, b) => a + b, 0) / arr.length
+const signed = (v, decimals) => (v == null ? '—' : `${v >= 0 ? '+' : ''}${fmt(v, decimals)}`)
+
+// n / mean / median small-donor share per caucus, precomputed by preprocess.py
+const CAUCUS_STATS = Object.fromEntries(AGGREGATES.caucus.map(row => [row.caucus, row]))
+
+// Tweet-weighted sentiment and outrage (anger + disgust) over every tweet by a caucus's members
+function tweetStats(caucus) {
+  const r = rollup({ caucus })
+  if (!r) return null
+  const pct = tweetPercentiles(caucus)
+  return {
+    tweets: r.tweets,
+    sentiment: r.sentiment_score,
+    outrage: r.anger != null && r.disgust != null ? r.anger + r.disgust : null,
+    p10: pct?.sentiment_score_p10,
+    p90: pct?.sentiment_score_p90,
+  }
 }
 
 const HIGHLIGHT_NOTE = {
@@ -25,26 +32,22 @@ const X_MIN = 0
 const X_MAX = 80
 
 export default function CaucusComparison({ members }) {
-  const baseline = useMemo(() => {
-    const vals = members
-      .map(m => m.pct_small_donors)
-      .filter(v => v != null && Number.isFinite(v))
-    return { mean: mean(vals), median: median(vals), n: vals.length }
-  }, [members])
+  const baseline = CAUCUS_STATS.all
+  const baselineTweets = useMemo(() => tweetStats('all'), [])
 
   const rows = useMemo(() => {
     const data = []
     for (const { key, label } of CAUCUS_FLAGS) {
-      const subset = members.filter(m => m[key] && m.pct_small_donors != null)
-      if (subset.length === 0) continue
-      const vals = subset.map(m => m.pct_small_donors)
+      const stats = CAUCUS_STATS[key]
+      if (!stats) continue
       data.push({
         key, label,
-        n: subset.length,
-        mean: mean(vals),
-        median: median(vals),
-        members: subset,
-        delta: mean(vals) - baseline.mean,
+        n: stats.n,
+        mean: stats.mean,
+        median: stats.median,
+        members: members.filter(m => m[key] && m.pct_small_donors != null),
+        delta: stats.mean - baseline.mean,
+        tweets: tweetStats(key),
       })
     }
     return data.sort((a, b) => b.mean - a.mean)
@@ -64,6 +67,15 @@ export default function CaucusComparison({ members }) {
           <div className="label">Median</div>
           <div className="mono text-sm text-ink-muted mt-0.5">{fmt(baseline.median, 1)}%</div>
         </div>
+        {baselineTweets && (
+          <div className="text-right">
+            <div className="label">Tweet sentiment</div>
+            <div className="mono text-sm text-ink-muted mt-0.5">
+              {fmt(baselineTweets.sentiment, 3)}
+              <span className="text-ink-faint text-xs"> over {fmt(baselineTweets.tweets, 0)} tweets</span>
+            </div>
+          </div>
+        )}
       </div>
 
       {/* Per-caucus rows */}
@@ -119,6 +131,20 @@ export default function CaucusComparison({ members }) {
                 ))}
               </div>
 
+              {/* Tweet rhetoric from the aggregate cube, against the House */}
+              {r.tweets && baselineTweets && (
+                <div className="flex gap-4 flex-wrap text-[11px] mono text-ink-faint mt-1">
+                  <span>{fmt(r.tweets.tweets, 0)} tweets</span>
+                  <span>
+                    sentiment {fmt(r.tweets.sentiment, 3)} ({signed(r.tweets.sentiment - baselineTweets.sentiment, 3)})
+                  </span>
+                  <span>
+                    outrage {fmt(r.tweets.outrage, 3)} ({signed(r.tweets.outrage - baselineTweets.outrage, 3)})
+                  </span>
+                  <span>p10–p90 {fmt(r.tweets.p10, 2)} to {fmt(r.tweets.p90, 2)}</span>
+                </div>
+              )}
+
               {noteHighlight && (
                 <div
                   className="text-[11px] mt-1.5 px-2 py-1 rounded"
@@ -1,22 +1,31 @@
+import { useMemo } from 'react'
 import {
   RadarChart, Radar, PolarGrid, PolarAngleAxis, ResponsiveContainer,
 } from 'recharts'
-import { PARTY_COLOR } from '../hooks/useMembers'
+import { PARTY_COLOR, PARTY_LABEL, rollup } from '../hooks/useMembers'
 
+// key: member field; cube: the matching metric in aggregates.json
 const EMOTIONS = [
-  { key: 'avg_anger',   label: 'Anger' },
-  { key: 'avg_fear',    label: 'Fear' },
-  { key: 'avg_disgust', label: 'Disgust' },
-  { key: 'avg_sadness', label: 'Sadness' },
-  { key: 'avg_joy',     label: 'Joy' },
+  { key: 'avg_anger',   cube: 'anger',   label: 'Anger' },
+  { key: 'avg_fear',    cube: 'fear',    label: 'Fear' },
+  { key: 'avg_disgust', cube: 'disgust', label: 'Disgust' },
+  { key: 'avg_sadness', cube: 'sadness', label: 'Sadness' },
+  { key: 'avg_joy',     cube: 'joy',     label: 'Joy' },
 ]
 
 export default function EmotionRadar({ member }) {
   const color = PARTY_COLOR[member.party_code] ?? '#888'
 
-  const data = EMOTIONS.map(({ key, label }) => ({
+  // Every tweet by members of the same party and virality quartile
+  const peers = useMemo(
+    () => rollup({ caucus: 'all', party: member.party_code, quartile: member.quartile }),
+    [member.party_code, member.quartile]
+  )
+
+  const data = EMOTIONS.map(({ key, cube, label }) => ({
     emotion: label,
     value: member[key] ?? 0,
+    peers: peers?.[cube] ?? 0,
   }))
 
   const sortedEmotions = [...EMOTIONS].sort(
@@ -32,6 +41,15 @@ export default function EmotionRadar({ member }) {
             dataKey="emotion"
             tick={{ fill: 'var(--ink-muted)', fontSize: 12, fontFamily: 'DM Sans' }}
           />
+          {peers && (
+            <Radar
+              dataKey="peers"
+              stroke="var(--ink-faint)"
+              fill="none"
+              strokeWidth={1.5}
+              strokeDasharray="4 3"
+            />
+          )}
           <Radar
             dataKey="value"
             stroke={color}
@@ -41,10 +59,16 @@ export default function EmotionRadar({ member }) {
           />
         </RadarChart>
       </ResponsiveContainer>
+      {peers && (
+        <div className="text-[11px] text-ink-faint text-center">
+          Dashed: {PARTY_LABEL[member.party_code] ?? member.party_code} peers in {member.quartile} ({peers.tweets.toLocaleString()} tweets)
+        </div>
+      )}
 
       <div className="flex flex-col gap-2 mt-4">
-        {sortedEmotions.map(({ key, label }) => {
+        {sortedEmotions.map(({ key, cube, label }) => {
           const val = member[key] ?? 0
+          const peerVal = peers?.[cube]
           return (
             <div key={key} className="flex items-center gap-2.5">
               <span className="w-16 text-xs text-ink-muted text-right">{label}</span>
@@ -57,6 +81,9 @@ export default function EmotionRadar({ member }) {
               <span className="w-12 text-[11px] mono text-ink-muted">
                 {(val * 100).toFixed(1)}%
               </span>
+              <span className="w-12 text-[11px] mono text-ink-faint" title="Peer average">
+                {peerVal == null ? '—' : `${(peerVal * 100).toFixed(1)}%`}
+              </span>
             </div>
           )
         })}
@@ -1,10 +1,10 @@
 import { useState, useMemo } from 'react'
 import {
-  ScatterChart, Scatter, XAxis, YAxis,
+  ScatterChart, Scatter, LineChart, Line, XAxis, YAxis,
   Tooltip, ResponsiveContainer, CartesianGrid,
 } from 'recharts'
 import { useNavigate } from 'react-router-dom'
-import { PARTY_COLOR, PARTY_LABEL } from '../hooks/useMembers'
+import { AGGREGATES, PARTY_COLOR, PARTY_LABEL, rollupByMonth } from '../hooks/useMembers'
 
 const fmt = (v, decimals = 1) =>
   v == null ? '—' : Number(v).toLocaleString(undefined, { maximumFractionDigits: decimals })
@@ -17,6 +17,24 @@ const Y_OPTIONS = [
   { key: 'followers',        label: 'Followers',        fmt: v => fmt(v, 0) },
 ]
 
+const SERIES_OPTIONS = [
+  { key: 'tweets',          label: 'Tweets',        fmt: v => fmt(v, 0) },
+  { key: 'sentiment_score', label: 'Avg Sentiment', fmt: v => fmt(v, 3) },
+  { key: 'anger',           label: 'Avg Anger',     fmt: v => fmt(v, 3) },
+]
+
+// One row per month with a column per party, from the aggregate cube (all tweets, not the sample)
+const MONTHLY = (() => {
+  const rows = new Map(AGGREGATES.dims.month.map(month => [month, { month }]))
+  for (const party of ['D', 'R']) {
+    for (const r of rollupByMonth({ caucus: 'all', party })) {
+      const row = rows.get(r.month)
+      for (const { key } of SERIES_OPTIONS) row[`${party}_${key}`] = r[key]
+    }
+  }
+  return [...rows.values()]
+})()
+
 function TooltipCard({ active, payload, yLabel, yFmt }) {
   if (!active || !payload?.length) return null
   const d = payload[0]?.payload
@@ -44,6 +62,8 @@ function TooltipCard({ active, payload, yLabel, yFmt }) {
 export default function TweetVolumeChart({ members }) {
   const navigate = useNavigate()
   const [yKey, setYKey] = useState('avg_retweets_raw')
+  const [seriesKey, setSeriesKey] = useState('tweets')
+  const seriesOpt = SERIES_OPTIONS.find(o => o.key === seriesKey) ?? SERIES_OPTIONS[0]
   const yOpt = Y_OPTIONS.find(o => o.key === yKey) ?? Y_OPTIONS[0]
 
   const data = useMemo(() => {
@@ -66,10 +86,9 @@ export default function TweetVolumeChart({ members }) {
   const stats = useMemo(() => {
     const counts = data.map(m => m.tweet_count).sort((a, b) => a - b)
     if (counts.length === 0) return null
-    const total = counts.reduce((a, b) => a + b, 0)
     const median = counts[Math.floor(counts.length / 2)]
     return {
-      total,
+      total: AGGREGATES.totalTweets,
       median,
       max: counts[counts.length - 1],
       min: counts[0],
@@ -188,6 +207,61 @@ export default function TweetVolumeChart({ members }) {
         ))}
         <span className="text-ink-faint">Click any point to open the member's profile.</span>
       </div>
+
+      <div className="mt-8 mb-3 flex items-baseline gap-3 flex-wrap">
+        <div className="label">By month:</div>
+        <div className="flex gap-1.5 flex-wrap">
+          {SERIES_OPTIONS.map(opt => (
+            <button
+              key={opt.key}
+              onClick={() => setSeriesKey(opt.key)}
+              className={`chip ${seriesKey === opt.key ? 'active' : ''}`}
+            >
+              {opt.label}
+            </button>
+          ))}
+        </div>
+      </div>
+
+      <div className="card p-2" style={{ height: '280px' }}>
+        <ResponsiveContainer width="100%" height="100%">
+          <LineChart data={MONTHLY} margin={{ top: 16, right: 24, bottom: 16, left: 16 }}>
+            <CartesianGrid stroke="var(--border)" strokeDasharray="2 4" opacity={0.4} />
+            <XAxis
+              dataKey="month"
+              tick={{ fill: 'var(--ink-muted)', fontSize: 11, fontFamily: 'JetBrains Mono' }}
+              tickLine={false}
+              axisLine={{ stroke: 'var(--border)' }}
+              minTickGap={24}
+            />
+            <YAxis
+              tick={{ fill: 'var(--ink-muted)', fontSize: 11, fontFamily: 'JetBrains Mono' }}
+              tickLine={false}
+              axisLine={{ stroke: 'var(--border)' }}
+              tickFormatter={v =>
+                seriesKey === 'tweets' ? (v >= 1000 ? `${(v / 1000).toFixed(0)}K` : v) : v.toFixed(2)
+              }
+            />
+            <Tooltip
+              formatter={(v, name) => [seriesOpt.fmt(v), PARTY_LABEL[name] ?? name]}
+            />
+            {['D', 'R'].map(p => (
+              <Line
+                key={p}
+                name={p}
+                dataKey={`${p}_${seriesKey}`}
+                stroke={PARTY_COLOR[p]}
+                strokeWidth={2}
+                dot={false}
+                connectNulls
+              />
+            ))}
+          </LineChart>
+        </ResponsiveContainer>
+      </div>
+      <div className="text-[11px] text-ink-faint mt-2">
+        Every scraped tweet with a date, by party; sentiment and anger are tweet-weighted means.
+      </div>
     </div>
   )
 }
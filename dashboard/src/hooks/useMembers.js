@@ -1,6 +1,7 @@
-import { useMemo } from 'react'
+import { useEffect, useMemo, useState } from 'react'
 import membersRaw from '../data/members.json'
-import topTweetsRaw from '../data/top_tweets.json'
+import tweetIndex from '../data/tweet_index.json'
+import aggregatesRaw from '../data/aggregates.json'
 
 function sanitize(v) {
   if (v == null) return null
@@ -49,11 +50,16 @@ export const CYCLE_COLS = [
   { key: 'pct_small_donors', year: '2024' },
 ]
 
-const MEMBERS = membersRaw.map(m => {
-  const clean = sanitizeRecord(m)
-  const tweets = (topTweetsRaw[clean.handle_lower] ?? []).map(t => sanitizeRecord(t))
-  return { ...clean, top_tweets: tweets }
-})
+// members.json is either a list of records or, with preprocess.py
+// --members-format columns, one array per column ({ column: [values] }).
+function toRecords(raw) {
+  if (Array.isArray(raw)) return raw
+  const keys = Object.keys(raw)
+  const n = keys.length ? raw[keys[0]].length : 0
+  return Array.from({ length: n }, (_, i) => Object.fromEntries(keys.map(k => [k, raw[k][i]])))
+}
+
+const MEMBERS = toRecords(membersRaw).map(m => sanitizeRecord(m))
 
 // Precompute fixed axis domains so they don't shift when filters change.
 function niceCeil(v) {
@@ -97,6 +103,94 @@ export function useMember(handle) {
   )
 }
 
+// Each member's sampled tweets are a separate shard in public/tweets/, fetched
+// on demand. Only the handle → shard path index is bundled.
+const shardCache = new Map()
+
+function loadShard(path) {
+  if (!shardCache.has(path)) {
+    const request = fetch(`${import.meta.env.BASE_URL}${path}`)
+      .then(res => (res.ok ? res.json() : Promise.reject(res.status)))
+      .then(rows => rows.map(t => sanitizeRecord(t)))
+      .catch(() => {
+        shardCache.delete(path)
+        return []
+      })
+    shardCache.set(path, request)
+  }
+  return shardCache.get(path)
+}
+
+export function useMemberTweets(handle) {
+  const path = tweetIndex[handle?.toLowerCase()]
+  const [shard, setShard] = useState({ path: null, tweets: [] })
+
+  useEffect(() => {
+    if (!path) return
+    let active = true
+    loadShard(path).then(tweets => { if (active) setShard({ path, tweets }) })
+    return () => { active = false }
+  }, [path])
+
+  if (!path) return { tweets: [], loading: false }
+  if (shard.path !== path) return { tweets: [], loading: true }
+  return { tweets: shard.tweets, loading: false }
+}
+
+// Pre-aggregated tweet metrics built by preprocess.py (see section 3 there).
+// Tables are stored column-wise; dimension columns hold indexes into `dims`.
+function decodeTable(table, dims) {
+  return toRecords(table).map(row => {
+    const out = { ...row }
+    for (const dim in dims) {
+      if (dim in row) out[dim] = row[dim] == null ? null : dims[dim][row[dim]]
+    }
+    return out
+  })
+}
+
+export const AGGREGATES = {
+  dims: aggregatesRaw.dims,
+  metrics: aggregatesRaw.metrics,
+  totalTweets: aggregatesRaw.total_tweets,
+  cells: decodeTable(aggregatesRaw.cells, aggregatesRaw.dims),
+  percentiles: decodeTable(aggregatesRaw.percentiles, aggregatesRaw.dims),
+  caucus: toRecords(aggregatesRaw.caucus),
+}
+
+// Tweet-weighted roll-up of the cells matching `where` (e.g. { caucus: 'all', party: 'D' }):
+// one row per value of `by` (e.g. 'month'), or a single row over every matching cell.
+export function rollup(where = { caucus: 'all' }, by = null) {
+  const groups = new Map()
+  for (const cell of AGGREGATES.cells) {
+    if (Object.entries(where).some(([k, v]) => cell[k] !== v)) continue
+    const key = by ? cell[by] : null
+    const acc = groups.get(key) ?? { key, tweets: 0, sums: {}, weights: {} }
+    acc.tweets += cell.tweets
+    for (const m of AGGREGATES.metrics) {
+      if (cell[m] == null) continue
+      acc.sums[m] = (acc.sums[m] ?? 0) + cell[m] * cell.tweets
+      acc.weights[m] = (acc.weights[m] ?? 0) + cell.tweets
+    }
+    groups.set(key, acc)
+  }
+  const rows = [...groups.values()].map(({ key, tweets, sums, weights }) => {
+    const row = by ? { [by]: key, tweets } : { tweets }
+    for (const m of AGGREGATES.metrics) row[m] = weights[m] ? sums[m] / weights[m] : null
+    return row
+  })
+  if (!by) return rows[0] ?? null
+  return rows.sort((a, b) => String(a[by]).localeCompare(String(b[by])))
+}
+
+export const rollupByMonth = where => rollup(where, 'month')
+
+// Tweet-level percentiles (`<metric>_p<n>`) for a caucus, overall or for one party × quartile
+export function tweetPercentiles(caucus = 'all', party = null, quartile = null) {
+  return AGGREGATES.percentiles.find(r =>
+    r.caucus === caucus && r.party === party && r.quartile === quartile) ?? null
+}
+
 export function getCycleHistory(member) {
   return CYCLE_COLS
     .map(({ key, year }) => ({ year, value: member[key] }))
@@ -4,7 +4,7 @@ import {
   ResponsiveContainer, ReferenceLine,
 } from 'recharts'
 import {
-  useMember, PARTY_COLOR, PARTY_LABEL,
+  useMember, useMemberTweets, PARTY_COLOR, PARTY_LABEL,
   CAUCUS_FLAGS, getCycleHistory,
 } from '../hooks/useMembers'
 import EmotionRadar from '../components/EmotionRadar'
@@ -84,6 +84,7 @@ export default function Member() {
   const { handle } = useParams()
   const navigate = useNavigate()
   const member = useMember(handle)
+  const { tweets, loading: tweetsLoading } = useMemberTweets(handle)
 
   if (!member) {
     return (
@@ -249,7 +250,9 @@ export default function Member() {
         </div>
 
         <Section title="Tweet Explorer">
-          <TweetExplorer tweets={member.top_tweets ?? []} />
+          {tweetsLoading
+            ? <p className="text-ink-faint text-[13px]">Loading tweets…</p>
+            : <TweetExplorer tweets={tweets} />}
         </Section>
       </div>
     </div>
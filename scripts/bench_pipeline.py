@@ -0,0 +1,246 @@
+"""
+Scale benchmark for the tweet pipeline on synthetic data.
+
+For each scale, synth_data.py writes a project-shaped directory with the member
+tables repeated `scale` times and ~--tweets-per-member enriched tweets per
+member, and these stages run on it under stage_profiler.StageProfiler:
+
+    read_enriched          notebook 04's read of the enriched CSV + handle / date parsing
+    nb03_user_summary      notebook 03's per-member user_summary (member_summary.py)
+    nb04_slopes            notebook 04's days_since_start + sentiment_slopes()
+    nb04_emotion_features  notebook 04's emotion entropy / dominant emotion / extreme shares
+    nb04_text_features     notebook 04's per-tweet text features and their groupby
+    enriched_store         enriched_store.py's CSV -> Parquet conversion (needs pyarrow)
+    preprocess/*           dashboard/scripts/preprocess.py --profile, in a subprocess
+                           (reading the Parquet copy when enriched_store wrote one)
+
+The notebook stages are copies of the notebook cells, so keep them in step when
+the cells change. Each stage records wall time, peak traced memory and its top
+functions by cumulative time. Results go to --output as JSON.
+
+--save-baseline FILE keeps the results as a baseline; --baseline FILE compares
+against one and exits 1 if any stage is slower or uses more peak memory than
+the baseline by more than --tolerance (and by more than MIN_SECONDS /
+MIN_MB, so sub-second stages don't flap). Compare runs from the same machine
+and the same --tweets-per-member.
+
+Generated data is kept under --workdir and reused by later runs with the same
+scale and --tweets-per-member. At the default volume the enriched CSV is about
+0.3 GB per unit of scale (~32 GB at 100x).
+
+Usage:
+    python bench_pipeline.py --scales 1 10 --save-baseline bench_baseline.json
+    python bench_pipeline.py --scales 1 10 --baseline bench_baseline.json --tolerance 0.2
+    python bench_pipeline.py --scales 1 --tweets-per-member 5000   # multi-year volume
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from member_summary import MemberSummary
+from stage_profiler import StageProfiler
+from synth_data import EMOTIONS, TWEETS_PER_MEMBER, generate
+from tweet_features import emotion_entropy, sentiment_slopes
+
+ROOT = Path(__file__).resolve().parents[1]
+PREPROCESS = ROOT / "dashboard" / "scripts" / "preprocess.py"
+SCALES = [1, 10, 100]
+TOLERANCE = 0.2
+MIN_SECONDS = 0.5   # regressions smaller than this are ignored whatever the ratio
+MIN_MB = 10.0
+
+try:
+    import pyarrow  # noqa: F401  (enriched_store needs it)
+    from enriched_store import write_enriched_parquet
+except ImportError:
+    write_enriched_parquet = None
+
+
+# ── Stages ──────────────────────────────────────────────────────────────────
+
+def read_enriched(path):
+    tweets = pd.read_csv(path, low_memory=False)
+    tweets["handle_lower"] = tweets["Account"].str.lower().str.strip()
+    tweets["Created At"] = pd.to_datetime(tweets["Created At"], errors="coerce", utc=True)
+    return tweets
+
+
+def user_summary(tweets):
+    return MemberSummary().add(tweets).result()
+
+
+def slopes(tweets):
+    ref_date = tweets["Created At"].min()
+    tweets["days_since_start"] = (tweets["Created At"] - ref_date).dt.total_seconds() / 86400
+    return sentiment_slopes(tweets)
+
+
+def emotion_features(tweets):
+    tweets["emotion_entropy"] = emotion_entropy(tweets, EMOTIONS)
+    tweets["dominant_emotion"] = tweets[EMOTIONS].idxmax(axis=1)
+    emotion = tweets.groupby("handle_lower").agg(
+        avg_emotion_entropy  = ("emotion_entropy", "mean"),
+        pct_anger_dominant   = ("dominant_emotion", lambda x: (x == "anger").mean()),
+        pct_joy_dominant     = ("dominant_emotion", lambda x: (x == "joy").mean()),
+        pct_disgust_dominant = ("dominant_emotion", lambda x: (x == "disgust").mean()),
+        pct_fear_dominant    = ("dominant_emotion", lambda x: (x == "fear").mean()),
+        pct_neutral_dominant = ("dominant_emotion", lambda x: (x == "neutral").mean()),
+    ).reset_index()
+    extreme = tweets.groupby("handle_lower").agg(
+        pct_extreme_neg = ("sentiment_score", lambda x: (x < -0.8).mean()),
+        pct_extreme_pos = ("sentiment_score", lambda x: (x > 0.8).mean()),
+        pct_neutral     = ("label", lambda x: (x == "neutral").mean()),
+    ).reset_index()
+    return emotion, extreme
+
+
+def text_features(tweets):
+    tweets["n_hashtags"]      = tweets["Text"].str.count(r"#\w+")
+    tweets["n_mentions"]      = tweets["Text"].str.count(r"@\w+")
+    tweets["is_reply"]        = tweets["Text"].str.strip().str.startswith("@").astype(int)
+    tweets["has_link"]        = tweets["Text"].str.contains(r"https?://t\.co/", na=False).astype(int)
+    tweets["word_count"]      = tweets["clean_text"].str.split().str.len()
+    tweets["has_exclamation"] = tweets["Text"].str.contains("!", na=False).astype(int)
+    tweets["has_question"]    = tweets["Text"].str.contains(r"\?", na=False).astype(int)
+    tweets["n_caps_words"]    = tweets["Text"].apply(
+        lambda x: len([w for w in str(x).split() if w.isupper() and len(w) >= 3]))
+    tweets["hour"]            = tweets["Created At"].dt.hour
+    tweets["is_off_hours"]    = ((tweets["hour"] < 7) | (tweets["hour"] > 22)).astype(int)
+    tweets["is_weekend"]      = (tweets["Created At"].dt.dayofweek >= 5).astype(int)
+    return tweets.groupby("handle_lower").agg(
+        avg_hashtags       = ("n_hashtags", "mean"),
+        pct_with_hashtags  = ("n_hashtags", lambda x: (x > 0).mean()),
+        avg_mentions       = ("n_mentions", "mean"),
+        pct_replies        = ("is_reply", "mean"),
+        pct_with_links     = ("has_link", "mean"),
+        avg_word_count     = ("word_count", "mean"),
+        pct_exclamation    = ("has_exclamation", "mean"),
+        pct_question       = ("has_question", "mean"),
+        avg_caps_words     = ("n_caps_words", "mean"),
+        pct_off_hours      = ("is_off_hours", "mean"),
+        pct_weekend        = ("is_weekend", "mean"),
+        avg_retweets_raw   = ("Retweets", "mean"),
+        avg_likes_raw      = ("Likes", "mean"),
+    ).reset_index()
+
+
+# ── Runner ──────────────────────────────────────────────────────────────────
+
+def prepare(workdir, scale, tweets_per_member):
+    """Generated project directory for this scale, reusing an earlier one if it matches."""
+    out = Path(workdir) / f"scale{scale}_tpm{tweets_per_member}"
+    marker = out / "synth.json"
+    if not marker.exists():
+        print(f"{datetime.now()} - Generating {scale}x data in {out}...")
+        rows = generate(out, scale, tweets_per_member)
+        marker.write_text(json.dumps(rows))
+    rows = json.loads(marker.read_text())
+    print(f"{datetime.now()} - {scale}x: {rows['house_tweets_enriched.csv']:,} tweets, "
+          f"{rows['house_with_features.csv']:,} members")
+    return out, rows
+
+
+def run_scale(out, preprocess=True):
+    """Stage records for one generated project directory."""
+    processed = out / "data" / "processed"
+    profiler = StageProfiler()
+    # A Parquet copy left by an earlier run would change what preprocess reads
+    (processed / "house_tweets_enriched.parquet").unlink(missing_ok=True)
+
+    with profiler.stage("read_enriched"):
+        tweets = read_enriched(processed / "house_tweets_enriched.csv")
+    with profiler.stage("nb03_user_summary"):
+        user_summary(tweets)
+    with profiler.stage("nb04_slopes"):
+        slopes(tweets)
+    with profiler.stage("nb04_emotion_features"):
+        emotion_features(tweets)
+    with profiler.stage("nb04_text_features"):
+        text_features(tweets)
+    del tweets
+
+    if write_enriched_parquet is not None:
+        with profiler.stage("enriched_store"):
+            write_enriched_parquet(str(processed / "house_tweets_enriched.csv"))
+
+    if preprocess:
+        report = out / "preprocess_profile.json"
+        print(f"{datetime.now()} - Running preprocess.py --profile...")
+        subprocess.run([sys.executable, str(PREPROCESS), "--profile", str(report)], cwd=out, check=True,
+                       stdout=subprocess.DEVNULL)
+        with open(report) as f:
+            profiler.add(json.load(f), prefix="preprocess/")
+    return profiler
+
+
+def regressions(results, baseline, tolerance=TOLERANCE):
+    """(scale, stage, metric, baseline, now) for every stage beyond tolerance of the baseline."""
+    flagged = []
+    for scale, stages in results["scales"].items():
+        before = {s["stage"]: s for s in baseline.get("scales", {}).get(scale, [])}
+        for s in stages:
+            b = before.get(s["stage"])
+            if b is None:
+                continue
+            for metric, slack in (("seconds", MIN_SECONDS), ("peak_mb", MIN_MB)):
+                if s[metric] > b[metric] * (1 + tolerance) and s[metric] - b[metric] > slack:
+                    flagged.append((scale, s["stage"], metric, b[metric], s[metric]))
+    return flagged
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the tweet pipeline on synthetic data at several scales.")
+    parser.add_argument("--scales", type=int, nargs="+", default=SCALES)
+    parser.add_argument("--tweets-per-member", type=int, default=TWEETS_PER_MEMBER)
+    parser.add_argument("--workdir", default="bench_data", help="where generated data is kept between runs")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--save-baseline", help="also write the results here as a baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="allowed fractional increase in seconds / peak MB per stage")
+    parser.add_argument("--skip-preprocess", action="store_true", help="don't run the dashboard preprocess")
+    args = parser.parse_args()
+
+    if write_enriched_parquet is None:
+        print("pyarrow not installed; skipping the enriched_store stage")
+    results = {"time": datetime.now().isoformat(timespec="seconds"), "tweets_per_member": args.tweets_per_member,
+               "python": sys.version.split()[0], "pandas": pd.__version__, "numpy": np.__version__,
+               "cpus": os.cpu_count(), "rows": {}, "scales": {}}
+    for scale in args.scales:
+        out, rows = prepare(args.workdir, scale, args.tweets_per_member)
+        profiler = run_scale(out, preprocess=not args.skip_preprocess)
+        profiler.print_report(functions=False)
+        results["rows"][str(scale)] = rows["house_tweets_enriched.csv"]
+        results["scales"][str(scale)] = profiler.stages
+
+    for path in filter(None, [args.output, args.save_baseline]):
+        with open(path, "w") as f:
+            json.dump(results, f, indent=1)
+        print(f"{datetime.now()} - Saved → {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("tweets_per_member") != args.tweets_per_member:
+            print(f"WARNING: baseline used --tweets-per-member {baseline.get('tweets_per_member')}")
+        flagged = regressions(results, baseline, args.tolerance)
+        print(f"\n{'=' * 60}\n  REGRESSIONS vs {args.baseline}  (tolerance {args.tolerance:.0%})\n{'=' * 60}")
+        for scale, stage, metric, before, now in flagged:
+            print(f"  {scale:>4}x {stage:<34} {metric:<8} {before:>9.2f} → {now:>9.2f}  (+{now / max(before, 1e-9) - 1:.0%})")
+        if not flagged:
+            print("  none")
+        print("=" * 60)
+        if flagged:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+"""
+Offline throughput benchmark for main.py and follower_scraper.py.
+
+Runs the real scraping code against fake_x.FakeBackend on an event loop with a
+virtual clock. Sleeps (quota pacing, rate-limit resets, retry backoff) advance
+the clock instead of waiting, so a run that would take hours against the live
+API finishes in seconds.
+
+Reports, for a given number of profiles, accounts and tweet density:
+  - tweets/sec and requests per tweet (in simulated time)
+  - idle time spent waiting on rate limits, by reason
+  - coverage: share of the backend's tweets that made it into the CSV
+  - resume cost: rebuilding the checkpoint store from an existing CSV, and the
+    extra requests and simulated time a run spends after being interrupted
+    halfway
+
+--save-baseline FILE keeps the results as a baseline; --baseline FILE compares
+against one and exits 1 if any metric in GUARDED is worse than the baseline by
+more than --tolerance (and by more than the metric's slack), as
+bench_pipeline.py does for the analysis stages. Simulated-time figures are
+deterministic for a given seed and configuration, so compare runs with the same
+flags.
+
+Usage:
+    python bench_scraper.py --profiles 20 --accounts 4 --density 3
+    python bench_scraper.py --followers 535 --accounts 4
+    python bench_scraper.py --profiles 20 --followers 535 --save-baseline scraper_baseline.json
+    python bench_scraper.py --profiles 20 --followers 535 --baseline scraper_baseline.json --tolerance 0.1
+"""
+
+import argparse
+import asyncio
+import contextlib
+import csv
+import heapq
+import io
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import main as scraper
+import follower_scraper
+from checkpoint import CheckpointStore
+from fake_x import FakeBackend, FakeClient
+from output_sink import OutputSink
+from rate_scheduler import QuotaScheduler, SEARCH
+
+TOLERANCE = 0.1
+# Metrics checked against a baseline: benchmark -> {metric: (worse when higher?, slack)}.
+# A change smaller than the slack is ignored whatever the ratio.
+GUARDED = {
+    'scrape': {
+        'simulated_seconds': (True, 1.0),
+        'coverage': (False, 0.0),
+        'requests_per_tweet': (True, 0.0),
+        'resume_rebuild_seconds': (True, 0.5),   # real time, so it needs slack
+        'resume_extra_requests': (True, 2),
+        'resume_extra_seconds': (True, 1.0),
+    },
+    'followers': {
+        'simulated_seconds': (True, 1.0),
+        'failed': (True, 0),
+        'lookup_requests': (True, 2),
+    },
+}
+CONFIG = ['profiles', 'followers', 'accounts', 'density', 'p404', 'p503', 'seed']
+
+
+class VirtualClockLoop(asyncio.SelectorEventLoop):
+    """Event loop whose clock jumps to the next timer whenever nothing is ready to run."""
+
+    def __init__(self, start=None):
+        super().__init__()
+        self._now = start if start is not None else time.time()
+        self.skipped = 0.0
+        # Timers due at exactly _now must count as ready; the default resolution
+        # (1ns) is below float precision at epoch-sized timestamps.
+        self._clock_resolution = 1e-6
+
+    def time(self):
+        return self._now
+
+    def _run_once(self):
+        while self._scheduled and self._scheduled[0]._cancelled:
+            self._timer_cancelled_count -= 1
+            heapq.heappop(self._scheduled)._scheduled = False
+        if not self._ready and self._scheduled:
+            when = self._scheduled[0]._when
+            if when > self._now:
+                self.skipped += when - self._now
+                self._now = when
+        super()._run_once()
+
+
+def run_virtual(coro):
+    """Run a coroutine on a fresh VirtualClockLoop. Returns (result, simulated seconds)."""
+    loop = VirtualClockLoop()
+    start = loop.time()
+    try:
+        result = loop.run_until_complete(coro)
+    finally:
+        loop.close()
+    return result, loop.time() - start
+
+
+def fake_credentials(n):
+    return {f'bench_{i}.json': (f'bench_user_{i}', f'bench_{i}@example.com', 'x') for i in range(n)}
+
+
+def scheduler_waits(scheduler):
+    waits = {}
+    for (_, _, reason), secs in scheduler.waits.items():
+        waits[reason] = waits.get(reason, 0.0) + secs
+    return waits
+
+
+async def _scrape(backend, screen_names, n_accounts, workdir, stop_after=None):
+    loop = asyncio.get_running_loop()
+    backend.clock = loop.time
+    scheduler = QuotaScheduler(clock=loop.time)
+    clients = await scraper.login_accounts(os.path.join(workdir, 'cookies'), fake_credentials(n_accounts),
+                                           scheduler, client_factory=lambda: FakeClient(backend))
+    run = scraper.scrape_all(screen_names, clients,
+                             csv_file=os.path.join(workdir, 'tweets.csv'),
+                             checkpoint_db=os.path.join(workdir, 'tweets_checkpoint.db'),
+                             parquet_dir=None,
+                             metrics_file=os.path.join(workdir, 'scrape_metrics.jsonl'))
+    if stop_after is None:
+        await run
+    else:
+        # Simulate a crash / Ctrl-C partway through the run
+        try:
+            await asyncio.wait_for(run, timeout=stop_after)
+        except asyncio.TimeoutError:
+            pass
+    return scheduler
+
+
+def count_rows(csv_file):
+    with open(csv_file, newline='') as f:
+        return sum(1 for row in csv.reader(f) if len(row) > 6 and row[6]) - 1
+
+
+def bench_scrape(args, workdir):
+    os.makedirs(workdir)
+    rng = random.Random(args.seed)
+    screen_names = [f'member{rng.randrange(10**6):06d}' for _ in range(args.profiles)]
+
+    def backend():
+        return FakeBackend(scraper.START_DATE, scraper.END_DATE, mean_density=args.density,
+                           p_404=args.p404, p_503=args.p503, seed=args.seed)
+
+    # Full run from scratch
+    full = backend()
+    with contextlib.redirect_stdout(io.StringIO()):
+        scheduler, elapsed = run_virtual(_scrape(full, screen_names, args.accounts, workdir))
+    tweets = count_rows(os.path.join(workdir, 'tweets.csv'))
+    available = sum(len(full.timeline(name)) for name in screen_names)
+    requests = full.requests[SEARCH]
+
+    # Resume cost 1: rebuild the checkpoint store from the finished CSV
+    os.remove(os.path.join(workdir, 'tweets_checkpoint.db'))
+    t0 = time.perf_counter()
+    store = CheckpointStore(os.path.join(workdir, 'tweets_checkpoint.db'))
+    store.sync_from_csv(os.path.join(workdir, 'tweets.csv'))
+    store.close()
+    rebuild_secs = time.perf_counter() - t0
+
+    # Resume cost 2: interrupt a run halfway, resume it, and compare request counts.
+    # The resumed run gets a fresh backend (same timelines): each run_virtual loop
+    # starts its own clock, so quota windows left by the first loop would read as
+    # still open and charge the resume for rate limits it wouldn't hit.
+    resume_dir = os.path.join(workdir, 'resume')
+    os.makedirs(resume_dir)
+    interrupted, resumed = backend(), backend()
+    with contextlib.redirect_stdout(io.StringIO()):
+        _, first_half = run_virtual(_scrape(interrupted, screen_names, args.accounts, resume_dir,
+                                            stop_after=elapsed / 2))
+        _, second_half = run_virtual(_scrape(resumed, screen_names, args.accounts, resume_dir))
+    resumed_tweets = count_rows(os.path.join(resume_dir, 'tweets.csv'))
+
+    return {
+        'profiles': args.profiles,
+        'accounts': args.accounts,
+        'density': args.density,
+        'simulated_seconds': elapsed,
+        'tweets': tweets,
+        'coverage': tweets / available if available else 1.0,
+        'tweets_per_sec': tweets / elapsed if elapsed else 0.0,
+        'search_requests': requests,
+        'requests_per_tweet': requests / tweets if tweets else 0.0,
+        'errors': full.errors,
+        'idle_seconds': scheduler_waits(scheduler),
+        'resume_rebuild_seconds': rebuild_secs,
+        'resume_extra_requests': interrupted.requests[SEARCH] + resumed.requests[SEARCH] - requests,
+        'resume_extra_seconds': first_half + second_half - elapsed,
+        'resume_tweets': resumed_tweets,
+    }
+
+
+async def _followers(backend, handles, n_accounts, workdir):
+    loop = asyncio.get_running_loop()
+    backend.clock = loop.time
+    scheduler = QuotaScheduler(spread=False, clock=loop.time)
+    pool = follower_scraper.ClientPool(os.path.join(workdir, 'cookies'), fake_credentials(n_accounts),
+                                       scheduler=scheduler, client_factory=lambda: FakeClient(backend))
+    cookie_files = await pool.login_all()
+    sink = OutputSink(os.path.join(workdir, 'follower_counts.csv'), follower_scraper.OUTPUT_HEADER)
+    try:
+        progress = await follower_scraper.fetch_all(pool, cookie_files, handles, sink)
+    finally:
+        sink.close()
+    return scheduler, progress
+
+
+def bench_followers(args, workdir):
+    os.makedirs(workdir)
+    handles = [f'member{i:04d}' for i in range(args.followers)]
+    backend = FakeBackend(scraper.START_DATE, scraper.END_DATE, mean_density=args.density,
+                          p_404=args.p404, p_503=args.p503, seed=args.seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        (scheduler, progress), elapsed = run_virtual(_followers(backend, handles, args.accounts, workdir))
+    fetched = progress['done'] - len(progress['failed'])
+    return {
+        'handles': args.followers,
+        'accounts': args.accounts,
+        'simulated_seconds': elapsed,
+        'fetched': fetched,
+        'failed': len(progress['failed']),
+        'handles_per_sec': fetched / elapsed if elapsed else 0.0,
+        'lookup_requests': sum(backend.requests.values()),
+        'errors': backend.errors,
+        'idle_seconds': scheduler_waits(scheduler),
+    }
+
+
+def print_report(title, result):
+    print(f'\n{"="*60}')
+    print(f'  {title}')
+    print(f'{"="*60}')
+    for key, value in result.items():
+        if isinstance(value, float):
+            value = f'{value:,.3f}'
+        elif isinstance(value, dict):
+            value = ', '.join(f'{k}={v:,.0f}' for k, v in value.items()) or '-'
+        print(f'  {key:<24} {value}')
+    print(f'{"="*60}')
+
+
+def regressions(results, baseline, tolerance=TOLERANCE):
+    """(benchmark, metric, baseline, now) for every GUARDED metric worse than the baseline beyond tolerance."""
+    flagged = []
+    for bench, metrics in GUARDED.items():
+        now, before = results.get(bench), baseline.get(bench)
+        if now is None or before is None:
+            continue
+        for metric, (higher_is_worse, slack) in metrics.items():
+            if metric not in now or metric not in before:
+                continue
+            b, n = before[metric], now[metric]
+            change = n - b if higher_is_worse else b - n
+            if change > abs(b) * tolerance and change > slack:
+                flagged.append((bench, metric, b, n))
+    return flagged
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline scraper benchmark against a fake X backend.')
+    parser.add_argument('--profiles', type=int, default=10, help='profiles to scrape with main.py')
+    parser.add_argument('--followers', type=int, default=0,
+                        help='also benchmark follower_scraper over this many handles')
+    parser.add_argument('--accounts', type=int, default=4)
+    parser.add_argument('--density', type=float, default=3.0, help='mean tweets/day per profile')
+    parser.add_argument('--p404', type=float, default=0.01)
+    parser.add_argument('--p503', type=float, default=0.01)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='write results to this file for run-to-run comparison')
+    parser.add_argument('--baseline', help='results JSON to compare against')
+    parser.add_argument('--save-baseline', help='also write the results here as a baseline')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help='allowed fractional worsening of each guarded metric')
+    args = parser.parse_args()
+
+    results = {'run_at': datetime.now().isoformat(timespec='seconds'),
+               'config': {key: getattr(args, key) for key in CONFIG}}
+    workdir = tempfile.mkdtemp(prefix='bench_scraper_')
+    try:
+        if args.profiles:
+            results['scrape'] = bench_scrape(args, os.path.join(workdir, 'scrape'))
+            print_report('SCRAPE BENCHMARK (simulated time)', results['scrape'])
+        if args.followers:
+            results['followers'] = bench_followers(args, os.path.join(workdir, 'followers'))
+            print_report('FOLLOWER BENCHMARK (simulated time)', results['followers'])
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for path in filter(None, [args.json, args.save_baseline]):
+        with open(path, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'Results written to {path}')
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('config') != results['config']:
+            print(f'WARNING: baseline was run with {baseline.get("config")}')
+        flagged = regressions(results, baseline, args.tolerance)
+        print(f'\n{"="*60}\n  REGRESSIONS vs {args.baseline}  (tolerance {args.tolerance:.0%})\n{"="*60}')
+        for bench, metric, before, now in flagged:
+            print(f'  {bench:<10} {metric:<24} {before:>12,.3f} → {now:>12,.3f}')
+        if not flagged:
+            print('  none')
+        print('=' * 60)
+        if flagged:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
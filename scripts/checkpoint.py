@@ -0,0 +1,186 @@
+"""
+On-disk checkpoint index for the tweet scraper.
+
+Holds the resume state that main.py used to rebuild by rescanning tweets.csv:
+seen tweet IDs, covered search windows and per-profile status. It lives in a
+SQLite file next to the CSV, so resume and dedup checks are indexed point
+queries instead of full passes over the file.
+
+The CSV stays the source of truth. The store records how many bytes of the CSV
+it has indexed. On open, `sync_from_csv` ingests anything past that offset.
+This rebuilds a missing store from an existing tweets.csv in a single pass, and
+it also recovers rows written after the last commit before a crash.
+"""
+
+import csv
+import io
+import os
+import sqlite3
+
+from dateutil import parser as dateparser
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tweets (
+    screen_name TEXT NOT NULL,
+    tweet_id    TEXT NOT NULL,
+    created_at  TEXT,
+    PRIMARY KEY (screen_name, tweet_id)
+);
+CREATE INDEX IF NOT EXISTS tweets_by_date ON tweets (screen_name, created_at);
+
+CREATE TABLE IF NOT EXISTS windows (
+    screen_name TEXT NOT NULL,
+    since       TEXT NOT NULL,
+    until       TEXT NOT NULL,
+    PRIMARY KEY (screen_name, since, until)
+);
+
+CREATE TABLE IF NOT EXISTS profiles (
+    screen_name TEXT PRIMARY KEY,
+    status      TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+STATUS_COMPLETE = 'complete'
+STATUS_SENTINEL = 'sentinel'
+
+
+def parse_created_at(value):
+    """Normalise a tweet timestamp to a sortable naive ISO string, or None."""
+    try:
+        return dateparser.parse(value, ignoretz=True).strftime('%Y-%m-%d %H:%M:%S')
+    except (ValueError, TypeError, OverflowError):
+        return None
+
+
+class CheckpointStore:
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    # ── meta ────────────────────────────────────────────────────────────────
+
+    def _get_meta(self, key):
+        row = self.conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self.conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+
+    def csv_offset(self):
+        return int(self._get_meta('csv_offset') or 0)
+
+    def last_profile(self):
+        """Account on the last indexed CSV row (the old sequential resume point)."""
+        return self._get_meta('last_profile')
+
+    def commit(self, csv_file):
+        """Commit pending state and record that the CSV is indexed up to its current size."""
+        self._set_meta('csv_offset', str(os.path.getsize(csv_file)))
+        self.conn.commit()
+
+    # ── rebuild ─────────────────────────────────────────────────────────────
+
+    def sync_from_csv(self, csv_file):
+        """Index CSV rows past the stored offset. Returns the number of rows ingested."""
+        if not os.path.exists(csv_file):
+            return 0
+        offset = self.csv_offset()
+        if offset > os.path.getsize(csv_file):
+            raise ValueError(f'{csv_file} is smaller than the indexed offset; delete {self.path} to rebuild')
+
+        ingested = 0
+        last_profile = None
+        with open(csv_file, 'rb') as raw:
+            raw.seek(offset)
+            reader = csv.reader(io.TextIOWrapper(raw, encoding='utf-8', newline=''))
+            if offset == 0:
+                next(reader, None)
+            for row in reader:
+                if row and row[0]:
+                    last_profile = row[0]
+                if len(row) > 6 and row[0] and row[6]:
+                    self.add_tweet(row[0], row[6], row[3])
+                elif len(row) > 2 and row[0] and row[2] == 'SENTINEL':
+                    self.set_status(row[0], STATUS_SENTINEL)
+                ingested += 1
+
+        if last_profile:
+            self._set_meta('last_profile', last_profile)
+        self.commit(csv_file)
+        return ingested
+
+    # ── tweets ──────────────────────────────────────────────────────────────
+
+    def add_tweet(self, screen_name, tweet_id, created_at):
+        """Record a tweet ID. Returns False if it was already seen for this profile."""
+        cur = self.conn.execute(
+            'INSERT OR IGNORE INTO tweets (screen_name, tweet_id, created_at) VALUES (?, ?, ?)',
+            (screen_name, str(tweet_id), parse_created_at(str(created_at))),
+        )
+        return cur.rowcount == 1
+
+    def has_tweet(self, screen_name, tweet_id):
+        row = self.conn.execute(
+            'SELECT 1 FROM tweets WHERE screen_name = ? AND tweet_id = ?',
+            (screen_name, str(tweet_id)),
+        ).fetchone()
+        return row is not None
+
+    def tweet_count(self, screen_name):
+        return self.conn.execute(
+            'SELECT COUNT(*) FROM tweets WHERE screen_name = ?', (screen_name,)
+        ).fetchone()[0]
+
+    def earliest_date(self, screen_name):
+        """Earliest stored tweet for a profile as a naive ISO string, or None."""
+        return self.conn.execute(
+            'SELECT MIN(created_at) FROM tweets WHERE screen_name = ?', (screen_name,)
+        ).fetchone()[0]
+
+    # ── windows ─────────────────────────────────────────────────────────────
+
+    def mark_window(self, screen_name, since, until):
+        self.conn.execute(
+            'INSERT OR IGNORE INTO windows (screen_name, since, until) VALUES (?, ?, ?)',
+            (screen_name, since, until),
+        )
+
+    def covered_windows(self, screen_name):
+        rows = self.conn.execute(
+            'SELECT since, until FROM windows WHERE screen_name = ?', (screen_name,)
+        ).fetchall()
+        return set(rows)
+
+    # ── profiles ────────────────────────────────────────────────────────────
+
+    def set_status(self, screen_name, status):
+        self.conn.execute(
+            'INSERT OR REPLACE INTO profiles (screen_name, status) VALUES (?, ?)',
+            (screen_name, status),
+        )
+
+    def status(self, screen_name):
+        row = self.conn.execute(
+            'SELECT status FROM profiles WHERE screen_name = ?', (screen_name,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def completed_profiles(self):
+        rows = self.conn.execute(
+            'SELECT screen_name FROM profiles WHERE status IN (?, ?)',
+            (STATUS_COMPLETE, STATUS_SENTINEL),
+        ).fetchall()
+        return {r[0] for r in rows}
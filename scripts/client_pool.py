@@ -0,0 +1,97 @@
+"""
+Warm pool of logged-in twikit clients, shared by main.py and follower_scraper.py.
+
+Each cookie file gets one Client, which logs in once and stays alive for the
+whole run. Rotating between accounts is then a dictionary lookup, not a new
+login followed by a new transaction-ID bootstrap.
+
+This module also carries the twikit transaction-ID fix (previously copied into
+each scraper). The ondemand.s file hash and the KEY_BYTE indices parsed from
+that file are cached for ONDEMAND_TTL seconds. While the home page still points
+at the same ondemand file, later clients reuse the indices and skip the JS
+download.
+"""
+
+import os
+import re
+import time
+from datetime import datetime
+
+from twikit import Client
+
+# MONKEY PATCH: Fix for twikit broken since March 18 2026
+_tx_mod = __import__('twikit.x_client_transaction.transaction', fromlist=['ClientTransaction'])
+_tx_mod.ON_DEMAND_FILE_REGEX = re.compile(
+    r""",(\d+):["']ondemand\.s["']""", flags=(re.VERBOSE | re.MULTILINE))
+_tx_mod.ON_DEMAND_HASH_PATTERN = r',{}:"([0-9a-f]+)"'
+
+ONDEMAND_TTL = 6 * 60 * 60
+_ondemand_cache = {}  # ondemand file hash -> (fetched_at, key_byte_indices)
+
+
+async def _patched_get_indices(self, home_page_response, session, headers):
+    response = self.validate_response(home_page_response) or self.home_page_response
+    on_demand_file_index = _tx_mod.ON_DEMAND_FILE_REGEX.search(str(response)).group(1)
+    regex = re.compile(_tx_mod.ON_DEMAND_HASH_PATTERN.format(on_demand_file_index))
+    filename = regex.search(str(response)).group(1)
+
+    cached = _ondemand_cache.get(filename)
+    if cached and time.time() - cached[0] < ONDEMAND_TTL:
+        key_byte_indices = cached[1]
+    else:
+        on_demand_file_url = f"https://abs.twimg.com/responsive-web/client-web/ondemand.s.{filename}a.js"
+        on_demand_file_response = await session.request(method="GET", url=on_demand_file_url, headers=headers)
+        key_byte_indices_match = _tx_mod.INDICES_REGEX.finditer(str(on_demand_file_response.text))
+        key_byte_indices = [int(item.group(2)) for item in key_byte_indices_match]
+        if not key_byte_indices:
+            raise Exception("Couldn't get KEY_BYTE indices")
+        _ondemand_cache[filename] = (time.time(), key_byte_indices)
+    return key_byte_indices[0], key_byte_indices[1:]
+
+_tx_mod.ClientTransaction.get_indices = _patched_get_indices
+# END MONKEY PATCH
+
+
+class ClientPool:
+    def __init__(self, cookies_dir, credentials, scheduler=None, client_factory=None):
+        self.cookies_dir = cookies_dir
+        self.credentials = credentials
+        self.scheduler = scheduler
+        # bench_scraper.py passes a factory for offline fake clients
+        self.client_factory = client_factory or (lambda: Client(language='en-US'))
+        self.clients = {}  # cookie file -> logged-in Client
+
+    async def login(self, cookie_file):
+        """Log in one account (or refresh it) and keep its client in the pool."""
+        os.makedirs(self.cookies_dir, exist_ok=True)
+        creds = self.credentials[cookie_file]
+        client = self.client_factory()
+        await client.login(
+            auth_info_1=creds[0],
+            auth_info_2=creds[1],
+            password=creds[2],
+            cookies_file=os.path.join(self.cookies_dir, cookie_file),
+        )
+        if self.scheduler:
+            self.scheduler.attach(cookie_file, client)
+        self.clients[cookie_file] = client
+        print(f'{datetime.now()} - [Pool] Logged in: {creds[0]} ({cookie_file})')
+        return client
+
+    async def login_all(self):
+        """Log in every account once. Accounts that fail are skipped; returns the ones in the pool."""
+        for cookie_file in sorted(self.credentials.keys()):
+            try:
+                await self.login(cookie_file)
+            except Exception as e:
+                print(f'{datetime.now()} - [Login] Skipping {cookie_file}: {e}')
+        return self.accounts()
+
+    def accounts(self):
+        return sorted(self.clients.keys())
+
+    def get(self, cookie_file):
+        return self.clients[cookie_file]
+
+    def username(self, cookie_file):
+        return self.credentials[cookie_file][0]
@@ -0,0 +1,96 @@
+"""
+Columnar Parquet copy of house_tweets_enriched.csv.
+
+The enriched CSV is read in full by dashboard/scripts/preprocess.py and by
+notebooks 03 and 04, and each reader re-parses every column. This writes it
+once as typed, compressed Parquet:
+
+  - handle_lower is stored as a dictionary (categorical) column
+  - Created At is parsed to a UTC timestamp at write time
+  - model confidence and emotion scores are float32
+  - rows are grouped by handle_lower (stable, so each member's rows keep their
+    CSV order) in row groups of ROW_GROUP_SIZE, so a filter on handle_lower or
+    Created At skips whole row groups using their min/max statistics
+
+Every other column keeps the dtype pandas infers from the full CSV, so readers
+see the same values they got from read_csv.
+
+Readers project and filter with pandas directly, e.g.
+
+    pd.read_parquet(ENRICHED_PARQUET, columns=["handle_lower", "sentiment_score"],
+                    filters=[("handle_lower", "in", handles)])
+
+Usage:
+    python enriched_store.py data/processed/house_tweets_enriched.csv
+"""
+
+import argparse
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# sentiment_score stays float64: preprocess.py rounds it to 4 places for the
+# dashboard, and float32 would move a few values across a rounding boundary
+FLOAT32_COLUMNS = ["confidence", "anger", "fear", "joy", "disgust", "sadness", "surprise", "neutral"]
+ROW_GROUP_SIZE = 16_384
+COMPRESSION = "zstd"
+
+
+def parquet_path_for(csv_path):
+    return os.path.splitext(csv_path)[0] + ".parquet"
+
+
+def to_typed_frame(tweets):
+    """Apply the store's column types to a frame read from the enriched CSV."""
+    if "handle_lower" not in tweets.columns:
+        tweets["handle_lower"] = tweets["Account"].str.lower().str.strip()
+    tweets["Created At"] = pd.to_datetime(tweets["Created At"], errors="coerce", utc=True)
+    for col in FLOAT32_COLUMNS:
+        if col in tweets.columns:
+            tweets[col] = tweets[col].astype(np.float32)
+
+    tweets = tweets.sort_values("handle_lower", kind="stable", na_position="last", ignore_index=True)
+    handles = sorted(tweets["handle_lower"].dropna().unique())
+    tweets["handle_lower"] = pd.Categorical(tweets["handle_lower"], categories=handles)
+    return tweets
+
+
+def write_enriched_parquet(csv_path, parquet_path=None):
+    """Convert the enriched CSV to Parquet. Returns the Parquet path."""
+    if pa is None:
+        raise ImportError("pyarrow is required to write Parquet (pip install pyarrow)")
+    parquet_path = parquet_path or parquet_path_for(csv_path)
+
+    print(f"{datetime.now()} - Reading {csv_path}...")
+    tweets = to_typed_frame(pd.read_csv(csv_path, low_memory=False))
+
+    tmp = parquet_path + ".tmp"
+    table = pa.Table.from_pandas(tweets, preserve_index=False)
+    pq.write_table(table, tmp, row_group_size=ROW_GROUP_SIZE, compression=COMPRESSION)
+    os.replace(tmp, parquet_path)
+
+    csv_mb = os.path.getsize(csv_path) / 1e6
+    pq_mb = os.path.getsize(parquet_path) / 1e6
+    print(f"{datetime.now()} - Saved → {parquet_path}  ({len(tweets):,} rows, "
+          f"{pq_mb:.1f} MB vs {csv_mb:.1f} MB CSV, {table.num_columns} columns)")
+    return parquet_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write the enriched tweets CSV as typed Parquet.")
+    parser.add_argument("csv", help="house_tweets_enriched.csv")
+    parser.add_argument("--output", help="Parquet path (default: next to the CSV)")
+    args = parser.parse_args()
+    write_enriched_parquet(args.csv, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Offline stand-in for the X API, for benchmarking the scrapers without accounts.
+
+FakeBackend serves synthetic timelines for any screen name and applies the same
+per-account quotas as the live site. It raises the real twikit exceptions:
+TooManyRequests carries an x-rate-limit-reset header, and there are occasional
+404s and 503s at configurable rates. FakeClient has the subset of the
+twikit.Client interface the scrapers use: login, search_tweet (with cursor
+pages returned as twikit Result objects), get_user_by_screen_name and
+http.event_hooks. That means it can go anywhere a Client is created, via
+ClientPool(client_factory=...).
+
+Time comes from a `clock` callable. bench_scraper.py runs the backend on a
+virtual-time event loop, so 15-minute rate-limit resets take no real time.
+"""
+
+import math
+import random
+import re
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import httpx
+from twikit.errors import NotFound, ServerError, TooManyRequests
+from twikit.utils import Result
+
+from rate_scheduler import ENDPOINT_LIMITS, SEARCH, USER_LOOKUP
+
+QUERY_REGEX = re.compile(r'from:(\S+) until:(\d{4}-\d{2}-\d{2}) since:(\d{4}-\d{2}-\d{2})')
+OPERATION_URLS = {
+    SEARCH: 'https://x.com/i/api/graphql/fake/SearchTimeline',
+    USER_LOOKUP: 'https://x.com/i/api/graphql/fake/UserByScreenName',
+}
+CREATED_AT_FORMAT = '%a %b %d %H:%M:%S +0000 %Y'
+
+
+class FakeBackend:
+    def __init__(self, start, end, mean_density=3.0, limits=None, p_404=0.0, p_503=0.0,
+                 page_trim=2, seed=0, clock=time.time):
+        self.start = start
+        self.end = end
+        self.mean_density = mean_density  # tweets/day, averaged over profiles
+        self.limits = limits or ENDPOINT_LIMITS
+        self.p_404 = p_404
+        self.p_503 = p_503
+        self.page_trim = page_trim        # Latest search drops a few tweets from full pages
+        self.seed = seed
+        self.clock = clock
+        self.rng = random.Random(seed)
+        self.timelines = {}
+        self.quota = {}                   # (account, endpoint) -> [window_start, used]
+        self.requests = {SEARCH: 0, USER_LOOKUP: 0}
+        self.errors = {'429': 0, '404': 0, '503': 0}
+
+    def timeline(self, screen_name):
+        """Tweets for a profile, newest first; generated once per run from the seed."""
+        if screen_name not in self.timelines:
+            rng = random.Random(f'{self.seed}:{screen_name}')
+            density = rng.lognormvariate(math.log(self.mean_density), 1.0)
+            span = (self.end - self.start).total_seconds()
+            n = int(density * span / 86400)
+            stamps = sorted((self.start + timedelta(seconds=rng.uniform(0, span)) for _ in range(n)),
+                            reverse=True)
+            self.timelines[screen_name] = [
+                SimpleNamespace(
+                    id=str(rng.getrandbits(60)),
+                    text=f'synthetic tweet {i} from @{screen_name}',
+                    created_at=ts.strftime(CREATED_AT_FORMAT),
+                    created_at_datetime=ts,
+                    retweet_count=int(rng.paretovariate(1.5)) - 1,
+                    favorite_count=int(rng.paretovariate(1.2)) - 1,
+                    user=SimpleNamespace(name=screen_name.title()),
+                )
+                for i, ts in enumerate(stamps)
+            ]
+        return self.timelines[screen_name]
+
+    def charge(self, account, endpoint):
+        """Count one request against the account's quota; raise the errors the live API would."""
+        now = self.clock()
+        limit, window = self.limits[endpoint]
+        start, used = self.quota.get((account, endpoint), (now, 0))
+        if now >= start + window:
+            start, used = now, 0
+        reset = math.ceil(start + window)
+        if used >= limit:
+            self.errors['429'] += 1
+            raise TooManyRequests('Rate limit exceeded', headers={'x-rate-limit-reset': str(reset)})
+        self.quota[(account, endpoint)] = (start, used + 1)
+        self.requests[endpoint] += 1
+
+        roll = self.rng.random()
+        if roll < self.p_404:
+            self.errors['404'] += 1
+            raise NotFound('status: 404, message: "Not found"')
+        if roll < self.p_404 + self.p_503:
+            self.errors['503'] += 1
+            raise ServerError('status: 503, message: "Service Unavailable"')
+        return httpx.Response(200, request=httpx.Request('POST', OPERATION_URLS[endpoint]), headers={
+            'x-rate-limit-limit': str(limit),
+            'x-rate-limit-remaining': str(limit - used - 1),
+            'x-rate-limit-reset': str(reset),
+        })
+
+
+class FakeClient:
+    def __init__(self, backend):
+        self.backend = backend
+        self.account = None
+        self.http = SimpleNamespace(event_hooks={'request': [], 'response': []})
+
+    async def login(self, auth_info_1=None, auth_info_2=None, password=None, cookies_file=None):
+        self.account = auth_info_1
+
+    async def _request(self, endpoint):
+        response = self.backend.charge(self.account, endpoint)
+        for hook in self.http.event_hooks['response']:
+            await hook(response)
+
+    async def search_tweet(self, query, product='Latest', count=20, cursor=None):
+        await self._request(SEARCH)
+        screen_name, until, since = QUERY_REGEX.search(query).groups()
+        since, until = datetime.strptime(since, '%Y-%m-%d'), datetime.strptime(until, '%Y-%m-%d')
+        matches = [t for t in self.backend.timeline(screen_name)
+                   if since <= t.created_at_datetime < until]
+
+        offset = int(cursor or 0)
+        page = matches[offset:offset + count]
+        next_offset = offset + len(page)
+        if len(page) == count:
+            page = page[:count - self.backend.page_trim]
+        if next_offset >= len(matches):
+            return Result(page)
+        return Result(page,
+                      lambda: self.search_tweet(query, product, count, cursor=str(next_offset)),
+                      str(next_offset))
+
+    async def get_user_by_screen_name(self, screen_name):
+        await self._request(USER_LOOKUP)
+        rng = random.Random(f'{self.backend.seed}:{screen_name}:user')
+        return SimpleNamespace(
+            screen_name=screen_name,
+            followers_count=int(rng.paretovariate(0.8) * 1000),
+            following_count=rng.randint(50, 5000),
+            statuses_count=len(self.backend.timeline(screen_name)),
+            is_blue_verified=rng.random() < 0.5,
+            created_at=(self.backend.start - timedelta(days=rng.randint(100, 5000))).strftime(CREATED_AT_FORMAT),
+        )
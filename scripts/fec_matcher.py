@@ -0,0 +1,235 @@
+"""
+Blocked, batched FEC-name -> legislator matcher for notebooks/01_fec_matching.ipynb.
+
+FEC names have the last name run onto the full name, e.g.
+"TaylorMarjorie Taylor Greene (R)". The notebook's auto_match_one tried every
+key of last_name_index as a prefix of every FEC name, compiled a regex for each
+try, and scored the candidates one at a time. LastNameMatcher returns the same
+matches:
+
+  - last names are indexed once, bucketed by length, so the names that prefix
+    an FEC name are found with one dict lookup per distinct length
+  - FEC rows are grouped into blocks by the last name they start with, and each
+    block is scored with one rapidfuzz.process.cdist call (clean names x
+    official names)
+  - the party filter, the tie-breaking (first candidate in last_name_index
+    order wins), the threshold and the rounding all follow auto_match_one
+
+Without rapidfuzz, each block is scored pair by pair with the notebook's
+difflib fallback.
+
+The CLI matches every donor cycle in one pass and writes the low-confidence
+matches next to the output for review:
+
+    python fec_matcher.py ../data/raw/fec/small_donors_*.csv \\
+        --current ../data/raw/legislators/legislators-current.json \\
+        --historical legislators-historical.json --output fec_matches_all_cycles.csv
+"""
+
+import argparse
+import json
+import re
+import time
+from collections import defaultdict
+from datetime import datetime
+from difflib import SequenceMatcher
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    from rapidfuzz import fuzz, process
+except ImportError:
+    fuzz = process = None
+    print("Fuzzy backend: difflib (pip install rapidfuzz for speed)")
+
+AUTO_MATCH_THRESHOLD = 70
+LOW_CONFIDENCE_THRESHOLD = 85
+PARTY_MAP = {"R": "Republican", "D": "Democrat", "I": "Independent"}
+# auto_match_one's r"^{last}(.+?)\s*\([RDI3]\)\s*$", applied after the last-name prefix
+NAME_TAIL = re.compile(r"(.+?)\s*\([RDI3]\)\s*$", re.IGNORECASE)
+MEMBER_COLS = ["first", "last", "official_full", "party", "chamber", "state", "bioguide", "twitter"]
+
+
+def token_sort_ratio(a, b):
+    """The notebook's difflib fallback for rapidfuzz.fuzz.token_sort_ratio."""
+    a_s = " ".join(sorted(a.lower().split()))
+    b_s = " ".join(sorted(b.lower().split()))
+    return SequenceMatcher(None, a_s, b_s).ratio() * 100
+
+
+# ── Legislators (notebook section 3) ────────────────────────────────────────
+
+def get_official_name(member):
+    n = member["name"]
+    return n.get("official_full") or f"{n.get('first', '')} {n.get('last', '')}".strip()
+
+
+def member_to_row(member):
+    """Flatten a legislator JSON entry to a plain dict."""
+    if not member.get("terms"):
+        return None
+    last_term = member["terms"][-1]
+    return {
+        "first":        member["name"].get("first", ""),
+        "last":         member["name"].get("last", ""),
+        "official_full": get_official_name(member),
+        "party":        last_term.get("party", ""),
+        "chamber":      last_term.get("type", ""),
+        "state":        last_term.get("state", ""),
+        "bioguide":     member["id"].get("bioguide", ""),
+        "twitter":      member["id"].get("twitter", ""),
+    }
+
+
+def build_last_name_index(*member_lists):
+    """last_name_index as built in the notebook, over one or more legislator lists (first list first)."""
+    index = defaultdict(list)
+    seen = set()
+    for members in member_lists:
+        for m in members:
+            row = member_to_row(m)
+            if row is None or (row["bioguide"] and row["bioguide"] in seen):
+                continue
+            seen.add(row["bioguide"])
+            index[row["last"].lower()].append(row)
+    return index
+
+
+# ── Matcher ─────────────────────────────────────────────────────────────────
+
+class LastNameMatcher:
+    """auto_match_one over many FEC names at once: names -> [(candidate, score, clean_name)]."""
+
+    def __init__(self, last_name_index):
+        self.keys = list(last_name_index)
+        self.candidates = [list(last_name_index[k]) for k in self.keys]
+        self.official = [[c["official_full"] for c in cands] for cands in self.candidates]
+        self.parties = [np.array([c["party"] for c in cands], dtype=object) for cands in self.candidates]
+
+        # length -> lowercased last name -> block numbers (index order)
+        self.by_length = defaultdict(lambda: defaultdict(list))
+        for block, key in enumerate(self.keys):
+            self.by_length[len(key.lower())][key.lower()].append(block)
+        self.lengths = sorted(self.by_length)
+
+    def blocks_for(self, raw):
+        """(block, clean name) for every last name that prefixes raw, in last_name_index order."""
+        if not isinstance(raw, str):
+            return []
+        lower = raw.lower()
+        blocks = sorted(b for n in self.lengths if n <= len(lower)
+                        for b in self.by_length[n].get(lower[:n], ()))
+        hits = []
+        for block in blocks:
+            m = NAME_TAIL.match(raw, len(self.keys[block]))
+            if m:
+                hits.append((block, m.group(1).strip()))
+        return hits
+
+    def score_block(self, block, queries):
+        """Score matrix, clean names x the block's official names."""
+        if process is not None:
+            return process.cdist(queries, self.official[block], scorer=fuzz.token_sort_ratio, dtype=np.float64)
+        return np.array([[token_sort_ratio(q, name) for name in self.official[block]] for q in queries])
+
+    def match_all(self, names, parties, threshold=AUTO_MATCH_THRESHOLD):
+        names, parties = list(names), list(parties)
+        hits_by_name = {raw: self.blocks_for(raw) for raw in set(n for n in names if isinstance(n, str))}
+
+        # Distinct clean names per block, scored in one call each
+        queries = defaultdict(dict)
+        for hits in hits_by_name.values():
+            for block, clean in hits:
+                queries[block].setdefault(clean, len(queries[block]))
+        scores = {block: self.score_block(block, list(q)) for block, q in queries.items()}
+
+        results = []
+        for raw, party in zip(names, parties):
+            best_match, best_score, best_clean = None, 0.0, None
+            for block, clean in hits_by_name.get(raw, ()):
+                row = scores[block][queries[block][clean]]
+                if isinstance(party, str):
+                    row = np.where(self.parties[block] == party, row, -np.inf)
+                j = int(np.argmax(row))
+                if row[j] > best_score:
+                    best_score = float(row[j])
+                    best_match = self.candidates[block][j]
+                    best_clean = clean
+
+            if best_match and best_score >= threshold:
+                results.append((best_match, round(best_score, 1), best_clean))
+            else:
+                results.append((None, round(best_score, 1), best_clean))
+        return results
+
+
+# ── All cycles ──────────────────────────────────────────────────────────────
+
+def load_cycle(path):
+    """One donor file with the notebook's section 2 name / party cleanup, tagged with its cycle year."""
+    fec = pd.read_csv(path)
+    year = re.search(r"(\d{4})", Path(path).stem)
+    fec.insert(0, "cycle", int(year.group(1)) if year else Path(path).stem)
+    fec["party_code"] = fec["Name"].str.extract(r"\(([RDI])\)")[0]
+    fec["party_full"] = fec["party_code"].map(PARTY_MAP)
+    fec["Name"] = fec["Name"].str.strip()
+    return fec
+
+
+def match_cycles(paths, matcher, threshold=AUTO_MATCH_THRESHOLD):
+    """Match every row of every cycle in one matcher call. Columns follow the notebook's auto_df."""
+    fec = pd.concat([load_cycle(p) for p in paths], ignore_index=True)
+    matches = matcher.match_all(fec["Name"], fec["party_full"], threshold)
+
+    members = pd.DataFrame([cand or {} for cand, _, _ in matches], columns=MEMBER_COLS)
+    fec = pd.concat([fec, members], axis=1)
+    fec["clean_name"] = [clean for _, _, clean in matches]
+    fec["match_score"] = [score for _, score, _ in matches]
+    fec["match_method"] = ["auto" if cand else "no_match" for cand, _, _ in matches]
+    return fec
+
+
+def low_confidence(matched, threshold=LOW_CONFIDENCE_THRESHOLD):
+    """Auto-matches scoring under threshold, weakest first (notebook section 4 review table)."""
+    low = matched[(matched["match_method"] == "auto") & (matched["match_score"] < threshold)]
+    return low.sort_values("match_score", kind="stable")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Match FEC donor files for every cycle to legislators.")
+    parser.add_argument("fec", nargs="+", help="small_donors_<cycle>.csv files")
+    parser.add_argument("--current", default="legislators-current.json")
+    parser.add_argument("--historical", default=None, help="legislators-historical.json (optional)")
+    parser.add_argument("--threshold", type=float, default=AUTO_MATCH_THRESHOLD)
+    parser.add_argument("--low-confidence", type=float, default=LOW_CONFIDENCE_THRESHOLD)
+    parser.add_argument("--output", default="fec_matches_all_cycles.csv")
+    args = parser.parse_args()
+
+    member_lists = []
+    for path in filter(None, [args.current, args.historical]):
+        with open(path) as f:
+            member_lists.append(json.load(f))
+    index = build_last_name_index(*member_lists)
+    print(f"{datetime.now()} - Last-name index: {len(index):,} keys, "
+          f"{sum(len(v) for v in index.values()):,} legislators")
+
+    start = time.perf_counter()
+    matched = match_cycles(args.fec, LastNameMatcher(index), args.threshold)
+    print(f"{datetime.now()} - Matched {len(matched):,} rows from {len(args.fec)} files "
+          f"in {time.perf_counter() - start:.2f}s")
+    summary = matched.groupby("cycle")["match_method"].value_counts().unstack(fill_value=0)
+    print(summary.to_string())
+
+    matched.to_csv(args.output, index=False)
+    print(f"{datetime.now()} - Saved → {args.output}")
+
+    low = low_confidence(matched, args.low_confidence)
+    low_path = Path(args.output).with_name(Path(args.output).stem + "_low_confidence.csv")
+    low[["cycle", "Name", "clean_name", "official_full", "match_score"]].to_csv(low_path, index=False)
+    print(f"{datetime.now()} - Low-confidence matches (score < {args.low_confidence:g}): {len(low)} → {low_path}")
+
+
+if __name__ == "__main__":
+    main()
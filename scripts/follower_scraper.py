@@ -1,31 +1,8 @@
 # follower_scraper.py
 # Fetches follower counts for all members in sample_house_full.csv
 
-# MONKEY PATCH: Fix for twikit broken since March 18 2026
-import re
-_tx_mod = __import__('twikit.x_client_transaction.transaction', fromlist=['ClientTransaction'])
-_tx_mod.ON_DEMAND_FILE_REGEX = re.compile(
-    r""",(\d+):["']ondemand\.s["']""", flags=(re.VERBOSE | re.MULTILINE))
-_tx_mod.ON_DEMAND_HASH_PATTERN = r',{}:"([0-9a-f]+)"'
-
-async def _patched_get_indices(self, home_page_response, session, headers):
-    key_byte_indices = []
-    response = self.validate_response(home_page_response) or self.home_page_response
-    on_demand_file_index = _tx_mod.ON_DEMAND_FILE_REGEX.search(str(response)).group(1)
-    regex = re.compile(_tx_mod.ON_DEMAND_HASH_PATTERN.format(on_demand_file_index))
-    filename = regex.search(str(response)).group(1)
-    on_demand_file_url = f"https://abs.twimg.com/responsive-web/client-web/ondemand.s.{filename}a.js"
-    on_demand_file_response = await session.request(method="GET", url=on_demand_file_url, headers=headers)
-    key_byte_indices_match = _tx_mod.INDICES_REGEX.finditer(str(on_demand_file_response.text))
-    for item in key_byte_indices_match:
-        key_byte_indices.append(item.group(2))
-    if not key_byte_indices:
-        raise Exception("Couldn't get KEY_BYTE indices")
-    key_byte_indices = list(map(int, key_byte_indices))
-    return key_byte_indices[0], key_byte_indices[1:]
-
-_tx_mod.ClientTransaction.get_indices = _patched_get_indices
-# END MONKEY PATCH
+# Importing client_pool applies the twikit transaction-ID fix (MONKEY PATCH 1)
+from client_pool import ClientPool
 
 # MONKEY PATCH 2: Fix twikit User.__init__ KeyError on missing fields
 import twikit.user as _user_mod
@@ -67,16 +44,21 @@ import asyncio
 import csv
 import os
 import pandas as pd
-from twikit import Client, TooManyRequests
+from twikit import TooManyRequests
 from datetime import datetime
-from random import randint
 from dotenv import load_dotenv
+from output_sink import OutputSink
+from rate_scheduler import QuotaScheduler, USER_LOOKUP
 load_dotenv()
 
 # === CONFIGURATION ===
 SAMPLE_CSV = "sample_house_full.csv"
 OUTPUT_CSV = "follower_counts.csv"
 COOKIES_DIR = "cookies"
+OUTPUT_HEADER = ["screen_name", "followers", "following", "tweets_count", "verified", "created_at"]
+MAX_ATTEMPTS = 3  # per handle, for errors other than rate limits
+METRICS_FILE = "follower_metrics.jsonl"  # or a .prom path for a Prometheus textfile; None to disable
+METRICS_SECONDS = 60
 
 CREDENTIALS = {}
 for key, value in os.environ.items():
@@ -97,6 +79,8 @@ async def get_follower_count(client, screen_name):
             "verified": user.is_blue_verified,
             "created_at": user.created_at,
         }
+    except (TooManyRequests, RecursionError):
+        raise
     except Exception as e:
         print(f"  Error for @{screen_name}: {e}")
         return None
@@ -125,94 +109,114 @@ async def main():
         print("All done!")
         return
 
-    # Initialize client
-    cookie_files = sorted(CREDENTIALS.keys())
-    current_idx = 0
-    cookie_file = cookie_files[current_idx]
-    creds = CREDENTIALS[cookie_file]
-
-    client = Client(language='en-US')
-    cookie_path = os.path.join(COOKIES_DIR, cookie_file)
-    await client.login(
-        auth_info_1=creds[0],
-        auth_info_2=creds[1],
-        password=creds[2],
-        cookies_file=cookie_path,
-    )
-    print(f"Logged in as {creds[0]}")
-
-    # Create output file if needed
-    if not os.path.exists(OUTPUT_CSV):
-        with open(OUTPUT_CSV, "w", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow(["screen_name", "followers", "following", "tweets_count", "verified", "created_at"])
-
-    # Fetch follower counts
-    for i, handle in enumerate(remaining):
-        print(f"[{i+1}/{len(remaining)}] @{handle}...", end=" ")
-
-        try:
-            result = await get_follower_count(client, handle)
-        except TooManyRequests as e:
-            print(f"Rate limited. Waiting 60s then rotating...")
-            await asyncio.sleep(60)
-            current_idx = (current_idx + 1) % len(cookie_files)
-            cookie_file = cookie_files[current_idx]
-            creds = CREDENTIALS[cookie_file]
-            client = Client(language='en-US')
-            cookie_path = os.path.join(COOKIES_DIR, cookie_file)
-            await client.login(
-                auth_info_1=creds[0],
-                auth_info_2=creds[1],
-                password=creds[2],
-                cookies_file=cookie_path,
-            )
-            print(f"Rotated to {creds[0]}")
-            # Retry
-            try:
-                result = await get_follower_count(client, handle)
-            except Exception as e2:
-                print(f"  Still failed: {e2}")
-                result = None
-        except RecursionError:
-            print(f"Recursion error — rotating account...")
-            current_idx = (current_idx + 1) % len(cookie_files)
-            cookie_file = cookie_files[current_idx]
-            creds = CREDENTIALS[cookie_file]
-            client = Client(language='en-US')
-            cookie_path = os.path.join(COOKIES_DIR, cookie_file)
-            await client.login(
-                auth_info_1=creds[0],
-                auth_info_2=creds[1],
-                password=creds[2],
-                cookies_file=cookie_path,
-            )
-            try:
-                result = await get_follower_count(client, handle)
-            except Exception as e2:
-                print(f"  Still failed: {e2}")
-                result = None
-
-        if result:
-            print(f"{result['followers']:,} followers")
-            with open(OUTPUT_CSV, "a", newline="") as f:
-                writer = csv.writer(f)
-                writer.writerow([
-                    result["screen_name"],
-                    result["followers"],
-                    result["following"],
-                    result["tweets_count"],
-                    result["verified"],
-                    result["created_at"],
-                ])
-        else:
-            print("FAILED")
-
-        # Rate limit courtesy
-        wait = randint(4, 8)
-        await asyncio.sleep(wait)
+    # Log every account in once. There is one worker per account, and each
+    # lookup goes to whichever account the scheduler can serve soonest. twikit has no batch
+    # lookup by screen name, so throughput comes from using all accounts at once.
+    scheduler = QuotaScheduler(spread=False)
+    pool = ClientPool(COOKIES_DIR, CREDENTIALS, scheduler=scheduler)
+    cookie_files = await pool.login_all()
+    if not cookie_files:
+        print("No accounts logged in. Check ACCOUNT_* in .env.")
+        return
 
+    # Buffered writer; creates the output file with its header if needed
+    sink = OutputSink(OUTPUT_CSV, OUTPUT_HEADER, flush_rows=25, flush_seconds=60)
+    exporter = asyncio.create_task(scheduler.metrics.export_periodically(METRICS_FILE, METRICS_SECONDS)) \
+        if METRICS_FILE else None
+    try:
+        progress = await fetch_all(pool, cookie_files, remaining, sink)
+    finally:
+        sink.close()
+        if exporter:
+            exporter.cancel()
+            scheduler.metrics.export(METRICS_FILE)
+
+    if progress["failed"]:
+        print(f"\nFailed ({len(progress['failed'])}): {', '.join(progress['failed'])}")
+    scheduler.print_summary()
+    scheduler.metrics.print_summary()
     print(f"\nDone! Results in {OUTPUT_CSV}")
 
 
-asyncio.run(main())
\ No newline at end of file
+async def fetch_all(pool, cookie_files, remaining, sink):
+    """Fetch every handle in `remaining` with one worker per account. Returns the progress dict."""
+    queue = asyncio.Queue()
+    for handle in remaining:
+        queue.put_nowait(handle)
+    progress = {"done": 0, "total": len(remaining), "failed": [], "attempts": {}}
+
+    workers = [asyncio.create_task(fetch_worker(pool, cookie_files, queue, sink, progress))
+               for _ in cookie_files]
+    joined = asyncio.create_task(queue.join())
+    try:
+        # Workers only end by raising (e.g. the sink failing to flush); stop on
+        # that too, or join() would wait for handles no worker will take
+        done, _ = await asyncio.wait([joined, *workers], return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if task is not joined:
+                task.result()
+    finally:
+        # Workers block on quota or an empty queue, so stop them once every handle is settled,
+        # and let them finish cancelling before the caller closes the sink
+        joined.cancel()
+        for w in workers:
+            w.cancel()
+        await asyncio.gather(joined, *workers, return_exceptions=True)
+    return progress
+
+
+async def fetch_worker(pool, cookie_files, queue, sink, progress):
+    """Fetch handles from the shared queue, each with whichever account has quota soonest."""
+    attempts = progress["attempts"]
+    scheduler = pool.scheduler
+    metrics = scheduler.metrics
+    while True:
+        # Take a handle before a token, so idle workers at the end of a run
+        # don't spend quota while they wait on an empty queue
+        handle = await queue.get()
+        try:
+            cookie_file = scheduler.pick_account(cookie_files, USER_LOOKUP)
+            await scheduler.acquire(cookie_file, USER_LOOKUP)
+            start = metrics.clock()
+            try:
+                result = await get_follower_count(pool.get(cookie_file), handle)
+                metrics.observe("request_seconds", metrics.clock() - start, account=cookie_file, endpoint=USER_LOOKUP)
+                metrics.inc("requests_total", account=cookie_file, endpoint=USER_LOOKUP,
+                            outcome="ok" if result else "error")
+            except TooManyRequests as e:
+                # Not the handle's fault: put it back for whichever account has quota
+                print(f"[{pool.username(cookie_file)}] Rate limited, handing @{handle} back")
+                metrics.inc("requests_total", account=cookie_file, endpoint=USER_LOOKUP, outcome="rate_limited")
+                scheduler.mark_exhausted(cookie_file, USER_LOOKUP, e.rate_limit_reset)
+                queue.put_nowait(handle)
+                continue
+            except RecursionError:
+                print(f"[{pool.username(cookie_file)}] Recursion error on @{handle}, re-logging in...")
+                metrics.inc("requests_total", account=cookie_file, endpoint=USER_LOOKUP, outcome="error")
+                metrics.inc("rotations_total", account=cookie_file, reason="relogin")
+                result = None
+                try:
+                    await pool.login(cookie_file)
+                except Exception as e:
+                    print(f"  Re-login failed: {e}")
+
+            if result is None:
+                attempts[handle] = attempts.get(handle, 0) + 1
+                if attempts[handle] < MAX_ATTEMPTS:
+                    queue.put_nowait(handle)
+                    continue
+
+            progress["done"] += 1
+            metrics.inc("profiles_total", outcome="done" if result else "failed")
+            if result:
+                print(f"[{progress['done']}/{progress['total']}] @{handle}: {result['followers']:,} followers")
+                sink.write([result[col] for col in OUTPUT_HEADER])
+            else:
+                print(f"[{progress['done']}/{progress['total']}] @{handle}: FAILED")
+                progress["failed"].append(handle)
+        finally:
+            queue.task_done()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -1,50 +1,36 @@
-# MONKEY PATCH: Fix for twikit broken since March 18 2026
-import re
-_tx_mod = __import__('twikit.x_client_transaction.transaction', fromlist=['ClientTransaction'])
-_tx_mod.ON_DEMAND_FILE_REGEX = re.compile(
-    r""",(\d+):["']ondemand\.s["']""", flags=(re.VERBOSE | re.MULTILINE))
-_tx_mod.ON_DEMAND_HASH_PATTERN = r',{}:"([0-9a-f]+)"'
-
-async def _patched_get_indices(self, home_page_response, session, headers):
-    key_byte_indices = []
-    response = self.validate_response(home_page_response) or self.home_page_response
-    on_demand_file_index = _tx_mod.ON_DEMAND_FILE_REGEX.search(str(response)).group(1)
-    regex = re.compile(_tx_mod.ON_DEMAND_HASH_PATTERN.format(on_demand_file_index))
-    filename = regex.search(str(response)).group(1)
-    on_demand_file_url = f"https://abs.twimg.com/responsive-web/client-web/ondemand.s.{filename}a.js"
-    on_demand_file_response = await session.request(method="GET", url=on_demand_file_url, headers=headers)
-    key_byte_indices_match = _tx_mod.INDICES_REGEX.finditer(str(on_demand_file_response.text))
-    for item in key_byte_indices_match:
-        key_byte_indices.append(item.group(2))
-    if not key_byte_indices:
-        raise Exception("Couldn't get KEY_BYTE indices")
-    key_byte_indices = list(map(int, key_byte_indices))
-    return key_byte_indices[0], key_byte_indices[1:]
-
-_tx_mod.ClientTransaction.get_indices = _patched_get_indices
-# END MONKEY PATCH
-
 import asyncio
-from twikit import Client, TooManyRequests
+from twikit import TooManyRequests
 from datetime import datetime, timedelta
-import csv
-from random import randint
 import os
-from dateutil import parser as dateparser
 import pandas as pd
 from dotenv import load_dotenv
+from client_pool import ClientPool
+from checkpoint import CheckpointStore, STATUS_COMPLETE, STATUS_SENTINEL, parse_created_at
+from output_sink import OutputSink
+from rate_scheduler import QuotaScheduler, SEARCH
 load_dotenv()
 
 # === CONFIGURATION ===
-df = pd.read_csv('rescrape_handles.csv')
-SCREEN_NAMES = df['twitter'].dropna().str.strip().tolist()
-SCREEN_NAMES = [name for name in SCREEN_NAMES if name]
-
+HANDLES_CSV = 'rescrape_handles.csv'
 TARGET_TWEETS_PER_PROFILE = 30000
 END_DATE = datetime(2024, 11, 30)
 START_DATE = datetime(2023, 1, 1)
-WINDOW_DAYS = 3
+WINDOW_DAYS = 3           # first window size, before an account's tweet density is known
+MIN_WINDOW_DAYS = 1
+MAX_WINDOW_DAYS = 90
+TWEETS_PER_WINDOW = 12    # size windows so a typical one fits on a single results page
+PAGE_SIZE = 20
+FULL_PAGE = 15            # Latest search often trims a few tweets from a page that has more behind it
 COOKIES_DIR = 'cookies'
+CSV_FILE = 'tweets.csv'
+CHECKPOINT_DB = 'tweets_checkpoint.db'
+PARQUET_DIR = None  # e.g. 'tweets_parquet' to also write Parquet partitioned by account/month
+CSV_HEADER = ['Account', 'Display_Name', 'Text', 'Created_At', 'Retweets', 'Likes', 'Tweet_ID']
+RETRY_BASE_SECONDS = 60   # first backoff after a 503 / network error, doubling up to RETRY_MAX_SECONDS
+RETRY_MAX_SECONDS = 600
+NOT_FOUND_PAUSE = 3
+METRICS_FILE = 'scrape_metrics.jsonl'  # or a .prom path for a Prometheus textfile; None to disable
+METRICS_SECONDS = 60
 
 CREDENTIALS = {}
 for key, value in os.environ.items():
@@ -53,244 +39,333 @@ for key, value in os.environ.items():
         CREDENTIALS[cookie_file.strip()] = (username.strip(), email.strip(), password.strip())
 
 
+def load_screen_names(handles_csv=HANDLES_CSV):
+    df = pd.read_csv(handles_csv)
+    screen_names = df['twitter'].dropna().str.strip().tolist()
+    return [name for name in screen_names if name]
+
+
 class RotatingClient:
-    def __init__(self, cookies_dir, credentials):
-        self.cookies_dir = cookies_dir
-        self.credentials = credentials
-        self.cookie_files = sorted(credentials.keys())
+    def __init__(self, pool, cookie_files=None):
+        # Clients come from a warm ClientPool, so switching accounts is a pointer
+        # swap: no new login and no new transaction-ID bootstrap.
+        self.pool = pool
+        self.scheduler = pool.scheduler
+        self.metrics = pool.scheduler.metrics
+        self.cookie_files = cookie_files or pool.accounts()
         self.current_index = 0
-        self.client = None
-        self.rate_limits = {}
-
-    async def init(self):
-        os.makedirs(self.cookies_dir, exist_ok=True)
-        await self._load_client(self.current_index)
+        self.client = pool.get(self.cookie_files[0])
 
-    async def _load_client(self, index):
-        cookie_file = self.cookie_files[index]
-        cookie_path = os.path.join(self.cookies_dir, cookie_file)
-        creds = self.credentials[cookie_file]
-        self.client = Client(language='en-US')
-        await self.client.login(
-            auth_info_1=creds[0],
-            auth_info_2=creds[1],
-            password=creds[2],
-            cookies_file=cookie_path,
-        )
+    def _switch(self, index):
         self.current_index = index
-        print(f'{datetime.now()} - [Rotation] Loaded account: {creds[0]} ({cookie_file})')
+        self.client = self.pool.get(self.cookie_files[index])
+        cookie_file = self.cookie_files[index]
+        print(f'{datetime.now()} - [Rotation] Using account: {self.pool.username(cookie_file)} ({cookie_file})')
 
     def current_account(self):
         return self.cookie_files[self.current_index]
 
-    def mark_limited(self, reset_timestamp):
-        self.rate_limits[self.current_account()] = datetime.fromtimestamp(reset_timestamp)
-
-    def all_limited(self):
-        return len(self.rate_limits) >= len(self.cookie_files)
-
-    def earliest_reset(self):
-        return min(self.rate_limits.values())
-
-    async def handle_rate_limit(self, e):
-        self.mark_limited(e.rate_limit_reset)
-        if self.all_limited():
-            wait_until = self.earliest_reset()
-            wait_secs = (wait_until - datetime.now()).total_seconds()
-            if wait_secs > 0:
-                print(f'{datetime.now()} - All accounts exhausted. Waiting {wait_secs:.0f}s until {wait_until}...')
-                await asyncio.sleep(wait_secs)
-            expired_account = min(self.rate_limits, key=self.rate_limits.get)
-            expired_index = self.cookie_files.index(expired_account)
-            self.rate_limits.pop(expired_account)
-            await self._load_client(expired_index)
-        else:
-            next_index = (self.current_index + 1) % len(self.cookie_files)
-            while self.cookie_files[next_index] in self.rate_limits:
-                next_index = (next_index + 1) % len(self.cookie_files)
-            print(f'{datetime.now()} - [Rotation] Switching accounts...')
-            await self._load_client(next_index)
+    async def acquire(self, endpoint):
+        """Move to the account that can call `endpoint` soonest, then wait for its quota."""
+        best = self.scheduler.pick_account(self.cookie_files, endpoint)
+        if best != self.current_account() and \
+                self.scheduler.ready_in(self.current_account(), endpoint) > 0:
+            print(f'{datetime.now()} - [Rotation] Switching to {best} for {endpoint}...')
+            self.metrics.inc('rotations_total', account=self.current_account(), reason='quota')
+            self._switch(self.cookie_files.index(best))
+        await self.scheduler.acquire(self.current_account(), endpoint)
+
+    async def handle_rate_limit(self, e, endpoint):
+        # The next acquire() waits for the reset, or moves to an account with quota left.
+        self.scheduler.mark_exhausted(self.current_account(), endpoint, e.rate_limit_reset)
 
     async def rotate(self):
+        if len(self.cookie_files) == 1:
+            # Nothing to rotate to: refresh this account's client instead.
+            print(f'{datetime.now()} - [Rotation] Re-logging in due to 404...')
+            self.metrics.inc('rotations_total', account=self.current_account(), reason='relogin')
+            self.client = await self.pool.login(self.current_account())
+            return
         next_index = (self.current_index + 1) % len(self.cookie_files)
         print(f'{datetime.now()} - [Rotation] Rotating due to 404...')
-        await self._load_client(next_index)
-
-
-def load_existing(csv_file, screen_name):
-    seen_ids = set()
-    earliest_date = None
-
-    if not os.path.exists(csv_file):
-        return seen_ids, earliest_date
-
-    with open(csv_file, 'r') as file:
-        reader = csv.reader(file)
-        next(reader)
-        for row in reader:
-            if len(row) > 6 and row[0] == screen_name and row[6]:
-                seen_ids.add(row[6])
-                try:
-                    tweet_date = dateparser.parse(row[3], ignoretz=True)
-                    if earliest_date is None or tweet_date < earliest_date:
-                        earliest_date = tweet_date
-                except (ValueError, IndexError):
-                    pass
-            elif len(row) > 2 and row[0] == screen_name and row[2] == 'SENTINEL':
-                earliest_date = START_DATE
-
-    return seen_ids, earliest_date
-
-
-async def scrape_profile(rc, screen_name, csv_file):
-    seen_ids, earliest_date = load_existing(csv_file, screen_name)
-    tweet_count = len(seen_ids)
+        self.metrics.inc('rotations_total', account=self.current_account(), reason='not_found')
+        self._switch(next_index)
+
+
+def resume_frontier(covered, earliest_date):
+    """Oldest date such that [frontier, END_DATE) has been searched without gaps."""
+    frontier = END_DATE
+    windows = [(datetime.strptime(since, '%Y-%m-%d'), datetime.strptime(until, '%Y-%m-%d'))
+               for since, until in covered]
+    for since, until in sorted(windows, key=lambda w: w[1], reverse=True):
+        if since < frontier <= until:
+            frontier = since
+    if earliest_date:
+        # Rows indexed from an older tweets.csv carry no window records. Tweets
+        # are collected newest-first, so everything after the earliest one's day
+        # is done; that day itself is searched again.
+        earliest_day = datetime(earliest_date.year, earliest_date.month, earliest_date.day)
+        frontier = min(frontier, earliest_day + timedelta(days=1))
+    return max(frontier, START_DATE)
+
+
+def next_window_days(density):
+    """Window length that should hold about TWEETS_PER_WINDOW tweets at this density (tweets/day)."""
+    if density is None:
+        return WINDOW_DAYS
+    if density <= 0:
+        return MAX_WINDOW_DAYS
+    return int(min(max(TWEETS_PER_WINDOW / density, MIN_WINDOW_DAYS), MAX_WINDOW_DAYS))
+
+
+async def fetch_with_retry(rc, request, label, endpoint=SEARCH):
+    """Run one API call with the scraper's retry policy. Returns None if it was skipped after 404 x3."""
+    metrics = rc.metrics
+    retries_404 = 0
+    retry_count = 0
+    while True:
+        account = None
+        try:
+            await rc.acquire(endpoint)
+            account = rc.current_account()
+            print(f'{datetime.now()} - {label}...')
+            start = metrics.clock()
+            result = await request()
+            metrics.observe('request_seconds', metrics.clock() - start, account=account, endpoint=endpoint)
+            metrics.inc('requests_total', account=account, endpoint=endpoint, outcome='ok')
+            return result
+        except TooManyRequests as e:
+            print(f'{datetime.now()} - Rate limit hit on {rc.current_account()}')
+            metrics.inc('requests_total', account=rc.current_account(), endpoint=endpoint, outcome='rate_limited')
+            await rc.handle_rate_limit(e, endpoint)
+            retry_count = 0
+        except Exception as e:
+            account = account or rc.current_account()
+            if '404' in str(e):
+                metrics.inc('requests_total', account=account, endpoint=endpoint, outcome='not_found')
+                retries_404 += 1
+                if retries_404 >= 3:
+                    print(f'{datetime.now()} - 404 x3, skipping.')
+                    return None
+                print(f'{datetime.now()} - 404 error, rotating and retrying ({retries_404}/3)...')
+                metrics.observe('backoff_seconds', NOT_FOUND_PAUSE, account=account, reason='not_found pause')
+                await asyncio.sleep(NOT_FOUND_PAUSE)
+                await rc.rotate()
+            else:
+                # 503, wifi drop, any other error — retry indefinitely with backoff
+                metrics.inc('requests_total', account=account, endpoint=endpoint, outcome='error')
+                retry_count += 1
+                wait = min(RETRY_BASE_SECONDS * (2 ** min(retry_count - 1, 4)), RETRY_MAX_SECONDS)
+                print(f'{datetime.now()} - Error: {e}. Retrying in {wait}s... (attempt {retry_count})')
+                metrics.observe('backoff_seconds', wait, account=account, reason='error retry')
+                await asyncio.sleep(wait)
+
+
+async def scrape_profile(rc, screen_name, sink, store):
+    tweet_count = store.tweet_count(screen_name)
+    earliest_date = store.earliest_date(screen_name)
+    if store.status(screen_name) == STATUS_SENTINEL:
+        earliest_date = START_DATE
+    elif earliest_date:
+        earliest_date = datetime.fromisoformat(earliest_date)
 
     print(f'\n{"="*60}')
-    print(f'  @{screen_name} - {tweet_count} existing tweets')
+    print(f'  @{screen_name} - {tweet_count} existing tweets ({rc.current_account()})')
     if earliest_date:
         print(f'  Earliest tweet: {earliest_date.strftime("%Y-%m-%d")}')
     print(f'{"="*60}')
 
-    windows = []
-    current_end = END_DATE
-    while current_end > START_DATE:
-        current_start = current_end - timedelta(days=WINDOW_DAYS)
-        if current_start < START_DATE:
-            current_start = START_DATE
-        windows.append((current_start, current_end))
-        current_end = current_start
+    # Windows are sized on the fly from the account's tweet density: quiet
+    # stretches get wide windows, busy ones get narrow windows plus cursor
+    # pagination, so request count follows tweet volume rather than the calendar.
+    window_end = resume_frontier(store.covered_windows(screen_name), earliest_date)
+    if window_end < END_DATE:
+        print(f'  Already covered back to {window_end.strftime("%Y-%m-%d")}')
 
-    if earliest_date:
-        skip_count = 0
-        for i, (ws, we) in enumerate(windows):
-            if we <= earliest_date:
-                break
-            skip_count += 1
-        else:
-            skip_count = len(windows)
-        if skip_count > 0:
-            print(f'  Skipping {skip_count} already-covered windows')
-            windows = windows[max(skip_count - 1, 0):]
+    density = None
+    covered_days = (END_DATE - window_end).days
+    if tweet_count and covered_days > 0:
+        density = tweet_count / covered_days
 
     new_tweets = 0
     duplicates = 0
+    requests = 0
 
-    for window_start, window_end in windows:
+    while window_end > START_DATE:
+        window_start = max(window_end - timedelta(days=next_window_days(density)), START_DATE)
         since_str = window_start.strftime('%Y-%m-%d')
         until_str = window_end.strftime('%Y-%m-%d')
         query = f'from:{screen_name} until:{until_str} since:{since_str}'
 
         print(f'\n{datetime.now()} - === @{screen_name}: {since_str} to {until_str} ===')
 
-        tweets = None
-        retries_404 = 0
-        retry_count = 0
-        while True:
-            try:
-                print(f'{datetime.now()} - Searching...')
-                tweets = await rc.client.search_tweet(query, product='Latest')
-                break
-            except TooManyRequests as e:
-                print(f'{datetime.now()} - Rate limit hit on {rc.current_account()}')
-                await rc.handle_rate_limit(e)
-                retry_count = 0
-            except Exception as e:
-                if '404' in str(e):
-                    retries_404 += 1
-                    if retries_404 >= 3:
-                        print(f'{datetime.now()} - 404 x3, skipping window.')
-                        break
-                    print(f'{datetime.now()} - 404 error, rotating and retrying ({retries_404}/3)...')
-                    await asyncio.sleep(3)
-                    await rc.rotate()
-                else:
-                    # 503, wifi drop, any other error — retry indefinitely with backoff
-                    retry_count += 1
-                    wait = min(60 * (2 ** min(retry_count - 1, 4)), 600)
-                    print(f'{datetime.now()} - Error: {e}. Retrying in {wait}s... (attempt {retry_count})')
-                    await asyncio.sleep(wait)
-
-        if not tweets:
-            print(f'{datetime.now()} - No more tweets in this window')
-        else:
-            for tweet in tweets:
-                if tweet.id in seen_ids:
+        page = await fetch_with_retry(
+            rc, lambda: rc.client.search_tweet(query, product='Latest', count=PAGE_SIZE), 'Searching')
+        requests += 1
+        complete = page is not None
+        window_tweets = 0
+
+        while page:
+            rc.metrics.observe('tweets_per_request', len(page), account=rc.current_account())
+            for tweet in page:
+                window_tweets += 1
+                if not store.add_tweet(screen_name, tweet.id, tweet.created_at):
                     duplicates += 1
+                    rc.metrics.inc('tweets_total', account=rc.current_account(), kind='duplicate')
                     continue
-                seen_ids.add(tweet.id)
+                rc.metrics.inc('tweets_total', account=rc.current_account(), kind='new')
                 tweet_count += 1
                 new_tweets += 1
                 tweet_data = [screen_name, tweet.user.name, tweet.text, tweet.created_at,
                               tweet.retweet_count, tweet.favorite_count, tweet.id]
-                with open(csv_file, 'a', newline='') as file:
-                    writer = csv.writer(file)
-                    writer.writerow(tweet_data)
+                sink.write(tweet_data)
             print(f'{datetime.now()} - Total: {tweet_count} ({new_tweets} new, {duplicates} dupes)')
 
+            if len(page) < FULL_PAGE or tweet_count >= TARGET_TWEETS_PER_PROFILE:
+                break
+            page = await fetch_with_retry(rc, page.next, 'Next page')
+            requests += 1
+            if page is None:
+                complete = False
+
+        if window_tweets == 0:
+            print(f'{datetime.now()} - No more tweets in this window')
+        if complete:
+            store.mark_window(screen_name, since_str, until_str)
+
+        if complete or window_tweets:
+            span_days = max((window_end - window_start).days, 1)
+            observed = window_tweets / span_days
+            density = observed if density is None else (density + observed) / 2
+        window_end = window_start
+
         if tweet_count >= TARGET_TWEETS_PER_PROFILE:
             print(f'{datetime.now()} - Reached target!')
             break
 
-        wait_time = randint(5, 8)
-        print(f'{datetime.now()} - Pausing {wait_time}s before next window...')
-        await asyncio.sleep(wait_time)
+        if window_end > START_DATE:
+            print(f'{datetime.now()} - Next window {next_window_days(density)}d')
 
     if new_tweets == 0 and tweet_count == 0:
-        with open(csv_file, 'a', newline='') as file:
-            writer = csv.writer(file)
-            writer.writerow([screen_name, '', 'SENTINEL', START_DATE.strftime('%Y-%m-%d'), 0, 0, ''])
+        sink.write([screen_name, '', 'SENTINEL', START_DATE.strftime('%Y-%m-%d'), 0, 0, ''])
+        store.set_status(screen_name, STATUS_SENTINEL)
 
-    print(f'\n{datetime.now()} - @{screen_name} done! {tweet_count} total ({new_tweets} new, {duplicates} dupes)')
+    print(f'\n{datetime.now()} - @{screen_name} done! {tweet_count} total '
+          f'({new_tweets} new, {duplicates} dupes, {requests} requests)')
     return tweet_count, new_tweets
 
 
-async def main():
-    rc = RotatingClient(cookies_dir=COOKIES_DIR, credentials=CREDENTIALS)
-    await rc.init()
-
-    csv_file = 'tweets.csv'
-
-    if not os.path.exists(csv_file):
-        with open(csv_file, 'w', newline='') as file:
-            writer = csv.writer(file)
-            writer.writerow(['Account', 'Display_Name', 'Text', 'Created_At',
-                             'Retweets', 'Likes', 'Tweet_ID'])
-
-    # Resume from last profile in CSV
-    last_profile = None
-    if os.path.exists(csv_file):
-        with open(csv_file, 'r') as f:
-            reader = csv.reader(f)
-            next(reader)
-            for row in reader:
-                if row and row[0]:
-                    last_profile = row[0]
-
-    screen_names_to_run = SCREEN_NAMES
-    if last_profile and last_profile in SCREEN_NAMES:
-        start_index = SCREEN_NAMES.index(last_profile)
-        print(f'{datetime.now()} - Resuming from @{last_profile} (index {start_index})')
-        screen_names_to_run = SCREEN_NAMES[start_index:]
-
+async def login_accounts(cookies_dir, credentials, scheduler, client_factory=None):
+    """One single-account RotatingClient per account that logs in, all backed by one warm pool."""
+    pool = ClientPool(cookies_dir, credentials, scheduler=scheduler, client_factory=client_factory)
+    await pool.login_all()
+    return [RotatingClient(pool, [cookie_file]) for cookie_file in pool.accounts()]
+
+
+async def worker(rc, queue, sink, store, results):
+    # Each worker owns one account and pulls profiles until the queue is drained.
+    # Workers share one sink and one store; the store only commits when the sink
+    # flushes, so a commit never covers a tweet whose row isn't in the CSV yet.
+    while True:
+        try:
+            screen_name = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+
+        try:
+            total, new = await scrape_profile(rc, screen_name, sink, store)
+        except Exception as e:
+            print(f'{datetime.now()} - [{rc.current_account()}] @{screen_name} failed: {e}. '
+                  f'Left incomplete for the next run.')
+            rc.metrics.inc('profiles_total', outcome='failed')
+            continue
+        rc.metrics.inc('profiles_total', outcome='done')
+        results[screen_name] = (total, new)
+        if store.status(screen_name) != STATUS_SENTINEL:
+            store.set_status(screen_name, STATUS_COMPLETE)
+        sink.flush()
+
+
+def tweet_partition(record):
+    created_at = parse_created_at(str(record['Created_At'])) or ''
+    return {'account': record['Account'], 'month': created_at[:7] or 'unknown'}
+
+
+async def scrape_all(screen_names, clients, csv_file=CSV_FILE, checkpoint_db=CHECKPOINT_DB,
+                     parquet_dir=PARQUET_DIR, metrics_file=METRICS_FILE):
+    """Resume from the checkpoint store and scrape every unfinished profile with `clients`."""
+    store = CheckpointStore(checkpoint_db)
+    sink = OutputSink(csv_file, CSV_HEADER, parquet_dir=parquet_dir, partition_by=tweet_partition,
+                      on_flush=lambda: store.commit(csv_file))
+    fresh = store.csv_offset() == 0
+    ingested = store.sync_from_csv(csv_file)
+    if ingested:
+        print(f'{datetime.now()} - Indexed {ingested} CSV rows into {checkpoint_db}')
+
+    # A store built from a CSV written by the old sequential scraper has no
+    # completion records: everything before the last profile in the CSV is done.
+    if fresh:
+        last_profile = store.last_profile()
+        if last_profile and last_profile in screen_names:
+            start_index = screen_names.index(last_profile)
+            print(f'{datetime.now()} - Resuming from @{last_profile} (index {start_index})')
+            for name in screen_names[:start_index]:
+                if store.status(name) is None:
+                    store.set_status(name, STATUS_COMPLETE)
+            store.commit(csv_file)
+
+    completed = store.completed_profiles()
+    screen_names_to_run = [name for name in screen_names if name not in completed]
     print(f'{datetime.now()} - Scraping {len(screen_names_to_run)} profiles: {", ".join(screen_names_to_run)}')
+    print(f'{datetime.now()} - Starting {len(clients)} workers')
 
-    results = {}
+    queue = asyncio.Queue()
     for screen_name in screen_names_to_run:
-        total, new = await scrape_profile(rc, screen_name, csv_file)
-        results[screen_name] = (total, new)
+        queue.put_nowait(screen_name)
+
+    results = {}
+    metrics = clients[0].metrics
+    flusher = asyncio.create_task(sink.flush_periodically())
+    exporter = asyncio.create_task(metrics.export_periodically(metrics_file, METRICS_SECONDS)) if metrics_file else None
+    try:
+        await asyncio.gather(*(worker(rc, queue, sink, store, results) for rc in clients))
+    finally:
+        # Runs on normal exit, Ctrl-C and crashes: buffered rows reach the CSV
+        # and the store commits with them.
+        flusher.cancel()
+        sink.close()
+        store.close()
+        if exporter:
+            exporter.cancel()
+            metrics.export(metrics_file)
+    return screen_names_to_run, results
+
 
-        if screen_name != screen_names_to_run[-1]:
-            wait_time = randint(15, 30)
-            print(f'\n{datetime.now()} - Pausing {wait_time}s before next profile...')
-            await asyncio.sleep(wait_time)
+async def main():
+    screen_names = load_screen_names()
+
+    # One scheduler across all workers: it paces each account against its own
+    # quota and replaces the fixed sleeps between pages, windows and profiles.
+    scheduler = QuotaScheduler()
+    clients = await login_accounts(COOKIES_DIR, CREDENTIALS, scheduler)
+    if not clients:
+        print(f'{datetime.now()} - No accounts logged in. Check ACCOUNT_* in .env.')
+        return
+
+    screen_names_to_run, results = await scrape_all(screen_names, clients)
 
     print(f'\n{"="*60}')
     print(f'  SUMMARY')
     print(f'{"="*60}')
-    for name, (total, new) in results.items():
-        print(f'  @{name}: {total} total tweets ({new} new this run)')
+    for name in screen_names_to_run:
+        if name in results:
+            total, new = results[name]
+            print(f'  @{name}: {total} total tweets ({new} new this run)')
+        else:
+            print(f'  @{name}: incomplete')
     print(f'{"="*60}')
+    scheduler.print_summary()
+    scheduler.metrics.print_summary()
 
-
-asyncio.run(main())
\ No newline at end of file
+if __name__ == '__main__':
+    asyncio.run(main())
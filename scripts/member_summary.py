@@ -0,0 +1,173 @@
+"""
+Streaming per-member sentiment summary (notebook 03's user_summary).
+
+Notebook 03 builds user_summary with one groupby().agg() over the whole
+enriched frame, and its pct_negative / pct_positive / pct_extreme lambdas run
+once per member in Python. MemberSummary keeps mergeable partial statistics
+per member instead:
+
+  - rows, and the count, Welford mean and sum of squared deviations (M2) of
+    sentiment_score
+  - counts of sentiment_score < 0, > 0 and |x| > EXTREME
+  - count and sum of each emotion score
+  - how many rows each emotion is the top score of (dominant emotion)
+
+add(chunk) folds a chunk of tweets in with np.bincount over the members' codes, and
+merge(other) combines two partials (Chan et al.'s parallel update for the mean
+and M2), so chunks of one file, or partials built in separate processes and
+pickled back, give the same result. Memory is one row per member whatever the
+number of tweets.
+
+result() returns the user_summary columns with the same groupby semantics:
+rows with a missing key are dropped, the means and std skip missing values,
+and the pct_* shares are over all of a member's rows. Values match the
+in-memory groupby up to float rounding. result(dominant=True) adds the
+pct_<emotion>_dominant shares notebook 04 computes and members.json carries.
+
+Usage:
+    python member_summary.py data/processed/house_tweets_enriched.csv --output user_sentiment_summary.csv
+    python member_summary.py data/processed/house_tweets_enriched.parquet --dominant
+
+From a notebook, with the tweets already loaded:
+    user_summary = MemberSummary().add(tweets).result()
+"""
+
+import argparse
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+KEYS = ["handle", "official_full", "quartile", "party_code", "pct_small_donors"]
+SCORE = "sentiment_score"
+EXTREME = 0.8
+EMOTIONS = ["anger", "fear", "joy", "disgust", "sadness", "surprise", "neutral"]
+SUMMARY_EMOTIONS = ["anger", "fear", "joy", "disgust", "sadness"]     # avg_<emotion> columns
+DOMINANT_EMOTIONS = ["anger", "joy", "disgust", "fear", "neutral"]   # pct_<emotion>_dominant columns
+COUNT_COLUMNS = ["rows", "n", "negative", "positive", "extreme"] + \
+    [f"{e}_n" for e in EMOTIONS] + [f"{e}_sum" for e in EMOTIONS] + [f"{e}_dominant" for e in EMOTIONS]
+CHUNK_SIZE = 250_000
+
+
+class MemberSummary:
+    """Mergeable per-member partials; `parts` has one row per key, indexed by keys."""
+
+    def __init__(self, keys=KEYS):
+        self.keys = list(keys)
+        self.parts = None
+
+    def add(self, tweets):
+        """Fold a chunk of tweets (any frame with the key, score and emotion columns) in. Returns self."""
+        tweets = tweets.dropna(subset=self.keys)
+        codes, index = pd.MultiIndex.from_frame(tweets[self.keys]).factorize()
+        index.names = self.keys
+        k = len(index)
+
+        def total(weights=None):
+            return np.bincount(codes, weights=weights, minlength=k)
+
+        score = pd.to_numeric(tweets[SCORE], errors="coerce").to_numpy(dtype=float)
+        scored = ~np.isnan(score)
+        part = {"rows": total(), "n": total(scored), "negative": total(score < 0),
+                "positive": total(score > 0), "extreme": total(np.abs(score) > EXTREME)}
+        with np.errstate(invalid="ignore", divide="ignore"):
+            part["mean"] = np.where(part["n"] > 0, total(np.where(scored, score, 0.0)) / part["n"], 0.0)
+        # Within-chunk M2 around the chunk's own member means
+        part["m2"] = total(np.where(scored, score - part["mean"][codes], 0.0) ** 2)
+
+        emotions = tweets[EMOTIONS].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+        for j, e in enumerate(EMOTIONS):
+            part[f"{e}_n"] = total(~np.isnan(emotions[:, j]))
+            part[f"{e}_sum"] = total(np.nan_to_num(emotions[:, j]))
+        # idxmax(axis=1) without the per-row Python call; rows with no scores have no dominant emotion
+        top = np.where(np.isnan(emotions).all(axis=1), -1, np.nan_to_num(emotions, nan=-np.inf).argmax(axis=1))
+        dominant = np.bincount(codes * (len(EMOTIONS) + 1) + top + 1,
+                               minlength=k * (len(EMOTIONS) + 1)).reshape(k, -1)
+        for j, e in enumerate(EMOTIONS):
+            part[f"{e}_dominant"] = dominant[:, j + 1]
+        return self.merge(pd.DataFrame(part, index=index)[COUNT_COLUMNS + ["mean", "m2"]])
+
+    def merge(self, other):
+        """Combine another MemberSummary (or its parts) into this one. Returns self."""
+        other = other.parts if isinstance(other, MemberSummary) else other
+        if other is None or not len(other):
+            return self
+        if self.parts is None:
+            self.parts = other.copy()
+            return self
+
+        index = self.parts.index.union(other.index)
+        a = self.parts.reindex(index, fill_value=0)
+        b = other.reindex(index, fill_value=0)
+        merged = a[COUNT_COLUMNS] + b[COUNT_COLUMNS]
+        n = merged["n"].to_numpy(dtype=float)
+        delta = (b["mean"] - a["mean"]).to_numpy()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            weight = np.where(n > 0, b["n"].to_numpy() / n, 0.0)
+            merged["mean"] = a["mean"].to_numpy() + delta * weight
+            merged["m2"] = a["m2"].to_numpy() + b["m2"].to_numpy() + delta ** 2 * a["n"].to_numpy() * weight
+        self.parts = merged
+        return self
+
+    def result(self, dominant=False, sort=True):
+        """The user_summary frame (plus pct_<emotion>_dominant with dominant=True)."""
+        p = self.parts if self.parts is not None else pd.DataFrame(
+            0, index=pd.MultiIndex.from_tuples([], names=self.keys), columns=COUNT_COLUMNS + ["mean", "m2"])
+        p = p.sort_index()   # groupby's key order
+        n, rows = p["n"], p["rows"]
+        out = pd.DataFrame({
+            "tweet_count":   n.astype("int64"),
+            "avg_sentiment": p["mean"].where(n > 0),
+            "sentiment_std": np.sqrt(p["m2"].clip(lower=0) / (n - 1)).where(n > 1),
+            "pct_negative":  p["negative"] / rows,
+            "pct_positive":  p["positive"] / rows,
+            "pct_extreme":   p["extreme"] / rows,
+        }, index=p.index)
+        for e in SUMMARY_EMOTIONS:
+            out[f"avg_{e}"] = (p[f"{e}_sum"] / p[f"{e}_n"]).where(p[f"{e}_n"] > 0)
+        if dominant:
+            for e in DOMINANT_EMOTIONS:
+                out[f"pct_{e}_dominant"] = p[f"{e}_dominant"] / rows
+        out = out.reset_index()
+        return out.sort_values(["quartile", "avg_sentiment"]) if sort and "quartile" in self.keys else out
+
+
+def read_chunks(path, columns, chunk_size=CHUNK_SIZE):
+    """Chunks of the needed columns from the enriched CSV or its Parquet copy (enriched_store.py)."""
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(columns=columns, batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunk_size, low_memory=False)
+
+
+def summarise(path, keys=KEYS, chunk_size=CHUNK_SIZE):
+    """MemberSummary of a whole enriched tweets file, read chunk_size rows at a time."""
+    summary = MemberSummary(keys)
+    for chunk in read_chunks(path, list(keys) + [SCORE] + EMOTIONS, chunk_size):
+        summary.add(chunk)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-member sentiment summary of the enriched tweets, in chunks.")
+    parser.add_argument("input", help="house_tweets_enriched.csv or .parquet")
+    parser.add_argument("--output", help="CSV to write (default: user_sentiment_summary.csv next to the input)")
+    parser.add_argument("--keys", nargs="+", default=KEYS, help="group-by columns")
+    parser.add_argument("--dominant", action="store_true", help="add pct_<emotion>_dominant columns")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+    output = args.output or os.path.join(os.path.dirname(args.input), "user_sentiment_summary.csv")
+
+    print(f"{datetime.now()} - Summarising {args.input}...")
+    summary = summarise(args.input, args.keys, args.chunk_size).result(dominant=args.dominant)
+    summary.to_csv(output, index=False)
+    print(f"{datetime.now()} - Saved → {output}  ({len(summary)} members, "
+          f"{summary['tweet_count'].sum():,} scored tweets)")
+
+
+if __name__ == "__main__":
+    main()
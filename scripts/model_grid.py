@@ -0,0 +1,215 @@
+"""
+Batched OLS for the specification grids in notebooks/04_feature_engineering_modeling.ipynb.
+
+The notebook fits one statsmodels formula at a time: one per threshold year
+in the DiD sensitivity sweep, one per variant (binary / quartiles / eighths),
+and one per KFold split. This module fits a whole grid at once, i.e. predictor
+sets x threshold years x resampling draws:
+
+  - each (spec, threshold) builds its patsy design matrix once, with the same
+    column names and NA handling as smf.ols
+  - bootstrap draws are per-row weights on that shared design, so all draws are
+    solved together as one stack of k x k normal equations. Pass cluster=... to
+    resample whole members rather than member-years
+  - permutation draws shuffle the response, so every draw reuses one
+    pseudo-inverse of the design
+  - (spec, threshold) tasks are spread over a process pool. Each task gets its
+    own child of np.random.SeedSequence(seed), so results don't depend on the
+    number of workers
+
+Point estimates, standard errors, p-values and R² match smf.ols(...).fit() to
+float rounding.
+
+Usage from the notebook:
+
+    import sys; sys.path.insert(0, "../scripts")
+    from model_grid import run_grid
+    specs = [{"name": "binary", "formula": "pct ~ high_virality + post + high_virality:post + C(party_code)"}]
+    grid = run_grid(panel, specs, thresholds=range(2010, 2024, 2), draws=2000,
+                    cluster="handle_lower", seed=42, workers=8)
+"""
+
+import multiprocessing
+import os
+
+import numpy as np
+import pandas as pd
+import patsy
+from scipy import stats
+
+YEAR_COL = "year"
+POST_COL = "post"
+CHUNK_DRAWS = 500  # draws solved per stacked call; bounds the (draws x rows) residual matrix
+
+
+# ── Stacked least squares ───────────────────────────────────────────────────
+
+def stacked_ols(X, y, weights=None, inference=True):
+    """
+    OLS on one shared design X (n x k) for a stack of problems.
+
+    y is (n,) or (B, n). weights, if given, is (B, n) and applies per problem:
+    those are solved together as a batch of k x k normal equations, while
+    unweighted problems share a single pseudo-inverse of X. Returns a dict of
+    arrays with a leading problem axis: params, and unless inference=False also
+    bse, pvalues, rsquared, ssr, nobs, df_resid.
+    """
+    X = np.asarray(X, dtype=float)
+    Y = np.atleast_2d(np.asarray(y, dtype=float))
+    n, k = X.shape
+
+    if weights is None:
+        W = np.ones((1, n))
+        pinv = np.linalg.pinv(X)
+        params = Y @ pinv.T
+        cov = np.broadcast_to(pinv @ pinv.T, (len(Y), k, k))
+    else:
+        W = np.asarray(weights, dtype=float)
+        Y = np.broadcast_to(Y, W.shape)
+        xtx = (W @ (X[:, :, None] * X[:, None, :]).reshape(n, k * k)).reshape(-1, k, k)
+        xty = (W * Y) @ X
+        try:
+            cov = np.linalg.inv(xtx)
+        except np.linalg.LinAlgError:
+            cov = np.linalg.pinv(xtx)  # some draw left a dummy column empty
+        params = np.einsum("bij,bj->bi", cov, xty)
+    if not inference:
+        return {"params": params}
+
+    resid = Y - params @ X.T
+    ssr = (W * resid ** 2).sum(axis=1)
+    nobs = np.broadcast_to(W.sum(axis=1), ssr.shape)
+    y_bar = (W * Y).sum(axis=1) / nobs
+    tss = (W * (Y - y_bar[:, None]) ** 2).sum(axis=1)
+    df_resid = nobs - np.linalg.matrix_rank(X)
+
+    bse = np.sqrt(np.diagonal(cov, axis1=1, axis2=2) * (ssr / df_resid)[:, None])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        tvalues = params / bse
+    pvalues = 2 * stats.t.sf(np.abs(tvalues), df_resid[:, None])
+    return {"params": params, "bse": bse, "pvalues": pvalues, "rsquared": 1 - ssr / tss,
+            "ssr": ssr, "nobs": nobs, "df_resid": df_resid}
+
+
+def design(formula, data):
+    """(y, X, column names, rows used) for an smf.ols formula; rows with NA in any formula variable are dropped."""
+    y, X = patsy.dmatrices(formula, data, return_type="dataframe", NA_action="drop")
+    return y.iloc[:, 0].to_numpy(), X.to_numpy(), list(X.columns), X.index
+
+
+def bootstrap_weights(n, draws, rng, clusters=None):
+    """Resampling weights (draws x n): how often each row, or each row's cluster, was drawn."""
+    codes = np.arange(n) if clusters is None else pd.factorize(np.asarray(clusters), use_na_sentinel=False)[0]
+    groups = codes.max() + 1
+    picks = rng.integers(0, groups, size=(draws, groups)) + groups * np.arange(draws)[:, None]
+    counts = np.bincount(picks.ravel(), minlength=draws * groups).reshape(draws, groups)
+    return counts[:, codes].astype(float)
+
+
+def kfold_r2(X, y, n_splits=5, seed=42):
+    """
+    Out-of-fold R² per fold for a linear model with intercept. Folds are the
+    ones KFold(n_splits, shuffle=True, random_state=seed) makes, so this is
+    cross_val_score(LinearRegression(), X, y, cv=..., scoring="r2").
+    """
+    X = np.column_stack([np.ones(len(X)), np.asarray(X, dtype=float)])
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+
+    order = np.arange(n)
+    np.random.RandomState(seed).shuffle(order)
+    sizes = np.full(n_splits, n // n_splits)
+    sizes[:n % n_splits] += 1
+    fold = np.empty(n, dtype=int)
+    fold[order] = np.repeat(np.arange(n_splits), sizes)
+
+    train = (fold[None, :] != np.arange(n_splits)[:, None]).astype(float)
+    params = stacked_ols(X, y, weights=train, inference=False)["params"]
+    scores = []
+    for i in range(n_splits):
+        test = fold == i
+        pred = X[test] @ params[i]
+        scores.append(1 - ((y[test] - pred) ** 2).sum() / ((y[test] - y[test].mean()) ** 2).sum())
+    return np.array(scores)
+
+
+# ── One grid cell ───────────────────────────────────────────────────────────
+
+def fit_spec(data, spec, threshold=None, draws=0, method="bootstrap", cluster=None, seed=None):
+    """
+    Fit one spec (dict: name, formula, optional query) at one threshold year,
+    plus draws resampled fits. Returns one row per coefficient.
+    """
+    if spec.get("query"):
+        data = data.query(spec["query"])
+    if threshold is not None:
+        data = data.assign(**{POST_COL: (data[YEAR_COL] >= threshold).astype(int)})
+    y, X, names, rows = design(spec["formula"], data)
+    fit = stacked_ols(X, y)
+
+    result = pd.DataFrame({
+        "spec": spec["name"], "threshold": threshold, "term": names,
+        "beta": fit["params"][0], "se": fit["bse"][0], "p": fit["pvalues"][0],
+        "r2": fit["rsquared"][0], "nobs": int(fit["nobs"][0]),
+    })
+    if not draws:
+        return result
+
+    rng = np.random.default_rng(seed)
+    clusters = None if cluster is None else data.loc[rows, cluster]
+    samples = []
+    for start in range(0, draws, CHUNK_DRAWS):
+        b = min(CHUNK_DRAWS, draws - start)
+        if method == "bootstrap":
+            weights = bootstrap_weights(len(y), b, rng, clusters)
+            samples.append(stacked_ols(X, y, weights=weights, inference=False)["params"])
+        elif method == "permutation":
+            perms = rng.permuted(np.tile(np.arange(len(y)), (b, 1)), axis=1)
+            samples.append(stacked_ols(X, y[perms], inference=False)["params"])
+        else:
+            raise ValueError(f"unknown method {method!r} (bootstrap or permutation)")
+    samples = np.vstack(samples)
+
+    if method == "bootstrap":
+        result["boot_se"] = samples.std(axis=0, ddof=1)
+        result["ci_low"], result["ci_high"] = np.percentile(samples, [2.5, 97.5], axis=0)
+    else:
+        extreme = (np.abs(samples) >= np.abs(fit["params"][0])).sum(axis=0)
+        result["p_perm"] = (extreme + 1) / (draws + 1)
+    return result
+
+
+# ── Grid over a process pool ────────────────────────────────────────────────
+
+_worker = {}
+
+
+def init_worker(data):
+    _worker["data"] = data
+
+
+def _run_task(task):
+    spec, threshold, draws, method, cluster, seed = task
+    return fit_spec(_worker["data"], spec, threshold, draws, method, cluster, seed)
+
+
+def run_grid(data, specs, thresholds=(None,), draws=0, method="bootstrap", cluster=None, seed=0, workers=None):
+    """
+    Every spec at every threshold year, each with draws bootstrap or
+    permutation replicates. Returns one row per (spec, threshold, term).
+    workers=1 runs in this process.
+    """
+    thresholds = list(thresholds) or [None]
+    cells = [(spec, t) for spec in specs for t in thresholds]
+    seeds = np.random.SeedSequence(seed).spawn(len(cells))
+    tasks = [(spec, t, draws, method, cluster, s) for (spec, t), s in zip(cells, seeds)]
+
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if workers <= 1:
+        init_worker(data)
+        results = [_run_task(task) for task in tasks]
+    else:
+        # spawn, not fork: matches score_engine.py and keeps BLAS thread pools sane
+        with multiprocessing.get_context("spawn").Pool(workers, initializer=init_worker, initargs=(data,)) as pool:
+            results = pool.map(_run_task, tasks)
+    return pd.concat(results, ignore_index=True)
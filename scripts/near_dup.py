@@ -0,0 +1,245 @@
+"""
+MinHash / LSH near-duplicate clusters over preprocessed tweet text.
+
+Congressional accounts post many near-identical tweets: templated statements,
+the same press release with a different link, copy-paste threads. After
+notebook 03's preprocess() (mentions -> @user, URLs -> http) these are
+almost exact repeats. This module groups them:
+
+  - each text becomes a set of word SHINGLE-grams (lowercased, with the
+    preprocess() token mapping applied so raw Text works too), hashed to
+    64 bits with pandas' vectorised hashing
+  - a NUM_PERM-value MinHash signature per text, computed for blocks of texts
+    at once with multiply-shift hashes (no Python loop per text)
+  - LSH: the signature is cut into BANDS bands; texts sharing any band are
+    candidate pairs. Each candidate pair is kept only if the signatures agree
+    on at least `threshold` of their values (estimated Jaccard similarity)
+  - clusters are the connected components of the kept pairs. A cluster is
+    identified by its representative, the first text in it
+
+`similarity` is each text's estimated Jaccard similarity to its
+representative (1.0 for representatives). score_tweets.py --near-dup uses it
+to score one representative per cluster and give its scores to every member
+within the bound; the dashboard uses the cluster id to skip repeats in each
+member's tweet sample.
+
+Usage:
+    python near_dup.py tweets_filtered.csv                  # cluster stats
+    python near_dup.py tweets_filtered.csv --threshold 0.9  # tighter clusters
+"""
+
+import argparse
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+NUM_PERM = 64
+BANDS = 16            # 4 rows per band: pairs at Jaccard 0.8 become candidates ~99.99% of the time
+SHINGLE = 3           # words per shingle
+CLUSTER_THRESHOLD = 0.8
+SEED = 1
+BLOCK_SHINGLES = 1 << 15   # shingles hashed per block; bounds the (shingles x NUM_PERM) matrix
+BAND_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+# ── Shingles and signatures ─────────────────────────────────────────────────
+
+def shingle_hashes(texts, shingle=SHINGLE):
+    """
+    (hashes, counts): 64-bit hashes of every text's word shingles, concatenated
+    in text order, and the number of shingles per text. Texts shorter than
+    `shingle` words are one shingle; empty texts have none.
+    """
+    words = pd.Series(texts, dtype=object).fillna("").astype(str).str.lower().str.split()
+    lengths = words.str.len().to_numpy()
+    flat = words.explode().dropna()
+    flat = flat.mask(flat.str.startswith("@") & (flat.str.len() > 1), "@user")
+    flat = flat.mask(flat.str.startswith("http"), "http")
+    tokens = pd.util.hash_array(flat.to_numpy(dtype=object))
+
+    # Roll each token forward into the shingle that starts at it, without crossing into the next text
+    ends = np.repeat(np.cumsum(lengths), lengths)
+    starts = ends - np.repeat(lengths, lengths)
+    pos = np.arange(len(tokens))
+    hashes = tokens.copy()
+    for j in range(1, shingle):
+        more = pos + j < ends
+        hashes[more] = hashes[more] * BAND_MIX + tokens[pos[more] + j]
+
+    counts = np.where(lengths > 0, np.maximum(lengths - shingle + 1, 1), 0)
+    return hashes[pos - starts < np.repeat(counts, lengths)], counts
+
+
+def minhash(hashes, counts, num_perm=NUM_PERM, seed=SEED):
+    """(texts x num_perm) uint32 signatures; rows for texts without shingles are all 0xFFFFFFFF."""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 2 ** 63, num_perm, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 2 ** 63, num_perm, dtype=np.uint64)
+
+    sig = np.full((len(counts), num_perm), np.iinfo(np.uint32).max, dtype=np.uint32)
+    has = np.flatnonzero(counts)
+    offsets = np.r_[0, np.cumsum(counts[has])]
+    # Blocks of whole texts, each with about BLOCK_SHINGLES shingles
+    cuts = np.unique(np.r_[np.searchsorted(offsets, np.arange(0, offsets[-1], BLOCK_SHINGLES)), len(has)])
+    for lo, hi in zip(cuts[:-1], cuts[1:]):
+        block = hashes[offsets[lo]:offsets[hi], None]
+        values = ((block * a + b) >> np.uint64(32)).astype(np.uint32)
+        sig[has[lo:hi]] = np.minimum.reduceat(values, offsets[lo:hi] - offsets[lo], axis=0)
+    return sig
+
+
+# ── Clusters ────────────────────────────────────────────────────────────────
+
+def candidate_pairs(sig, bands=BANDS, groups=None):
+    """Pairs of rows that agree on a whole band; with groups, only pairs within a group."""
+    rows = sig.shape[1] // bands
+    pairs = []
+    for band in range(bands):
+        key = np.zeros(len(sig), dtype=np.uint64) if groups is None else np.asarray(groups, dtype=np.uint64)
+        for col in sig[:, band * rows:(band + 1) * rows].T:
+            key = key * BAND_MIX + col
+        order = np.argsort(key, kind="stable")
+        same = np.flatnonzero(key[order][1:] == key[order][:-1])
+        # Each row is paired with the row before it and with the first row of its bucket
+        first = np.maximum.accumulate(np.where(np.r_[True, key[order][1:] != key[order][:-1]], np.arange(len(order)), 0))
+        pairs += [np.column_stack([order[same + 1], order[same]]),
+                  np.column_stack([order[same + 1], order[first[same + 1]]])]
+    if not pairs:
+        return np.empty((0, 2), dtype=np.intp)
+    pairs = np.unique(np.vstack(pairs) @ np.array([len(sig), 1]))  # one int per pair: far faster than unique(axis=0)
+    return np.column_stack(np.divmod(pairs, len(sig)))
+
+
+def agreement(sig, a, b):
+    """Fraction of signature values rows a and b share (estimated Jaccard similarity)."""
+    return (sig[a] == sig[b]).mean(axis=1) if len(a) else np.empty(0)
+
+
+def cluster_signatures(sig, empty, threshold=CLUSTER_THRESHOLD, bands=BANDS, groups=None):
+    """(cluster, similarity): each row's representative row and its estimated similarity to it."""
+    n = len(sig)
+    live = np.flatnonzero(~empty)
+    pairs = candidate_pairs(sig[live], bands, None if groups is None else np.asarray(groups)[live])
+    pairs = live[pairs]
+    pairs = pairs[agreement(sig, pairs[:, 0], pairs[:, 1]) >= threshold]
+
+    graph = coo_matrix((np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])), shape=(n, n))
+    _, labels = connected_components(graph, directed=False)
+    first = np.full(labels.max() + 1 if n else 0, n)
+    np.minimum.at(first, labels, np.arange(n))
+    cluster = first[labels]
+    similarity = agreement(sig, np.arange(n), cluster)
+    similarity[empty] = 1.0
+    return cluster, similarity
+
+
+def cluster_texts(texts, threshold=CLUSTER_THRESHOLD, groups=None):
+    """
+    Near-duplicate clusters for a list of texts: (cluster, similarity), where
+    cluster[i] is the position of text i's representative. With groups (e.g.
+    member codes), texts only cluster with texts in the same group.
+    """
+    hashes, counts = shingle_hashes(texts)
+    return cluster_signatures(minhash(hashes, counts), counts == 0, threshold, groups=groups)
+
+
+class NearDupIndex:
+    """
+    Clusters over a corpus fed in chunks: add(keys, texts) per chunk, then
+    build(). Keeps one signature (NUM_PERM x 4 bytes) per row, not the texts.
+
+    A representative is its cluster's first row, so when chunks are scored in
+    the order they were added, it comes no later than the rows that reuse it.
+    scoring_texts() remembers representatives' texts as their chunks pass
+    (only those of clusters with more than one row) and hands them to the
+    later rows. A run resuming part-way through must remember() the chunks it
+    skips.
+    """
+
+    def __init__(self, threshold=CLUSTER_THRESHOLD):
+        self.threshold = threshold
+        self.keys, self.sigs, self.empty = [], [], []
+        self.rep_texts = {}
+
+    def add(self, keys, texts):
+        hashes, counts = shingle_hashes(texts)
+        self.keys.append(np.asarray(keys))
+        self.sigs.append(minhash(hashes, counts))
+        self.empty.append(counts == 0)
+
+    def build(self):
+        keys = np.concatenate(self.keys) if self.keys else np.array([], dtype=np.int64)
+        sig = np.vstack(self.sigs) if self.sigs else np.empty((0, NUM_PERM), dtype=np.uint32)
+        empty = np.concatenate(self.empty) if self.empty else np.array([], dtype=bool)
+        self.sigs = self.empty = None
+        self.position = pd.Index(keys)
+        self.rep, self.similarity = cluster_signatures(sig, empty, self.threshold)
+        self.cluster = keys[self.rep]
+        self.shared = np.bincount(self.rep, minlength=len(self.rep)) > 1   # representatives of 2+ rows
+        return self
+
+    def cluster_of(self, keys):
+        """Cluster id (the representative's key) for each key."""
+        return self.cluster[self.position.get_indexer(keys)]
+
+    def remember(self, keys, texts):
+        """Keep the texts of shared representatives among keys, for rows in later chunks."""
+        at = self.position.get_indexer(keys)
+        for i, text in zip(at, texts):
+            if self.shared[i]:
+                self.rep_texts[i] = text
+
+    def scoring_texts(self, keys, texts, bound):
+        """Text to score for each key: its representative's if within bound, else its own (`texts`)."""
+        texts = list(texts)
+        self.remember(keys, texts)
+        at = self.position.get_indexer(keys)
+        use = np.where(self.similarity[at] >= bound, self.rep[at], at)
+        return [text if u == i else self.rep_texts[u] for u, i, text in zip(use, at, texts)]
+
+    def stats(self, bound):
+        """(rows, clusters, rows that would reuse a representative's scores at bound)."""
+        reuse = (self.rep != np.arange(len(self.rep))) & (self.similarity >= bound)
+        return len(self.rep), len(np.unique(self.rep)), int(reuse.sum())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Near-duplicate cluster stats for a tweets CSV.")
+    parser.add_argument("input", help="tweets CSV (Text or clean_text column)")
+    parser.add_argument("--column", default=None, help="text column (default clean_text, else Text)")
+    parser.add_argument("--threshold", type=float, default=CLUSTER_THRESHOLD)
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    args = parser.parse_args()
+
+    def chunks():
+        for chunk in pd.read_csv(args.input, chunksize=args.chunk_size, low_memory=False):
+            column = args.column or ("clean_text" if "clean_text" in chunk.columns else "Text")
+            chunk = chunk.dropna(subset=[column])
+            yield chunk.index, chunk[column]
+
+    index = NearDupIndex(args.threshold)
+    for keys, texts in chunks():
+        index.add(keys, texts)
+    print(f"{datetime.now()} - Clustering {sum(map(len, index.keys)):,} texts...")
+    index.build()
+
+    for bound in sorted({args.threshold, 0.9, 0.95, 1.0}):
+        rows, clusters, reuse = index.stats(bound)
+        print(f"  bound {bound:.2f}: {rows:,} rows, {clusters:,} clusters, "
+              f"{rows - reuse:,} model calls ({reuse / max(rows, 1):.1%} saved)")
+
+    # Second pass for just the texts of the largest clusters' representatives
+    sizes = pd.Series(index.cluster).value_counts().head(5)
+    texts = {}
+    for keys, chunk_texts in chunks():
+        texts.update((k, t) for k, t in zip(keys, chunk_texts) if k in sizes.index)
+    print("\nLargest clusters:")
+    for key, n in sizes.items():
+        print(f"  {n:>6,} × {texts[key][:100]!r}")
+
+
+if __name__ == "__main__":
+    main()
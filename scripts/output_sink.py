@@ -0,0 +1,103 @@
+"""
+Batched write-behind sink for scraper output rows.
+
+Both scrapers used to open their CSV in append mode and build a new csv.writer
+for every row. OutputSink buffers rows in memory and writes them in one append
+when `flush_rows` rows are pending or `flush_seconds` have passed. Use it as a
+context manager (or call `close()` in a `finally`) so pending rows are written
+on normal shutdown, on Ctrl-C and when the scraper crashes with an exception.
+
+`on_flush` runs after every flush, once the rows are on disk. main.py uses it to
+commit the checkpoint store, so the store never records a tweet whose row has
+not reached tweets.csv.
+
+Optionally, each flush also writes the same rows to a partitioned Parquet
+dataset (e.g. account=<handle>/month=<YYYY-MM>/) so downstream loaders can
+skip parsing the CSV. This needs pyarrow; without it the sink writes CSV only.
+"""
+
+import asyncio
+import csv
+import os
+import time
+import uuid
+from datetime import datetime
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+
+class OutputSink:
+    def __init__(self, csv_file, header, flush_rows=500, flush_seconds=30,
+                 parquet_dir=None, partition_by=None, on_flush=None):
+        self.csv_file = csv_file
+        self.header = list(header)
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.partition_by = partition_by
+        self.on_flush = on_flush
+        self.buffer = []
+        self.last_flush = time.monotonic()
+
+        if parquet_dir and pa is None:
+            print(f'{datetime.now()} - [Sink] pyarrow not installed; skipping Parquet output '
+                  f'(pip install pyarrow to enable)')
+            parquet_dir = None
+        self.parquet_dir = parquet_dir
+
+        if not os.path.exists(csv_file):
+            with open(csv_file, 'w', newline='') as f:
+                csv.writer(f).writerow(self.header)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def write(self, row):
+        self.buffer.append(list(row))
+        if (len(self.buffer) >= self.flush_rows
+                or time.monotonic() - self.last_flush >= self.flush_seconds):
+            self.flush()
+
+    def flush(self):
+        rows, self.buffer = self.buffer, []
+        if rows:
+            with open(self.csv_file, 'a', newline='') as f:
+                csv.writer(f).writerows(rows)
+                f.flush()
+                os.fsync(f.fileno())
+            if self.parquet_dir:
+                self._write_parquet(rows)
+        self.last_flush = time.monotonic()
+        if self.on_flush:
+            self.on_flush()
+
+    async def flush_periodically(self):
+        """Run as a background task so rows don't sit in memory while the scraper sleeps."""
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            if time.monotonic() - self.last_flush >= self.flush_seconds:
+                self.flush()
+
+    def close(self):
+        self.flush()
+
+    def _write_parquet(self, rows):
+        records = [dict(zip(self.header, row)) for row in rows]
+        partition_cols = None
+        if self.partition_by:
+            partitions = [self.partition_by(record) for record in records]
+            partition_cols = list(partitions[0])
+            for record, partition in zip(records, partitions):
+                record.update(partition)
+        pq.write_to_dataset(
+            pa.Table.from_pylist(records),
+            root_path=self.parquet_dir,
+            partition_cols=partition_cols,
+            basename_template=f'part-{uuid.uuid4().hex}-{{i}}.parquet',
+        )
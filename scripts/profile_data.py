@@ -0,0 +1,361 @@
+"""
+Streaming profiler for the CSV / Parquet datasets under data/.
+
+Replaces data/raw/tweets/count.py (date range of tweets_filtered.csv) and
+data/processed/head.py (row count and column list of every processed CSV).
+Every file is read once, in blocks, so memory stays bounded:
+
+  - CSV is streamed with pyarrow's multithreaded reader, every column as
+    strings (no type-inference failures halfway through a file). Column kinds
+    (int / float / timestamp / string) are worked out per block.
+  - Parquet row counts, null counts and timestamp ranges come from the file
+    metadata (row-group statistics). Only the account and tweet-ID columns are
+    read, and only if the file has them.
+
+For each file it reports the row count, the min / max of the timestamp column,
+per-account row counts, duplicate tweet IDs (IDs kept as 8-byte ints or hashes)
+and the null rate of every column. It then reports schema drift between
+related files: files whose names differ only in digits
+(small_donors_2008.csv ... small_donors_2022.csv) or in extension
+(x.csv / x.parquet).
+
+Usage:
+    python profile_data.py ../data                       # whole tree
+    python profile_data.py tweets_filtered.csv --head 3  # one file, with a preview
+    python profile_data.py ../data --json profile.json   # full report incl. all account counts
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pv
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+EXTENSIONS = {".csv": ",", ".tab": ",", ".parquet": None}
+TIME_COLUMNS = ["Created At", "Created_At", "created_at"]
+ACCOUNT_COLUMNS = ["Account", "handle_lower", "screen_name"]
+ID_COLUMNS = ["Tweet_ID", "Tweet ID", "tweet_id"]
+# count.py's format first, then twikit's raw created_at
+TIME_FORMATS = ["%Y-%m-%d %H:%M:%S%z", "%Y-%m-%dT%H:%M:%S%z", "%a %b %d %H:%M:%S %z %Y",
+                "%Y-%m-%d %H:%M:%S", "%Y-%m-%d"]
+KIND_ORDER = ["null", "int", "float", "timestamp", "string"]
+BLOCK_SIZE = 16 << 20
+TOP_ACCOUNTS = 5
+
+
+def find_files(paths):
+    files = []
+    for p in map(Path, paths):
+        candidates = sorted(p.rglob("*")) if p.is_dir() else [p]
+        files += [f for f in candidates if f.is_file() and f.suffix.lower() in EXTENSIONS]
+    return files
+
+
+def first_match(columns, candidates):
+    return next((c for c in candidates if c in columns), None)
+
+
+def wider(a, b):
+    return max(a, b, key=KIND_ORDER.index)
+
+
+def arrow_kind(dtype):
+    if pa.types.is_dictionary(dtype):
+        dtype = dtype.value_type
+    if pa.types.is_null(dtype):
+        return "null"
+    if pa.types.is_integer(dtype) or pa.types.is_boolean(dtype):
+        return "int"
+    if pa.types.is_floating(dtype) or pa.types.is_decimal(dtype):
+        return "float"
+    if pa.types.is_timestamp(dtype) or pa.types.is_date(dtype):
+        return "timestamp"
+    return "string"
+
+
+def string_kind(col):
+    """Narrowest kind every non-null value of a string column parses as."""
+    if col.null_count == len(col):
+        return "null"
+    for kind, target in (("int", pa.int64()), ("float", pa.float64())):
+        try:
+            pc.cast(col, target)
+            return kind
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            pass
+    return "string"
+
+
+# ── Per-file accumulator ────────────────────────────────────────────────────
+
+class Profile:
+    """Running totals for one file, fed batch by batch."""
+
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = list(columns)
+        self.rows = 0
+        self.nulls = Counter()
+        self.kinds = {}
+        self.time_col = first_match(columns, TIME_COLUMNS)
+        self.time_format = None
+        self.time_min = self.time_max = None
+        self.time_unparsed = 0
+        self.account_col = first_match(columns, ACCOUNT_COLUMNS)
+        self.accounts = Counter()
+        self.id_col = first_match(columns, ID_COLUMNS)
+        self.ids = []
+        self.preview = None
+
+    def add_time_range(self, lo, hi):
+        if lo is not None:
+            self.time_min = lo if self.time_min is None else min(self.time_min, lo)
+            self.time_max = hi if self.time_max is None else max(self.time_max, hi)
+
+    def add_timestamps(self, col):
+        """Parse a string timestamp column; the format is chosen on the first non-empty batch."""
+        if self.time_format is None:
+            if col.null_count == len(col):
+                return
+            parsed_counts = [len(col) - pc.strptime(col, format=f, unit="s", error_is_null=True).null_count
+                             for f in TIME_FORMATS]
+            self.time_format = TIME_FORMATS[int(np.argmax(parsed_counts))]
+        parsed = pc.strptime(col, format=self.time_format, unit="s", error_is_null=True)
+        self.time_unparsed += parsed.null_count - col.null_count
+        bounds = pc.min_max(parsed)
+        self.add_time_range(bounds["min"].as_py(), bounds["max"].as_py())
+
+    def add_accounts(self, col):
+        counts = pc.value_counts(col)
+        for value, n in zip(counts.field("values").to_pylist(), counts.field("counts").to_pylist()):
+            if value is not None:
+                self.accounts[value] += n
+
+    def add_ids(self, col):
+        col = col.drop_null()
+        try:
+            ids = pc.cast(col, pa.int64()).to_numpy()
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            ids = pd.util.hash_array(np.asarray(col.to_pylist(), dtype=object)).view(np.int64)
+        self.ids.append(ids)
+
+    def add_csv_batch(self, batch):
+        if self.preview is None:
+            self.preview = batch.slice(0, 10).to_pandas()
+        self.rows += batch.num_rows
+        for name, col in zip(batch.schema.names, batch.columns):
+            self.nulls[name] += col.null_count
+            kind = self.kinds.get(name, "null")
+            if name == self.time_col:
+                kind = "timestamp"
+                self.add_timestamps(col)
+            elif kind != "string":  # nothing widens past string, so stop casting
+                kind = wider(kind, string_kind(col))
+            self.kinds[name] = kind
+            if name == self.account_col:
+                self.add_accounts(col)
+            if name == self.id_col:
+                self.add_ids(col)
+
+    def duplicate_ids(self):
+        """(rows that repeat an earlier ID, distinct IDs that repeat)."""
+        if not self.ids:
+            return 0, 0
+        ids = np.sort(np.concatenate(self.ids))
+        same = ids[1:] == ids[:-1]
+        starts = same & ~np.r_[False, same[:-1]]
+        return int(same.sum()), int(starts.sum())
+
+    def summary(self):
+        dup_rows, dup_ids = self.duplicate_ids()
+        return {
+            "path": str(self.path), "rows": self.rows, "columns": self.columns, "kinds": self.kinds,
+            "null_rate": {c: self.nulls[c] / self.rows if self.rows else 0.0 for c in self.columns},
+            "time_column": self.time_col, "time_min": str(self.time_min) if self.time_min else None,
+            "time_max": str(self.time_max) if self.time_max else None, "time_unparsed": self.time_unparsed,
+            "account_column": self.account_col, "accounts": dict(self.accounts.most_common()),
+            "id_column": self.id_col, "duplicate_id_rows": dup_rows, "duplicated_ids": dup_ids,
+        }
+
+
+# ── Readers ─────────────────────────────────────────────────────────────────
+
+def read_header(path, delimiter):
+    """Header names as pandas would give them: BOM stripped, blanks "Unnamed: i", repeats "x.1"."""
+    with open(path, newline="", encoding="utf-8-sig", errors="replace") as f:
+        header = next(csv.reader(f, delimiter=delimiter), [])
+    columns, seen = [], Counter()
+    for i, name in enumerate(header):
+        name = name or f"Unnamed: {i}"
+        columns.append(f"{name}.{seen[name]}" if seen[name] else name)
+        seen[name] += 1
+    return columns
+
+
+def profile_csv(path, delimiter):
+    columns = read_header(path, delimiter)
+    profile = Profile(path, columns)
+    reader = pv.open_csv(
+        path,
+        read_options=pv.ReadOptions(use_threads=True, block_size=BLOCK_SIZE, column_names=columns, skip_rows=1),
+        parse_options=pv.ParseOptions(delimiter=delimiter, newlines_in_values=True),
+        convert_options=pv.ConvertOptions(column_types={c: pa.string() for c in columns},
+                                          strings_can_be_null=True),
+    )
+    for batch in reader:
+        profile.add_csv_batch(batch)
+    return profile
+
+
+def profile_parquet(path):
+    pf = pq.ParquetFile(path)
+    schema = pf.schema_arrow
+    profile = Profile(path, schema.names)
+    profile.rows = pf.metadata.num_rows
+    profile.kinds = {f.name: arrow_kind(f.type) for f in schema}
+    profile.preview = pf.read_row_group(0).slice(0, 10).to_pandas() if pf.num_row_groups else schema.empty_table().to_pandas()
+
+    # Null counts and the timestamp range from row-group statistics; columns without stats are read
+    for i, name in enumerate(schema.names):
+        stats = [pf.metadata.row_group(g).column(i).statistics for g in range(pf.num_row_groups)]
+        if all(s is not None and s.has_null_count for s in stats):
+            profile.nulls[name] = sum(s.null_count for s in stats)
+        else:
+            profile.nulls[name] = pf.read(columns=[name]).column(0).null_count
+        if name == profile.time_col:
+            if all(s is not None and s.has_min_max for s in stats):
+                for s in stats:
+                    profile.add_time_range(s.min, s.max)
+            else:
+                bounds = pc.min_max(pf.read(columns=[name]).column(0))
+                profile.add_time_range(bounds["min"].as_py(), bounds["max"].as_py())
+
+    wanted = [c for c in (profile.account_col, profile.id_col) if c]
+    if wanted:
+        for batch in pf.iter_batches(columns=wanted, batch_size=1 << 20):
+            for name, col in zip(batch.schema.names, batch.columns):
+                if pa.types.is_dictionary(col.type):
+                    col = col.dictionary_decode()
+                if name == profile.account_col:
+                    profile.add_accounts(col)
+                if name == profile.id_col:
+                    profile.add_ids(col)
+    return profile
+
+
+def profile_file(path):
+    delimiter = EXTENSIONS[path.suffix.lower()]
+    return profile_parquet(path) if delimiter is None else profile_csv(path, delimiter)
+
+
+# ── Schema drift ────────────────────────────────────────────────────────────
+
+def family(path):
+    return path.parent, re.sub(r"\d+", "#", path.stem)
+
+
+def schema_drift(summaries):
+    """Per family of related files: columns missing from some files, and columns whose kind differs."""
+    groups = defaultdict(list)
+    for s in summaries:
+        groups[family(Path(s["path"]))].append(s)
+
+    drift = []
+    for (parent, pattern), members in groups.items():
+        if len(members) < 2:
+            continue
+        all_cols = list(dict.fromkeys(c for s in members for c in s["columns"]))
+        missing = {s["path"]: [c for c in all_cols if c not in s["columns"]] for s in members}
+        kinds = {}
+        for col in all_cols:
+            seen = {s["path"]: s["kinds"][col] for s in members if col in s["kinds"] and s["kinds"][col] != "null"}
+            if len(set(seen.values())) > 1:
+                kinds[col] = seen
+        if any(missing.values()) or kinds:
+            drift.append({"family": str(parent / pattern), "files": len(members),
+                          "missing_columns": {p: m for p, m in missing.items() if m}, "kind_changes": kinds})
+    return drift
+
+
+# ── Report ──────────────────────────────────────────────────────────────────
+
+def print_profile(s, seconds, size, head):
+    print(f"\n{'=' * 60}\n{s['path']}  ({s['rows']:,} rows, {len(s['columns'])} cols, "
+          f"{size / 1e6:.1f} MB, {seconds:.2f}s)\n{'=' * 60}")
+    if head:
+        print(s["preview"].head(head).to_string())
+    cols = [f"{c}:{s['kinds'].get(c, '?')}" for c in s["columns"]]
+    print(f"Columns: {cols}")
+    if s["time_column"]:
+        unparsed = f"  ({s['time_unparsed']:,} unparsed)" if s["time_unparsed"] else ""
+        print(f"  {s['time_column']:<12s} {s['time_min']} → {s['time_max']}{unparsed}")
+    if s["account_column"]:
+        top = ", ".join(f"{a} {n:,}" for a, n in list(s["accounts"].items())[:TOP_ACCOUNTS])
+        print(f"  {'Accounts':<12s} {len(s['accounts']):,} (top: {top})")
+    if s["id_column"]:
+        print(f"  {s['id_column']:<12s} {s['duplicate_id_rows']:,} duplicate rows across {s['duplicated_ids']:,} ids")
+    nulls = [(c, r) for c, r in s["null_rate"].items() if r > 0]
+    if nulls:
+        print(f"  {'Nulls':<12s} " + ", ".join(f"{c} {r:.1%}" for c, r in sorted(nulls, key=lambda x: -x[1])))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile every CSV / Parquet dataset under the given paths.")
+    parser.add_argument("paths", nargs="*", default=["."], help="files or directories (default: .)")
+    parser.add_argument("--head", type=int, default=0, help="also print the first N rows of each file")
+    parser.add_argument("--json", help="write the full report (all account counts) to this file")
+    args = parser.parse_args()
+    if pa is None:
+        raise ImportError("pyarrow is required for profile_data.py (pip install pyarrow)")
+
+    files = find_files(args.paths)
+    print(f"{datetime.now()} - Profiling {len(files)} files...")
+    start = time.perf_counter()
+    summaries = []
+    for path in files:
+        t0 = time.perf_counter()
+        try:
+            profile = profile_file(path)
+        except (pa.ArrowInvalid, OSError, UnicodeDecodeError) as e:
+            print(f"\n{path} — could not read: {e}")
+            continue
+        summary = profile.summary()
+        print_profile({**summary, "preview": profile.preview}, time.perf_counter() - t0, os.path.getsize(path), args.head)
+        summaries.append(summary)
+
+    drift = schema_drift(summaries)
+    print(f"\n{'=' * 60}\nSchema drift\n{'=' * 60}")
+    for d in drift:
+        print(f"  {d['family']}  ({d['files']} files)")
+        for p, cols in d["missing_columns"].items():
+            print(f"    {p} missing: {cols}")
+        for col, seen in d["kind_changes"].items():
+            print(f"    {col}: " + ", ".join(f"{Path(p).name}={k}" for p, k in seen.items()))
+    if not drift:
+        print("  none")
+
+    total_rows = sum(s["rows"] for s in summaries)
+    print(f"\n{datetime.now()} - {len(summaries)} files, {total_rows:,} rows in {time.perf_counter() - start:.2f}s")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"files": summaries, "schema_drift": drift}, f, indent=1)
+        print(f"{datetime.now()} - Saved → {args.json}")
+
+
+if __name__ == "__main__":
+    main()
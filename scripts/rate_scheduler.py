@@ -0,0 +1,159 @@
+"""
+Quota-aware request scheduler for the X scrapers.
+
+Tracks remaining quota and reset time per (account, endpoint) and hands out
+requests token-bucket style. Requests are paced so an account's quota is spread
+over its rate-limit window instead of being burnt in a burst and then waiting
+out the reset. Quota figures start from the documented per-account limits and
+are corrected from the x-rate-limit-* response headers once a client is
+attached with `attach()`.
+
+Every wait is logged with its reason and totalled, so `print_summary()` shows
+where scraping time went. These quota-driven waits replace the fixed randint
+pauses the scrapers used before. Each wait is also recorded in the
+scheduler's scrape_metrics.Metrics (`scheduler.metrics`), which the scrapers
+share for the rest of their instrumentation.
+"""
+
+import asyncio
+import time
+from collections import defaultdict
+from datetime import datetime
+from urllib.parse import urlparse
+
+from scrape_metrics import Metrics
+
+SEARCH = 'search'
+USER_LOOKUP = 'user_lookup'
+
+# Default (requests, window seconds) per account until response headers say otherwise
+ENDPOINT_LIMITS = {
+    SEARCH: (50, 15 * 60),
+    USER_LOOKUP: (95, 15 * 60),
+}
+
+# GraphQL operation name (last path segment) -> endpoint key
+OPERATION_ENDPOINTS = {
+    'SearchTimeline': SEARCH,
+    'UserByScreenName': USER_LOOKUP,
+}
+
+MIN_INTERVAL = 2.0  # never fire two requests on one account closer than this
+
+
+class Bucket:
+    def __init__(self, limit, window, now, spread=True):
+        self.spread = spread
+        self.limit = limit
+        self.window = window
+        self.remaining = limit
+        self.reset = now + window
+        self.last_request = 0.0
+        self.lock = asyncio.Lock()
+
+    def refill(self, now):
+        if now >= self.reset:
+            self.remaining = self.limit
+            self.reset = now + self.window
+
+    def pace(self, now):
+        """Seconds between requests that spreads the remaining quota evenly until reset."""
+        if not self.spread:
+            return MIN_INTERVAL
+        return max(MIN_INTERVAL, (self.reset - now) / max(self.remaining, 1))
+
+
+class QuotaScheduler:
+    def __init__(self, limits=None, spread=True, clock=time.time, metrics=None):
+        # spread=False spends quota as fast as MIN_INTERVAL allows, for short
+        # jobs that finish inside one rate-limit window. `clock` returns epoch
+        # seconds; the offline benchmark swaps in a virtual clock.
+        self.limits = limits or ENDPOINT_LIMITS
+        self.spread = spread
+        self.clock = clock
+        self.metrics = metrics or Metrics(clock=clock)
+        self.buckets = {}
+        self.waits = defaultdict(float)  # (account, endpoint, reason) -> seconds
+        self.requests = defaultdict(int)  # (account, endpoint) -> count
+
+    def bucket(self, account, endpoint):
+        key = (account, endpoint)
+        if key not in self.buckets:
+            self.buckets[key] = Bucket(*self.limits[endpoint], self.clock(), spread=self.spread)
+        return self.buckets[key]
+
+    async def acquire(self, account, endpoint):
+        """Wait until `account` may call `endpoint`, take one token, return seconds waited."""
+        b = self.bucket(account, endpoint)
+        waited = 0.0
+        async with b.lock:
+            while True:
+                now = self.clock()
+                b.refill(now)
+                if b.remaining <= 0:
+                    wait, reason = b.reset - now, 'quota exhausted, waiting for reset'
+                else:
+                    wait, reason = b.last_request + b.pace(now) - now, 'pacing'
+                if wait <= 0:
+                    break
+                if wait >= 60:
+                    print(f'{datetime.now()} - [Quota] {account} {endpoint}: waiting {wait:.0f}s ({reason})')
+                self.waits[(account, endpoint, reason)] += wait
+                self.metrics.observe('quota_wait_seconds', wait, account=account, endpoint=endpoint, reason=reason)
+                waited += wait
+                await asyncio.sleep(wait)
+            b.remaining -= 1
+            b.last_request = self.clock()
+            self.requests[(account, endpoint)] += 1
+        return waited
+
+    def mark_exhausted(self, account, endpoint, reset_timestamp=None):
+        """Record a TooManyRequests: no more tokens until the reported (or estimated) reset."""
+        b = self.bucket(account, endpoint)
+        b.remaining = 0
+        b.reset = reset_timestamp or (self.clock() + b.window)
+
+    def observe(self, account, endpoint, headers):
+        """Update a bucket from x-rate-limit-* response headers."""
+        if 'x-rate-limit-remaining' not in headers:
+            return
+        b = self.bucket(account, endpoint)
+        b.remaining = int(headers['x-rate-limit-remaining'])
+        if 'x-rate-limit-limit' in headers:
+            b.limit = int(headers['x-rate-limit-limit'])
+        if 'x-rate-limit-reset' in headers:
+            b.reset = int(headers['x-rate-limit-reset'])
+
+    def attach(self, account, client):
+        """Feed rate-limit headers from every response of a twikit Client into this scheduler."""
+        async def on_response(response):
+            operation = urlparse(str(response.request.url)).path.rsplit('/', 1)[-1]
+            endpoint = OPERATION_ENDPOINTS.get(operation)
+            if endpoint:
+                self.observe(account, endpoint, response.headers)
+        client.http.event_hooks['response'].append(on_response)
+
+    def ready_in(self, account, endpoint):
+        """Seconds until `account` could next call `endpoint` (0 if now)."""
+        b = self.bucket(account, endpoint)
+        now = self.clock()
+        b.refill(now)
+        if b.remaining <= 0:
+            return b.reset - now
+        return max(b.last_request + b.pace(now) - now, 0.0)
+
+    def pick_account(self, accounts, endpoint):
+        """Account that can serve `endpoint` soonest; ties go to the one with most quota left."""
+        return min(accounts, key=lambda a: (self.ready_in(a, endpoint),
+                                            -self.bucket(a, endpoint).remaining))
+
+    def print_summary(self):
+        print(f'\n{"="*60}')
+        print(f'  QUOTA WAITS')
+        print(f'{"="*60}')
+        for (account, endpoint), n in sorted(self.requests.items()):
+            waits = {reason: secs for (a, e, reason), secs in self.waits.items()
+                     if a == account and e == endpoint}
+            detail = ', '.join(f'{secs:.0f}s {reason}' for reason, secs in waits.items()) or 'no waits'
+            print(f'  {account} {endpoint}: {n} requests, {detail}')
+        print(f'{"="*60}')
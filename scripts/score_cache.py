@@ -0,0 +1,104 @@
+"""
+Content-addressed cache for model scores, used by score_tweets.py.
+
+Each entry is keyed by (model id, model revision, sha256 of the preprocessed
+text) and holds the raw pipeline output for that text: the sentiment label and
+score, or the full list of emotion scores. Repeated texts (identical press
+releases, or tweets that preprocess() maps to the same string) are scored once.
+A rerun over a grown tweets_filtered.csv only sends new text to the models.
+Because the key includes the revision, updating a model on the Hub
+automatically bypasses that model's old entries.
+
+The cache lives in SQLite next to the output, like the scraper's checkpoint
+store.
+"""
+
+import hashlib
+import json
+import sqlite3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    model     TEXT NOT NULL,
+    revision  TEXT NOT NULL,
+    text_hash TEXT NOT NULL,
+    result    TEXT NOT NULL,
+    PRIMARY KEY (model, revision, text_hash)
+);
+"""
+
+LOOKUP_BATCH = 500  # stay well under SQLite's bound-parameter limit
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def model_key(pipe):
+    """(model id, revision) for a transformers pipeline."""
+    config = pipe.model.config
+    model_id = getattr(config, "_name_or_path", None) or pipe.model.name_or_path
+    revision = getattr(config, "_commit_hash", None) or "unknown"
+    return model_id, revision
+
+
+class ScoreCache:
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    def commit(self):
+        self.conn.commit()
+
+    def get_many(self, model, revision, hashes):
+        """Cached results for the given text hashes, as {hash: result}."""
+        found = {}
+        hashes = list(hashes)
+        for i in range(0, len(hashes), LOOKUP_BATCH):
+            batch = hashes[i:i + LOOKUP_BATCH]
+            rows = self.conn.execute(
+                f"SELECT text_hash, result FROM scores WHERE model = ? AND revision = ? "
+                f"AND text_hash IN ({','.join('?' * len(batch))})",
+                (model, revision, *batch),
+            ).fetchall()
+            found.update((h, json.loads(result)) for h, result in rows)
+        return found
+
+    def put_many(self, model, revision, results):
+        """Store {hash: result} for one model."""
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO scores (model, revision, text_hash, result) VALUES (?, ?, ?, ?)",
+            [(model, revision, h, json.dumps(result)) for h, result in results.items()],
+        )
+
+    def score(self, keys, texts, run):
+        """
+        Results for `texts` from each model in `keys` ((model id, revision)
+        pairs), as one list per model in input order. Each distinct text is
+        looked up once. Texts missing for any model are passed to `run(texts)`,
+        which must return one list of results per model.
+        """
+        hashes = [text_hash(t) for t in texts]
+        unique = dict(zip(hashes, texts))
+
+        cached = [self.get_many(model, revision, unique) for model, revision in keys]
+        missing = [h for h in unique if any(h not in c for c in cached)]
+        if missing:
+            preds = run([unique[h] for h in missing])
+            for (model, revision), c, model_preds in zip(keys, cached, preds):
+                fresh = dict(zip(missing, model_preds))
+                self.put_many(model, revision, fresh)
+                c.update(fresh)
+
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+        return [[c[h] for h in hashes] for c in cached]
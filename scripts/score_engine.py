@@ -0,0 +1,205 @@
+"""
+Multi-model CPU inference engine for score_tweets.py.
+
+The notebook runs the sentiment pipeline over the whole corpus, then the
+emotion pipeline as a second pass. Each pass tokenises the text separately and
+runs in one process. CPUEngine works differently:
+
+  - Texts are split into shards and spread across a pool of worker processes.
+    Each worker caps torch's intra-op threads, so workers x threads roughly
+    equals the core count and throughput scales with cores.
+  - Within a shard, texts are sorted by length and batched. Each batch is
+    tokenised once and fed to both classifiers, which share the RoBERTa BPE
+    vocabulary. If the tokenizers ever differ, each model tokenises separately.
+  - Results have the same shape as the transformers pipelines' output: a
+    {label, score} dict for sentiment and the full label/score list for
+    emotions. That means score_tweets.py, the score cache and the enriched CSV
+    don't change.
+
+Optional faster model paths:
+  - quantize=True: dynamic int8 quantisation of the Linear layers (torch only)
+  - onnx=True: ONNX Runtime through optimum, if installed
+Both change the scores slightly. Run this file directly to measure throughput
+and compare accuracy against the reference pipelines before using them:
+
+    python score_engine.py --input tweets_filtered.csv --n 2000 --workers 4 --quantize
+"""
+
+import argparse
+import multiprocessing
+import os
+import time
+
+import numpy as np
+import torch
+from transformers import AutoConfig, AutoModelForSequenceClassification, AutoTokenizer
+
+try:
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+except ImportError:
+    ORTModelForSequenceClassification = None
+
+SENTIMENT_MODEL = "cardiffnlp/twitter-roberta-base-sentiment-latest"
+EMOTION_MODEL = "j-hartmann/emotion-english-distilroberta-base"
+BATCH_SIZE = 32
+MAX_LENGTH = 512
+SHARD_SIZE = 256
+
+
+def softmax(logits):
+    # Same arithmetic as transformers' text-classification postprocess
+    maxes = np.max(logits, axis=-1, keepdims=True)
+    shifted_exp = np.exp(logits - maxes)
+    return shifted_exp / shifted_exp.sum(axis=-1, keepdims=True)
+
+
+def variant(quantize=False, onnx=False):
+    """Suffix recorded with the model revision, so cached scores from different model paths never mix."""
+    return "+onnx" if onnx else "+int8" if quantize else ""
+
+
+# ── Worker process ──────────────────────────────────────────────────────────
+
+_worker = {}
+
+
+def load_model(model_id, quantize=False, onnx=False):
+    if onnx:
+        return ORTModelForSequenceClassification.from_pretrained(model_id, export=True)
+    model = AutoModelForSequenceClassification.from_pretrained(model_id).eval()
+    if quantize:
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+
+def init_worker(model_ids, threads, quantize, onnx):
+    torch.set_num_threads(threads)
+    tokenizers = [AutoTokenizer.from_pretrained(m) for m in model_ids]
+    shared = tokenizers[0].get_vocab() == tokenizers[1].get_vocab()
+    _worker.update(
+        tokenizers=tokenizers,
+        shared=shared,
+        models=[load_model(m, quantize, onnx) for m in model_ids],
+    )
+
+
+def _encode(tokenizer, texts):
+    return tokenizer(texts, padding=True, truncation=True, max_length=MAX_LENGTH, return_tensors="pt")
+
+
+def score_shard(texts):
+    """Score one shard with both models. Returns (sentiment results, emotion results) in input order."""
+    sentiment_model, emotion_model = _worker["models"]
+    sent_tok, emo_tok = _worker["tokenizers"]
+    sent_labels = sentiment_model.config.id2label
+    emo_labels = emotion_model.config.id2label
+
+    lengths = [len(ids) for ids in sent_tok(texts, truncation=True, max_length=MAX_LENGTH)["input_ids"]]
+    order = np.argsort(lengths, kind="stable")[::-1]
+    sentiment, emotion = [None] * len(texts), [None] * len(texts)
+
+    with torch.inference_mode():
+        for start in range(0, len(order), BATCH_SIZE):
+            idx = order[start:start + BATCH_SIZE]
+            batch = [texts[i] for i in idx]
+            enc = _encode(sent_tok, batch)
+            sent_probs = softmax(sentiment_model(**enc).logits.float().numpy())
+            if not _worker["shared"]:
+                enc = _encode(emo_tok, batch)
+            emo_probs = softmax(emotion_model(**enc).logits.float().numpy())
+
+            for i, sp, ep in zip(idx, sent_probs, emo_probs):
+                sentiment[i] = {"label": sent_labels[sp.argmax().item()], "score": sp.max().item()}
+                emotion[i] = [{"label": emo_labels[j], "score": s.item()} for j, s in enumerate(ep)]
+    return sentiment, emotion
+
+
+# ── Engine ──────────────────────────────────────────────────────────────────
+
+class CPUEngine:
+    """Process-pool scorer: texts -> (sentiment results, emotion results), like score_tweets.PipelineScorer."""
+
+    def __init__(self, workers=None, threads=None, shard_size=SHARD_SIZE, quantize=False, onnx=False,
+                 model_ids=(SENTIMENT_MODEL, EMOTION_MODEL)):
+        if onnx and ORTModelForSequenceClassification is None:
+            print("optimum[onnxruntime] not installed; using the PyTorch models "
+                  "(pip install optimum[onnxruntime] to enable --onnx)")
+            onnx = False
+        cores = os.cpu_count() or 1
+        self.workers = workers or cores
+        self.threads = threads or max(cores // self.workers, 1)
+        self.shard_size = shard_size
+
+        suffix = variant(quantize, onnx)
+        self.keys = []
+        for model_id in model_ids:
+            revision = getattr(AutoConfig.from_pretrained(model_id), "_commit_hash", None) or "unknown"
+            self.keys.append((model_id, revision + suffix))
+
+        # spawn, not fork: a forked child can inherit torch's thread pool in a bad state
+        self.pool = multiprocessing.get_context("spawn").Pool(
+            self.workers, initializer=init_worker, initargs=(model_ids, self.threads, quantize, onnx))
+
+    def __call__(self, texts):
+        shards = [texts[i:i + self.shard_size] for i in range(0, len(texts), self.shard_size)]
+        sentiment, emotion = [], []
+        for sent, emo in self.pool.imap(score_shard, shards):
+            sentiment.extend(sent)
+            emotion.extend(emo)
+        return sentiment, emotion
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+
+# ── Throughput / accuracy check ─────────────────────────────────────────────
+
+def compare(reference, candidate):
+    """Label agreement and largest score difference between two (sentiment, emotion) result pairs."""
+    ref_sent, ref_emo = reference
+    sent, emo = candidate
+    agree = np.mean([r["label"] == c["label"] for r, c in zip(ref_sent, sent)])
+    sent_diff = max(abs(r["score"] - c["score"]) for r, c in zip(ref_sent, sent))
+    emo_diff = max(abs(a["score"] - b["score"]) for r, c in zip(ref_emo, emo) for a, b in zip(r, c))
+    top_agree = np.mean([max(r, key=lambda x: x["score"])["label"] == max(c, key=lambda x: x["score"])["label"]
+                         for r, c in zip(ref_emo, emo)])
+    return {"sentiment_label_agreement": agree, "sentiment_max_score_diff": sent_diff,
+            "emotion_top_agreement": top_agree, "emotion_max_score_diff": emo_diff}
+
+
+def main():
+    import pandas as pd
+    from score_tweets import PipelineScorer, preprocess
+
+    parser = argparse.ArgumentParser(description="Benchmark CPUEngine against the notebook pipelines.")
+    parser.add_argument("--input", default="tweets_filtered.csv")
+    parser.add_argument("--n", type=int, default=2000, help="tweets to score")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4],
+                        help="worker counts to time (threads per worker = cores / workers)")
+    parser.add_argument("--quantize", action="store_true")
+    parser.add_argument("--onnx", action="store_true")
+    args = parser.parse_args()
+
+    texts = pd.read_csv(args.input, nrows=args.n)["Text"].dropna().map(preprocess).tolist()
+    print(f"{len(texts):,} tweets, {os.cpu_count()} cores")
+
+    reference_scorer = PipelineScorer()
+    start = time.perf_counter()
+    reference = reference_scorer(texts)
+    print(f"  pipelines (1 process):  {len(texts) / (time.perf_counter() - start):8.1f} tweets/sec")
+
+    for workers in args.workers:
+        engine = CPUEngine(workers=workers, quantize=args.quantize, onnx=args.onnx)
+        engine(texts[:engine.shard_size * workers])  # warm up: model load in every worker
+        start = time.perf_counter()
+        result = engine(texts)
+        rate = len(texts) / (time.perf_counter() - start)
+        engine.close()
+        print(f"  engine {workers:>2} x {engine.threads:>2} threads: {rate:8.1f} tweets/sec")
+        for key, value in compare(reference, result).items():
+            print(f"      {key:<28} {value:.6f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+"""
+Streaming sentiment / emotion scoring for tweets_filtered.csv.
+
+Command-line version of the scoring in notebooks/03_sentiment_analysis.ipynb
+(sections 1-4). It uses the same preprocessing, the same models and the same
+output columns. The input is streamed in chunks instead of being loaded whole,
+and each chunk is handled as follows:
+
+  1. Parse dates, drop rows without text or date, clean the text, and join the
+     handle metadata from sample_house_full.csv (as in the notebook).
+  2. Sort the texts by token length, so each batch pads to similar lengths,
+     then score them and restore the original order.
+  3. Append the chunk to the enriched CSV and record progress in
+     <output>.progress.json.
+
+A killed run picks up after the last finished chunk. Any partial chunk at the
+end of the CSV is truncated first. Rows, column order and dtypes match the
+notebook's house_tweets_enriched.csv. Scores match up to float noise from
+batch padding.
+
+Scores are looked up in a content-addressed cache (score_cache.ScoreCache)
+before inference, so only text that was never scored reaches the models.
+With --workers, misses are scored by score_engine.CPUEngine: one tokenisation
+per batch for both models, spread over a process pool.
+
+With --near-dup BOUND, the scan pass also clusters near-identical clean_text
+(near_dup.NearDupIndex, MinHash / LSH). Each tweet whose estimated similarity
+to its cluster's representative is at least BOUND is given the
+representative's scores, so only one text per tight cluster reaches the
+models. The cluster id (row number of the representative in the input CSV) is
+written as an extra dup_cluster column.
+
+Usage:
+    python score_tweets.py --input tweets_filtered.csv --sample sample_house_full.csv
+    python score_tweets.py --restart        # ignore saved progress
+    python score_tweets.py --no-cache       # score everything, don't read or write the cache
+    python score_tweets.py --workers 8      # multi-process CPU engine
+    python score_tweets.py --parquet        # also write the Parquet copy (enriched_store.py)
+    python score_tweets.py --near-dup 0.9   # reuse scores across near-duplicate tweets
+"""
+
+import argparse
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from transformers import pipeline
+
+from enriched_store import write_enriched_parquet
+from near_dup import NearDupIndex
+from score_cache import ScoreCache, model_key
+from score_engine import CPUEngine
+
+# === CONFIGURATION ===
+HOUSE_TWEETS_CSV = "tweets_filtered.csv"
+SAMPLE_HOUSE_CSV = "sample_house_full.csv"
+ENRICHED_CSV = "house_tweets_enriched.csv"
+SCORE_CACHE = "score_cache.db"
+
+SENTIMENT_MODEL = "cardiffnlp/twitter-roberta-base-sentiment-latest"
+EMOTION_MODEL = "j-hartmann/emotion-english-distilroberta-base"
+BATCH_SIZE = 32
+MAX_LENGTH = 512
+CHUNK_SIZE = 5000
+
+META_COLS = ["handle_lower", "official_full", "quartile", "party_code", "state", "pct_small_donors"]
+EMOTIONS = ["anger", "fear", "joy", "disgust", "sadness", "surprise", "neutral"]
+
+
+# ── Notebook 03 helpers (unchanged) ─────────────────────────────────────────
+
+def preprocess(text):
+    tokens = []
+    for t in str(text).split():
+        if t.startswith("@") and len(t) > 1:
+            tokens.append("@user")
+        elif t.startswith("http"):
+            tokens.append("http")
+        else:
+            tokens.append(t)
+    return " ".join(tokens)
+
+
+def sentiment_score(label, conf):
+    if label == "negative": return -conf
+    if label == "positive": return  conf
+    return 0.0
+
+
+def extract_score(result, target):
+    for item in result:
+        if item["label"].lower() == target:
+            return item["score"]
+    return 0.0
+
+
+# ── Input preparation ───────────────────────────────────────────────────────
+
+def load_handle_meta(sample_csv):
+    sample = pd.read_csv(sample_csv)
+    sample["handle_lower"] = sample["twitter"].str.lower().str.strip()
+    return sample[META_COLS].drop_duplicates("handle_lower")
+
+
+def _merge_dtype(a, b):
+    if a == b:
+        return a
+    if a.kind in "iuf" and b.kind in "iuf":
+        return np.result_type(a, b)
+    return np.dtype(object)
+
+
+def clean_chunk(chunk):
+    """Notebook section 1 for one chunk: parse dates, drop empties, add handle and clean_text."""
+    chunk["Created At"] = pd.to_datetime(chunk["Created At"], errors="coerce")
+    chunk = chunk.dropna(subset=["Text", "Created At"]).copy()
+    chunk["handle"] = chunk["Account"].astype(str).str.strip()
+    chunk["clean_text"] = chunk["Text"].apply(preprocess)
+    chunk["handle_lower"] = chunk["handle"].str.lower().str.strip()
+    return chunk
+
+
+def scan_input(input_csv, handle_meta, chunk_size, near_dup=None):
+    """
+    Cheap first pass (no scoring) that returns the dtypes the notebook's
+    whole-file read would produce. Chunked reads would otherwise infer an int
+    column as int in one chunk and float in another, and write it differently.
+    If near_dup (a NearDupIndex) is given, every cleaned text is added to it.
+    """
+    read_dtypes = {}
+    handles = set()
+    for chunk in pd.read_csv(input_csv, chunksize=chunk_size):
+        for col, dtype in chunk.dtypes.items():
+            read_dtypes[col] = _merge_dtype(read_dtypes[col], dtype) if col in read_dtypes else dtype
+        cleaned = clean_chunk(chunk)
+        handles.update(cleaned["handle_lower"].unique())
+        if near_dup is not None:
+            near_dup.add(cleaned.index, cleaned["clean_text"])  # chunked read_csv keeps a running row index
+
+    # A left merge turns int metadata into float as soon as any handle is unmatched
+    merged = pd.DataFrame({"handle_lower": sorted(handles)}).merge(handle_meta, on="handle_lower", how="left")
+    meta_dtypes = merged.dtypes.drop("handle_lower").to_dict()
+    return read_dtypes, meta_dtypes
+
+
+# ── Scoring ─────────────────────────────────────────────────────────────────
+
+def load_pipelines():
+    sentiment_pipe = pipeline(
+        "sentiment-analysis",
+        model=SENTIMENT_MODEL,
+        batch_size=BATCH_SIZE,
+        truncation=True,
+        max_length=MAX_LENGTH,
+    )
+    emotion_pipe = pipeline(
+        "text-classification",
+        model=EMOTION_MODEL,
+        return_all_scores=True,
+        truncation=True,
+    )
+    return sentiment_pipe, emotion_pipe
+
+
+def run_bucketed(pipe, texts):
+    """Score texts longest-first so each batch pads to similar lengths; results come back in input order."""
+    lengths = [len(ids) for ids in pipe.tokenizer(texts, truncation=True, max_length=MAX_LENGTH)["input_ids"]]
+    order = np.argsort(lengths, kind="stable")[::-1]
+    preds = pipe([texts[i] for i in order], batch_size=BATCH_SIZE, truncation=True, max_length=MAX_LENGTH)
+    results = [None] * len(texts)
+    for i, pred in zip(order, preds):
+        results[i] = pred
+    return results
+
+
+class PipelineScorer:
+    """Both notebook pipelines in this process: texts -> (sentiment results, emotion results)."""
+
+    def __init__(self):
+        self.sentiment_pipe, self.emotion_pipe = load_pipelines()
+        self.keys = [model_key(self.sentiment_pipe), model_key(self.emotion_pipe)]
+
+    def __call__(self, texts):
+        return run_bucketed(self.sentiment_pipe, texts), run_bucketed(self.emotion_pipe, texts)
+
+    def close(self):
+        pass
+
+
+def score_chunk(chunk, handle_meta, meta_dtypes, scorer, cache=None, near_dup=None, bound=1.0):
+    chunk = clean_chunk(chunk)
+    rows = chunk.index
+    chunk = chunk.merge(handle_meta, on="handle_lower", how="left")
+    chunk = chunk.astype(meta_dtypes)
+
+    if near_dup is None:
+        texts = chunk["clean_text"].tolist()
+    else:
+        texts = near_dup.scoring_texts(rows, chunk["clean_text"], bound)
+    if cache is None and near_dup is not None:
+        # Each representative once; the cache does this itself
+        unique = list(dict.fromkeys(texts))
+        preds = dict(zip(unique, zip(*scorer(unique))))
+        sent_preds, emo_preds = [preds[t][0] for t in texts], [preds[t][1] for t in texts]
+    elif cache is None:
+        sent_preds, emo_preds = scorer(texts)
+    else:
+        sent_preds, emo_preds = cache.score(scorer.keys, texts, scorer)
+
+    chunk["label"] = [p["label"].lower().strip() for p in sent_preds]
+    chunk["confidence"] = [p["score"] for p in sent_preds]
+    chunk["sentiment_score"] = [
+        sentiment_score(l, c) for l, c in zip(chunk["label"], chunk["confidence"])
+    ]
+    for emotion in EMOTIONS:
+        chunk[emotion] = [extract_score(r, emotion) for r in emo_preds]
+    if near_dup is not None:
+        chunk["dup_cluster"] = near_dup.cluster_of(rows)
+    return chunk
+
+
+# ── Progress checkpoint ─────────────────────────────────────────────────────
+
+def load_progress(progress_file, input_csv, chunk_size, near_dup=0):
+    if not os.path.exists(progress_file):
+        return {"chunks": 0, "offset": 0, "rows": 0}
+    with open(progress_file) as f:
+        progress = json.load(f)
+    if (progress.get("input") != os.path.abspath(input_csv) or progress.get("chunk_size") != chunk_size
+            or progress.get("near_dup", 0) != near_dup):
+        raise ValueError(f"{progress_file} was written for a different input, chunk size or --near-dup; "
+                         f"use --restart to score from scratch")
+    return progress
+
+
+def save_progress(progress_file, progress):
+    tmp = progress_file + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(progress, f)
+    os.replace(tmp, progress_file)
+
+
+def write_chunk(scored, output_csv, progress):
+    with open(output_csv, "a", newline="") as f:
+        scored.to_csv(f, index=False, header=progress["offset"] == 0)
+        f.flush()
+        os.fsync(f.fileno())
+        progress["offset"] = f.tell()
+    progress["rows"] += len(scored)
+
+
+def score_file(input_csv, sample_csv, output_csv, chunk_size=CHUNK_SIZE, restart=False,
+               cache_path=SCORE_CACHE, scorer=None, near_dup=0):
+    progress_file = output_csv + ".progress.json"
+    if restart:
+        for path in (output_csv, progress_file):
+            if os.path.exists(path):
+                os.remove(path)
+
+    handle_meta = load_handle_meta(sample_csv)
+    progress = load_progress(progress_file, input_csv, chunk_size, near_dup)
+    progress.update(input=os.path.abspath(input_csv), chunk_size=chunk_size, near_dup=near_dup)
+
+    if os.path.exists(output_csv) and not os.path.exists(progress_file):
+        raise ValueError(f"{output_csv} exists but has no progress file; "
+                         f"use --restart to overwrite it or choose another --output")
+
+    # Drop anything written after the last recorded chunk (a run killed mid-write)
+    if os.path.exists(output_csv):
+        with open(output_csv, "r+b") as f:
+            f.truncate(progress["offset"])
+
+    print(f"{datetime.now()} - Scanning {input_csv} for column types...")
+    index = NearDupIndex() if near_dup else None
+    read_dtypes, meta_dtypes = scan_input(input_csv, handle_meta, chunk_size, index)
+    if index is not None:
+        rows, clusters, reuse = index.build().stats(near_dup)
+        print(f"{datetime.now()} - Near-duplicates: {rows:,} tweets in {clusters:,} clusters; "
+              f"{reuse:,} reuse a representative's scores (similarity >= {near_dup:g})")
+    if progress["chunks"]:
+        print(f"{datetime.now()} - Resuming after chunk {progress['chunks']} ({progress['rows']:,} rows scored)")
+
+    scorer = scorer or PipelineScorer()
+    cache = ScoreCache(cache_path) if cache_path else None
+
+    try:
+        reader = pd.read_csv(input_csv, chunksize=chunk_size, dtype=read_dtypes)
+        for i, chunk in enumerate(reader):
+            if i < progress["chunks"]:
+                if index is not None:
+                    # Representatives in skipped chunks may be reused by rows still to score
+                    cleaned = clean_chunk(chunk)
+                    index.remember(cleaned.index, cleaned["clean_text"])
+                continue
+            scored = score_chunk(chunk, handle_meta, meta_dtypes, scorer, cache, index, near_dup)
+            write_chunk(scored, output_csv, progress)
+            progress["chunks"] = i + 1
+            save_progress(progress_file, progress)
+            if cache:
+                cache.commit()
+            print(f"{datetime.now()} - Chunk {i + 1}: {len(scored):,} rows (total {progress['rows']:,})")
+    finally:
+        scorer.close()
+        if cache:
+            cache.close()
+            print(f"{datetime.now()} - Score cache: {cache.hits:,} hits, {cache.misses:,} misses")
+
+    print(f"{datetime.now()} - Saved → {output_csv}  ({progress['rows']:,} rows)")
+    return progress
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score tweets with the notebook 03 sentiment and emotion models.")
+    parser.add_argument("--input", default=HOUSE_TWEETS_CSV)
+    parser.add_argument("--sample", default=SAMPLE_HOUSE_CSV)
+    parser.add_argument("--output", default=ENRICHED_CSV)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--restart", action="store_true", help="discard saved progress and start over")
+    parser.add_argument("--cache", default=SCORE_CACHE, help="score cache database")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="score with score_engine.CPUEngine over this many processes (0 = notebook pipelines)")
+    parser.add_argument("--threads", type=int, default=None, help="torch threads per worker (default cores / workers)")
+    parser.add_argument("--quantize", action="store_true", help="int8 dynamic quantisation (engine only)")
+    parser.add_argument("--onnx", action="store_true", help="ONNX Runtime models (engine only)")
+    parser.add_argument("--parquet", action="store_true",
+                        help="write a typed Parquet copy of the output when done (enriched_store.py)")
+    parser.add_argument("--near-dup", type=float, default=0, metavar="BOUND",
+                        help="give near-duplicate tweets (estimated Jaccard >= BOUND to their cluster's "
+                             "representative) the representative's scores (0 = off)")
+    args = parser.parse_args()
+
+    scorer = None
+    if args.workers:
+        scorer = CPUEngine(workers=args.workers, threads=args.threads, quantize=args.quantize, onnx=args.onnx)
+    score_file(args.input, args.sample, args.output, chunk_size=args.chunk_size, restart=args.restart,
+               cache_path=None if args.no_cache else args.cache, scorer=scorer, near_dup=args.near_dup)
+    if args.parquet:
+        write_enriched_parquet(args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Runtime metrics for the X scrapers.
+
+Counters and histograms, labelled by account and endpoint, for the things the
+progress prints can't total: request latency, tweets per request, time spent
+waiting on quota (from QuotaScheduler), retry backoff and 404 rotations. They
+show where the wall-clock time of a multi-day scrape goes.
+
+One Metrics object hangs off the QuotaScheduler (`scheduler.metrics`), which
+both scrapers already share between their workers. It is exported every
+EXPORT_SECONDS by a background task, like the OutputSink flush:
+
+  - <name>.jsonl  appends one JSON snapshot per export (every series so far)
+  - <name>.prom   rewrites a Prometheus textfile (node_exporter's textfile
+                  collector format), atomically
+
+`print_summary()` prints a per-account table at the end of a run.
+
+Series recorded by main.py / follower_scraper.py / rate_scheduler.py:
+    requests_total{account, endpoint, outcome}    outcome: ok, rate_limited, not_found, error
+    request_seconds{account, endpoint}            histogram
+    tweets_per_request{account}                   histogram
+    tweets_total{account, kind}                   kind: new, duplicate
+    quota_wait_seconds{account, endpoint, reason} histogram of QuotaScheduler waits
+    backoff_seconds{account, reason}              histogram: retry backoff and 404 pauses
+    rotations_total{account, reason}              account the client rotated away from
+    profiles_total{outcome}                       outcome: done, failed
+"""
+
+import asyncio
+import json
+import math
+import os
+import time
+from collections import defaultdict
+from datetime import datetime
+
+EXPORT_SECONDS = 60
+PREFIX = 'scraper_'
+# requests_total outcomes other than ok, as columns of the summary table
+NOT_OK = ['rate_limited', 'not_found', 'error']
+
+SECONDS_BUCKETS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 900, math.inf]
+HISTOGRAM_BUCKETS = {
+    'tweets_per_request': [0, 1, 5, 10, 15, 20, 40, math.inf],
+}
+
+
+class Histogram:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * len(bounds)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[next(i for i, b in enumerate(self.bounds) if value <= b)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile (as Prometheus' histogram_quantile would bracket it)."""
+        if not self.count:
+            return 0.0
+        seen = 0
+        for bound, n in zip(self.bounds, self.counts):
+            seen += n
+            if seen >= q * self.count:
+                return min(bound, self.max)
+        return self.max
+
+
+class Metrics:
+    def __init__(self, clock=time.time):
+        # `clock` returns epoch seconds; bench_scraper.py passes its virtual loop clock
+        self.clock = clock
+        self.started = clock()
+        self.counters = defaultdict(float)   # (name, labels) -> value
+        self.histograms = {}                  # (name, labels) -> Histogram
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        self.counters[self._key(name, labels)] += value
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        if key not in self.histograms:
+            self.histograms[key] = Histogram(HISTOGRAM_BUCKETS.get(name, SECONDS_BUCKETS))
+        self.histograms[key].observe(value)
+
+    def elapsed(self):
+        return self.clock() - self.started
+
+    # ── Export ──────────────────────────────────────────────────────────────
+
+    def snapshot(self):
+        return {
+            'time': datetime.fromtimestamp(self.clock()).isoformat(timespec='seconds'),
+            'elapsed_seconds': round(self.elapsed(), 3),
+            'counters': [{'name': name, 'labels': dict(labels), 'value': value}
+                         for (name, labels), value in sorted(self.counters.items())],
+            'histograms': [{'name': name, 'labels': dict(labels), 'count': h.count, 'sum': h.sum, 'max': h.max,
+                            'buckets': {str(b): n for b, n in zip(h.bounds, h.counts)}}
+                           for (name, labels), h in sorted(self.histograms.items())],
+        }
+
+    def prometheus(self):
+        def series(name, labels, extra=()):
+            pairs = [*labels, *extra]
+            if not pairs:
+                return PREFIX + name
+            escaped = ','.join('{}="{}"'.format(k, v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+                               for k, v in pairs)
+            return f'{PREFIX}{name}{{{escaped}}}'
+
+        lines = [f'# HELP {PREFIX}elapsed_seconds Seconds since the scraper started',
+                 f'# TYPE {PREFIX}elapsed_seconds gauge', f'{PREFIX}elapsed_seconds {self.elapsed():.3f}']
+        typed = set()
+        for (name, labels), value in sorted(self.counters.items()):
+            if name not in typed:
+                lines.append(f'# TYPE {PREFIX}{name} counter')
+                typed.add(name)
+            lines.append(f'{series(name, labels)} {value:g}')
+        for (name, labels), h in sorted(self.histograms.items()):
+            if name not in typed:
+                lines.append(f'# TYPE {PREFIX}{name} histogram')
+                typed.add(name)
+            cumulative = 0
+            for bound, n in zip(h.bounds, h.counts):
+                cumulative += n
+                le = '+Inf' if bound == math.inf else f'{bound:g}'
+                lines.append(f'{series(name + "_bucket", labels, [("le", le)])} {cumulative}')
+            lines.append(f'{series(name + "_sum", labels)} {h.sum:g}')
+            lines.append(f'{series(name + "_count", labels)} {h.count}')
+        return '\n'.join(lines) + '\n'
+
+    def export(self, path):
+        """Append a JSON snapshot to a .jsonl file, or rewrite a .prom textfile."""
+        if path.endswith('.prom'):
+            tmp = path + '.tmp'
+            with open(tmp, 'w') as f:
+                f.write(self.prometheus())
+            os.replace(tmp, path)  # the collector never sees a half-written file
+        else:
+            with open(path, 'a') as f:
+                f.write(json.dumps(self.snapshot()) + '\n')
+
+    async def export_periodically(self, path, interval=EXPORT_SECONDS):
+        """Run as a background task; cancel it and call export() once more at shutdown."""
+        while True:
+            await asyncio.sleep(interval)
+            self.export(path)
+
+    # ── Summary ─────────────────────────────────────────────────────────────
+
+    def _by_account(self, name, source, **match):
+        out = defaultdict(list)
+        for (n, labels), value in source.items():
+            labels = dict(labels)
+            if n == name and all(labels.get(k) == v for k, v in match.items()):
+                out[labels.get('account', '')].append(value)
+        return out
+
+    def print_summary(self):
+        elapsed = max(self.elapsed(), 1e-9)
+        requests = self._by_account('requests_total', self.counters)
+        # Kept apart: rate limits are time lost to quota, not errors
+        not_ok = {o: {a: sum(v) for a, v in self._by_account('requests_total', self.counters, outcome=o).items()}
+                  for o in NOT_OK}
+        latency = self._by_account('request_seconds', self.histograms)
+        per_request = self._by_account('tweets_per_request', self.histograms)
+        quota = self._by_account('quota_wait_seconds', self.histograms)
+        backoff = self._by_account('backoff_seconds', self.histograms)
+        rotations = self._by_account('rotations_total', self.counters)
+        accounts = sorted(set(requests) | set(quota) | set(backoff))
+
+        print(f'\n{"="*114}')
+        print(f'  SCRAPER METRICS  ({elapsed / 3600:.2f}h wall clock)')
+        print(f'{"="*114}')
+        print(f'  {"account":<22} {"requests":>8} {"429":>5} {"404":>5} {"error":>5} {"req/min":>7} {"busy":>6} '
+              f'{"mean s":>7} {"p95 s":>6} {"tweets/req":>10} {"quota wait":>10} {"backoff":>8} {"rotations":>9}')
+        for account in accounts:
+            n = sum(requests.get(account, []))
+            lat = latency.get(account, [])
+            lat_count, lat_sum = sum(h.count for h in lat), sum(h.sum for h in lat)
+            p95 = max((h.quantile(0.95) for h in lat), default=0.0)
+            tpr = per_request.get(account, [])
+            tweets_per_req = sum(h.sum for h in tpr) / max(sum(h.count for h in tpr), 1)
+            outcomes = ' '.join(f'{not_ok[o].get(account, 0):>5.0f}' for o in NOT_OK)
+            print(f'  {account:<22} {n:>8.0f} {outcomes} {n / elapsed * 60:>7.2f} '
+                  f'{lat_sum / elapsed:>6.1%} {lat_sum / max(lat_count, 1):>7.2f} {p95:>6.2f} {tweets_per_req:>10.1f} '
+                  f'{sum(h.sum for h in quota.get(account, [])):>9.0f}s {sum(h.sum for h in backoff.get(account, [])):>7.0f}s '
+                  f'{sum(rotations.get(account, [])):>9.0f}')
+
+        reasons = defaultdict(float)
+        for (name, labels), h in self.histograms.items():
+            if name in ('quota_wait_seconds', 'backoff_seconds'):
+                reasons[f'{name.replace("_seconds", "")}: {dict(labels).get("reason", "")}'] += h.sum
+        if reasons:
+            print(f'  {"-"*112}')
+            for reason, secs in sorted(reasons.items(), key=lambda x: -x[1]):
+                print(f'  {reason:<60} {secs:>10.0f}s')
+        print(f'{"="*114}')
@@ -0,0 +1,93 @@
+"""
+Per-stage wall time, peak memory and hottest functions for pipeline scripts.
+
+    profiler = StageProfiler(enabled=args.profile)
+    with profiler.stage("load_tweets"):
+        tweets = load_tweets()
+    profiler.print_report()
+
+Each stage runs under cProfile and tracemalloc, and records its wall time, the
+peak traced memory while it ran (NumPy and pandas buffers are traced too), and
+its TOP_FUNCTIONS functions by cumulative time. Both tools add overhead, so
+compare stage times with other profiled runs rather than with plain ones.
+Disabled, stage() does nothing. Stages must not nest.
+
+Used by dashboard/scripts/preprocess.py --profile and bench_pipeline.py.
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+TOP_FUNCTIONS = 10
+
+
+class StageProfiler:
+    def __init__(self, enabled=True, top=TOP_FUNCTIONS):
+        self.enabled = enabled
+        self.top = top
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        profile = cProfile.Profile()
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            seconds = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1] - base
+            if started_tracing:
+                tracemalloc.stop()
+            self.stages.append({"stage": name, "seconds": seconds, "peak_mb": peak / 1e6,
+                                "top": top_functions(profile, self.top)})
+
+    def add(self, records, prefix=""):
+        """Append stage records measured elsewhere (e.g. another process's to_json())."""
+        self.stages += [{**r, "stage": prefix + r["stage"]} for r in records]
+
+    def to_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.stages, f, indent=1)
+
+    def print_report(self, functions=True):
+        if not self.stages:
+            return
+        total = sum(s["seconds"] for s in self.stages)
+        print(f"\n{'=' * 60}\n  STAGES  ({total:.2f}s profiled)\n{'=' * 60}")
+        print(f"  {'stage':<34} {'seconds':>8} {'share':>6} {'peak MB':>8}")
+        for s in self.stages:
+            print(f"  {s['stage']:<34} {s['seconds']:>8.2f} {s['seconds'] / max(total, 1e-9):>6.1%} {s['peak_mb']:>8.1f}")
+        if functions:
+            for s in self.stages:
+                print(f"\n  {s['stage']} — top functions by cumulative time")
+                for f in s["top"][:5]:
+                    print(f"    {f['cumtime']:>8.2f}s {f['calls']:>9,}  {f['function']}")
+        print("=" * 60)
+
+
+def top_functions(profile, n):
+    """The n functions with the most cumulative time, skipping the profiler's own frames."""
+    stats = pstats.Stats(profile).stats
+    rows = []
+    for (filename, line, func), (_, calls, _, cumtime, _) in stats.items():
+        if filename == __file__ or func in ("<method 'disable' of '_lsprof.Profiler' objects>",):
+            continue
+        where = f"{'/'.join(filename.split(os.sep)[-2:])}:{line}({func})" if line else func
+        rows.append({"function": where, "cumtime": cumtime, "calls": calls})
+    rows.sort(key=lambda r: -r["cumtime"])
+    return rows[:n]
@@ -0,0 +1,211 @@
+"""
+Synthetic, schema-faithful inputs for the analysis pipeline at any scale.
+
+The repo only carries the sampled member tables, and house_tweets_enriched.csv
+is not committed at all, so the dashboard build and the notebook 03 / 04
+feature steps can't be tried at full-House or multi-year volume. This writes
+
+    <out>/data/processed/user_full.csv
+    <out>/data/processed/house_with_features.csv
+    <out>/data/processed/house_tweets_enriched.csv
+
+laid out like the project root, so dashboard/scripts/preprocess.py can run with
+<out> as its working directory.
+
+  - member tables are the real ones repeated `scale` times. Copy i > 0 gets
+    handle_lower / twitter / bioguide suffixed with _i; every other column,
+    and so every dtype and null pattern, is kept
+  - tweets have the 26 columns and order notebook 03 writes. Each member gets
+    a lognormal number of tweets around --tweets-per-member (1,088 in the real
+    file) between START and END, newest first like the scraper. Text mixes
+    @mentions, hashtags and t.co links, with a share of templated
+    near-repeats; clean_text is notebook 03's preprocess() of it; labels,
+    scores and emotion distributions are random but consistent with each
+    other (sentiment_score = ±confidence or 0; emotions sum to 1)
+
+Usage:
+    python synth_data.py --scale 10 --out /tmp/synth10
+    python synth_data.py --scale 1 --tweets-per-member 5000 --out /tmp/multiyear
+"""
+
+import argparse
+import os
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+PROCESSED = Path(__file__).resolve().parents[1] / "data" / "processed"
+START = pd.Timestamp("2023-01-01", tz="UTC")
+END = pd.Timestamp("2024-11-30", tz="UTC")
+TWEETS_PER_MEMBER = 1088
+TEMPLATE_SHARE = 0.15   # tweets that repeat one of the member's templates with a new link
+ROWS_PER_WRITE = 250_000
+EMOTIONS = ["anger", "fear", "joy", "disgust", "sadness", "surprise", "neutral"]
+LABELS = ["negative", "neutral", "positive"]
+ENRICHED_COLUMNS = ["Account", "Username", "Text", "Created At", "Retweets", "Likes", "Tweet_ID", "Display_Name",
+                    "handle", "clean_text", "handle_lower", "official_full", "quartile", "party_code", "state",
+                    "pct_small_donors", "label", "confidence", "sentiment_score"] + EMOTIONS
+WORDS = ("the a to of and in for on our we this is today with my our act bill vote house congress american "
+         "families jobs economy border security energy prices inflation veterans health care communities "
+         "district proud honored great thank support fight protect freedom rights future work together "
+         "budget taxes spending debt crisis biden administration democrats republicans committee hearing "
+         "floor passed introduced legislation funding education students small businesses farmers "
+         "workers police schools military ukraine israel china immigration climate infrastructure").split()
+HASHTAGS = ["#NDAA", "#BorderCrisis", "#InflationReductionAct", "#SOTU", "#Veterans", "#SmallBusiness"]
+
+
+def preprocess(text):
+    """notebook 03's preprocess(): mentions -> @user, links -> http."""
+    tokens = []
+    for t in str(text).split():
+        if t.startswith("@") and len(t) > 1:
+            tokens.append("@user")
+        elif t.startswith("http"):
+            tokens.append("http")
+        else:
+            tokens.append(t)
+    return " ".join(tokens)
+
+
+# ── Members ─────────────────────────────────────────────────────────────────
+
+def replicate(df, scale, id_cols):
+    """df repeated scale times; copy i > 0 has id_cols suffixed with _i."""
+    copies = []
+    for i in range(scale):
+        copy = df.copy()
+        if i:
+            for col in id_cols:
+                if col in copy.columns:
+                    copy[col] = copy[col].where(copy[col].isna(), copy[col].astype(str) + f"_{i}")
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+def synth_members(scale, source=PROCESSED):
+    user = replicate(pd.read_csv(source / "user_full.csv"), scale, ["handle_lower"])
+    house = replicate(pd.read_csv(source / "house_with_features.csv"), scale,
+                      ["twitter", "handle_lower", "bioguide"])
+    return user, house
+
+
+# ── Tweets ──────────────────────────────────────────────────────────────────
+
+def random_texts(n, rng):
+    """n tweet texts: a few @mentions, 8-40 words, maybe a hashtag, maybe a t.co link."""
+    lengths = rng.integers(8, 41, n)
+    words = np.asarray(WORDS)[rng.integers(0, len(WORDS), lengths.sum())]
+    bounds = np.r_[0, np.cumsum(lengths)]
+    mentions = rng.poisson(0.4, n)
+    hashtag = rng.random(n) < 0.2
+    link = rng.random(n) < 0.5
+    tag_idx = rng.integers(0, len(HASHTAGS), n)
+    link_ids = rng.integers(36 ** 9, 36 ** 10, n)
+    texts = []
+    for i in range(n):
+        parts = [f"@user{rng_id}" for rng_id in range(mentions[i])]
+        parts += words[bounds[i]:bounds[i + 1]].tolist()
+        if hashtag[i]:
+            parts.append(HASHTAGS[tag_idx[i]])
+        if link[i]:
+            parts.append(f"https://t.co/{np.base_repr(link_ids[i], 36)}")
+        texts.append(" ".join(parts))
+    return texts
+
+
+def synth_tweets(members, tweets_per_member, rng):
+    """Enriched tweet rows for one block of members (rows of house_with_features)."""
+    counts = np.maximum(rng.lognormal(np.log(tweets_per_member) - 0.32, 0.8, len(members)).astype(int), 1)
+    n = counts.sum()
+    member = np.repeat(np.arange(len(members)), counts)
+
+    texts = random_texts(n, rng)
+    # Templated near-repeats: the member's first tweet again, with a fresh link
+    templated = rng.random(n) < TEMPLATE_SHARE
+    first = np.r_[0, np.cumsum(counts)[:-1]][member]
+    for i in np.flatnonzero(templated & (np.arange(n) != first)):
+        texts[i] = " ".join(t for t in texts[first[i]].split() if not t.startswith("http")) \
+            + f" https://t.co/{np.base_repr(int(rng.integers(36 ** 9, 36 ** 10)), 36)}"
+
+    span = (END - START).total_seconds()
+    seconds = rng.random(n) * span
+    # Newest first within each member, as the scraper writes them
+    order = np.lexsort((-seconds, member))
+    seconds = seconds[order]
+    created = START + pd.to_timedelta(seconds, unit="s")
+
+    labels = np.asarray(LABELS)[rng.choice(3, n, p=[0.35, 0.4, 0.25])]
+    confidence = rng.uniform(0.4, 1.0, n)
+    emotions = rng.dirichlet(np.full(len(EMOTIONS), 0.6), n)
+
+    meta = members.iloc[member].reset_index(drop=True)
+    account = meta["twitter"].astype(str).to_numpy()
+    out = pd.DataFrame({
+        "Account": account,
+        "Username": meta["official_full"].to_numpy(),
+        "Text": texts,
+        "Created At": created.strftime("%Y-%m-%d %H:%M:%S+00:00"),
+        "Retweets": rng.lognormal(2.5, 1.8, n).astype(np.int64),
+        "Likes": rng.lognormal(4.0, 1.8, n).astype(np.int64),
+        "Tweet_ID": (1_600_000_000_000_000_000 + (seconds * 4e9).astype(np.int64)
+                     + rng.integers(0, 4_000_000, n)),
+        "Display_Name": np.nan,
+        "handle": account,
+        "clean_text": [preprocess(t) for t in texts],
+        "handle_lower": meta["handle_lower"].to_numpy(),
+    })
+    for col in ["official_full", "quartile", "party_code", "state", "pct_small_donors"]:
+        out[col] = meta[col].to_numpy()
+    out["label"] = labels
+    out["confidence"] = confidence
+    out["sentiment_score"] = np.select([labels == "negative", labels == "positive"], [-confidence, confidence], 0.0)
+    for j, emotion in enumerate(EMOTIONS):
+        out[emotion] = emotions[:, j]
+    return out[ENRICHED_COLUMNS]
+
+
+def write_tweets(house, path, tweets_per_member, seed=0):
+    """Write the enriched CSV a block of members at a time. Returns the row count."""
+    rng = np.random.default_rng(seed)
+    members = house.dropna(subset=["twitter"]).drop_duplicates("handle_lower")
+    block = max(1, ROWS_PER_WRITE // tweets_per_member)
+    rows = 0
+    tmp = str(path) + ".tmp"
+    for start in range(0, len(members), block):
+        tweets = synth_tweets(members.iloc[start:start + block], tweets_per_member, rng)
+        tweets.to_csv(tmp, mode="a" if start else "w", header=not start, index=False)
+        rows += len(tweets)
+    os.replace(tmp, path)
+    return rows
+
+
+def generate(out, scale=1, tweets_per_member=TWEETS_PER_MEMBER, seed=0, source=PROCESSED):
+    """Write all three files under <out>/data/processed. Returns {file name: rows}."""
+    processed = Path(out) / "data" / "processed"
+    processed.mkdir(parents=True, exist_ok=True)
+    user, house = synth_members(scale, source)
+    user.to_csv(processed / "user_full.csv", index=False)
+    house.to_csv(processed / "house_with_features.csv", index=False)
+    tweets = write_tweets(house, processed / "house_tweets_enriched.csv", tweets_per_member, seed)
+    return {"user_full.csv": len(user), "house_with_features.csv": len(house), "house_tweets_enriched.csv": tweets}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic pipeline inputs at a chosen scale.")
+    parser.add_argument("--scale", type=int, default=1, help="copies of the member tables (1, 10, 100...)")
+    parser.add_argument("--tweets-per-member", type=int, default=TWEETS_PER_MEMBER,
+                        help="mean tweets per member (raise it for multi-year volume)")
+    parser.add_argument("--out", required=True, help="directory to write data/processed/ under")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{datetime.now()} - Generating {args.scale}x members, ~{args.tweets_per_member:,} tweets each...")
+    for name, rows in generate(args.out, args.scale, args.tweets_per_member, args.seed).items():
+        print(f"  {name:<28} {rows:>12,} rows")
+    print(f"{datetime.now()} - Saved → {Path(args.out) / 'data' / 'processed'}")
+
+
+if __name__ == "__main__":
+    main()
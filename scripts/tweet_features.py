@@ -0,0 +1,119 @@
+"""
+Vectorised feature helpers for notebooks/04_feature_engineering_modeling.ipynb.
+
+The notebook built three features with Python-level loops:
+
+  - sentiment slope: scipy.stats.linregress once per member (calc_slopes)
+  - emotion entropy: scipy.stats.entropy once per tweet (DataFrame.apply)
+  - margin of victory: nlargest(2) once per House district
+
+Each function here computes the same values with NumPy segment reductions
+over group codes, so the cost is a few passes over the arrays regardless of
+how many members, tweets or districts there are. Outputs match the loops up to
+float rounding (closed-form OLS and entropy sum in a different order).
+
+Usage from the notebook:
+
+    import sys; sys.path.insert(0, "../scripts")
+    from tweet_features import sentiment_slopes, emotion_entropy, district_margins
+"""
+
+import numpy as np
+import pandas as pd
+
+EMOTIONS = ["anger", "fear", "joy", "disgust", "sadness", "surprise", "neutral"]
+MIN_SLOPE_TWEETS = 10
+
+
+def _segments(sorted_codes):
+    """Start offset of each run of equal codes in a sorted code array."""
+    if len(sorted_codes) == 0:
+        return np.array([], dtype=int)
+    return np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+
+
+# ── Sentiment slope ─────────────────────────────────────────────────────────
+
+def sentiment_slopes(tweets, by="handle_lower", x="days_since_start", y="sentiment_score",
+                     min_tweets=MIN_SLOPE_TWEETS):
+    """
+    OLS slope of y on x for every group, as calc_slopes: rows with x or y
+    missing are dropped, and groups left with fewer than min_tweets rows get
+    NaN. Also NaN where every x in a group is identical (linregress raises).
+    Returns a DataFrame [by, "sentiment_slope"] sorted by group.
+    """
+    codes, handles = pd.factorize(tweets[by], sort=True)
+    xs = tweets[x].to_numpy(dtype=float)
+    ys = tweets[y].to_numpy(dtype=float)
+    keep = (codes >= 0) & ~np.isnan(xs) & ~np.isnan(ys)
+    codes, xs, ys = codes[keep], xs[keep], ys[keep]
+
+    k = len(handles)
+    n = np.bincount(codes, minlength=k).astype(float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x_mean = np.bincount(codes, weights=xs, minlength=k) / n
+        y_mean = np.bincount(codes, weights=ys, minlength=k) / n
+        # Centred sums (two-pass), the same form linregress uses
+        dx = xs - x_mean[codes]
+        ssxm = np.bincount(codes, weights=dx * dx, minlength=k)
+        ssxym = np.bincount(codes, weights=dx * (ys - y_mean[codes]), minlength=k)
+        slope = ssxym / ssxm
+    slope[(n < min_tweets) | (ssxm == 0)] = np.nan
+
+    return pd.DataFrame({by: np.asarray(handles), "sentiment_slope": slope})
+
+
+# ── Emotion entropy ─────────────────────────────────────────────────────────
+
+def emotion_entropy(tweets, emotions=EMOTIONS):
+    """
+    Shannon entropy (natural log) of each row's emotion scores normalised to
+    sum to 1, as scipy.stats.entropy row by row. NaN where the scores sum to 0
+    or any score is missing. Returns a float array aligned with tweets.
+    """
+    scores = tweets[emotions].to_numpy(dtype=float)
+    total = scores.sum(axis=1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        p = scores / total
+        terms = np.where(p > 0, -p * np.log(np.where(p > 0, p, 1.0)), 0.0)
+    h = terms.sum(axis=1)
+    h[(total[:, 0] == 0) | np.isnan(total[:, 0])] = np.nan
+    return h
+
+
+# ── Margin of victory ───────────────────────────────────────────────────────
+
+def district_margins(returns, keys=("state_po", "district"), votes="candidatevotes"):
+    """
+    Winner's vote share minus the runner-up's (0 if unopposed) for every
+    district in one year's general-election returns. Ties are broken by row
+    order, like nlargest(2). Returns [state, district, margin_of_victory,
+    winner_share, total_votes] sorted by district key.
+    """
+    keys = list(keys)
+    grouped = returns.groupby(keys, sort=True)
+    codes = grouped.ngroup().to_numpy()
+    totals = grouped[votes].sum()
+    keep = codes >= 0
+    codes = codes[keep]
+    v = returns[votes].to_numpy(dtype=float)[keep]
+    share = v / totals.to_numpy(dtype=float)[codes] * 100
+
+    # Within each district: most votes first, ties in row order, missing votes last
+    missing = np.isnan(v)
+    order = np.lexsort((np.arange(len(v)), np.where(missing, 0.0, -v), missing, codes))
+    sorted_codes = codes[order]
+    starts = _segments(sorted_codes)
+    nxt = np.minimum(starts + 1, len(order) - 1)
+    has_runner_up = (starts + 1 < len(order)) & (sorted_codes[nxt] == sorted_codes[starts])
+
+    winner_share = share[order[starts]]
+    runner_up_share = np.where(has_runner_up, share[order[nxt]], 0.0)
+    index = totals.index
+    return pd.DataFrame({
+        "state": index.get_level_values(0),
+        "district": index.get_level_values(1).astype(int),
+        "margin_of_victory": winner_share - runner_up_share,
+        "winner_share": winner_share,
+        "total_votes": totals.to_numpy(),
+    })